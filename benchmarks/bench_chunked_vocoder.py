@@ -0,0 +1,75 @@
+"""
+Compare chunked and one-shot vocoding.
+
+For each vocoder, a long utterance is synthesized to a mel spectrogram and
+vocoded once in a single call and once with `infer_chunked`. The script
+reports the time to the first chunk, the total time of both paths and the
+max. absolute difference between the (peak normalized) outputs, and fails
+if the difference exceeds `CHUNKED_VOCODER_ATOL`.
+
+Usage:
+    python benchmarks/bench_chunked_vocoder.py --vocoders hifigan vocos
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from tts_arabic import get_model
+from tts_arabic.models.tts_models import CHUNKED_VOCODER_ATOL
+
+TEXT = ("اَلسَّلامُ عَلَيكُم يَا صَدِيقِي. "
+        "اَلْقَهْوَةُ مَشْرُوبٌ يُعَدُّ مِنْ بُذُورِ اَلْبُنِّ اَلْمُحَمَّصَةِ. ")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--vocoders', nargs='+',
+                        default=['hifigan', 'vocos', 'vocos44'])
+    parser.add_argument('--repeat', type=int, default=8,
+                        help="number of times the sample text is repeated")
+    parser.add_argument('--chunk-size', type=int, default=256)
+    parser.add_argument('--context', type=int, default=32)
+    parser.add_argument('--crossfade', type=int, default=4)
+    args = parser.parse_args()
+
+    failed = False
+    for vocoder_id in args.vocoders:
+        model = get_model('fastpitch', vocoder_id, cuda=None)
+        mel_spec = model.ttmel_model.infer(TEXT*args.repeat)
+        vocoder = model.mel2wave_model
+
+        time_start = time.perf_counter()
+        wave_full = vocoder.infer(mel_spec)
+        time_full = time.perf_counter() - time_start
+
+        chunks = []
+        time_start = time.perf_counter()
+        for chunk in vocoder.infer_chunked(mel_spec,
+                                           chunk_size=args.chunk_size,
+                                           context=args.context,
+                                           crossfade=args.crossfade):
+            if not chunks:
+                time_first = time.perf_counter() - time_start
+            chunks.append(chunk)
+        time_chunked = time.perf_counter() - time_start
+        wave_chunked = np.concatenate(chunks)
+
+        n = min(len(wave_full), len(wave_chunked))
+        peak = np.max(np.abs(wave_full)) + 1e-5
+        max_diff = np.max(np.abs(wave_full[:n] - wave_chunked[:n])) / peak
+        ok = max_diff <= CHUNKED_VOCODER_ATOL and len(wave_full) == len(wave_chunked)
+        failed |= not ok
+
+        print(f"{vocoder_id}: {mel_spec.shape[-1]} frames, "
+              f"one-shot {time_full:.3f}s, chunked {time_chunked:.3f}s "
+              f"(first chunk after {time_first:.3f}s, {len(chunks)} chunks), "
+              f"max diff {max_diff:.2e} (atol {CHUNKED_VOCODER_ATOL:.0e}) "
+              f"{'OK' if ok else 'FAIL'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
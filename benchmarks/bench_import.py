@@ -0,0 +1,107 @@
+"""
+Track the cost of importing tts_arabic and fail when it regresses.
+
+Each scenario is imported `--runs` times in a fresh Python process. The
+script reports the median import time and the resident memory (RSS) right
+after the import, relative to a bare interpreter, and checks that the heavy
+dependencies (onnxruntime, gdown, sounddevice, ...) and the model modules
+were not imported. It exits with status 1 if a budget is exceeded or a
+deferred module was loaded.
+
+The budgets are deliberately loose (machines differ); they catch an eager
+import of onnxruntime or of the model modules creeping back in, not noise.
+
+Usage:
+    python benchmarks/bench_import.py --runs 7 --json import.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+_SNIPPET = """
+import json, resource, sys, time
+time_start = time.perf_counter()
+{statement}
+time_import = time.perf_counter() - time_start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == 'darwin':
+    rss //= 1024  # bytes on macOS, kB elsewhere
+print(json.dumps({{'time': time_import, 'rss_kb': rss,
+                   'modules': sorted(sys.modules)}}))
+"""
+
+DEFERRED_MODULES = [
+    'onnxruntime',
+    'gdown',
+    'packaging',
+    'sounddevice',
+    'tts_arabic.models.tts_models',
+    'tts_arabic.vocalizer.models.catt.network',
+    'tts_arabic.vocalizer.models.shakkala.network',
+    'tts_arabic.vocalizer.models.shakkelha.network',
+]
+
+# statement: (max. median import time in ms, max. RSS increase in MB,
+#             modules that must not be imported)
+SCENARIOS = {
+    'import tts_arabic': (
+        50, 5, DEFERRED_MODULES + ['numpy', 'tts_arabic.text']),
+    'from tts_arabic import text': (400, 40, DEFERRED_MODULES),
+    'from tts_arabic import tts, vocalize': (500, 50, DEFERRED_MODULES),
+    'from tts_arabic.utils.audio import save_wave': (
+        400, 40, DEFERRED_MODULES + ['tts_arabic.text']),
+}
+
+
+def measure(statement):
+    output = subprocess.run(
+        [sys.executable, '-c', _SNIPPET.format(statement=statement)],
+        check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-scale', type=float, default=1.,
+                        help="multiply all time/RSS budgets (slow machines)")
+    parser.add_argument('--json', default=None,
+                        help="optionally write the results to this file")
+    args = parser.parse_args()
+
+    baseline = [measure('pass') for _ in range(args.runs)]
+    baseline_rss = statistics.median(run['rss_kb'] for run in baseline)
+
+    results, failures = {}, []
+    for statement, (max_ms, max_mb, deferred) in SCENARIOS.items():
+        runs = [measure(statement) for _ in range(args.runs)]
+        time_ms = statistics.median(run['time'] for run in runs) * 1000
+        rss_mb = (statistics.median(run['rss_kb'] for run in runs)
+                  - baseline_rss) / 1024
+        loaded = [name for name in deferred if name in runs[0]['modules']]
+        results[statement] = {'time_ms': time_ms, 'rss_mb': rss_mb,
+                              'max_time_ms': max_ms*args.budget_scale,
+                              'max_rss_mb': max_mb*args.budget_scale,
+                              'loaded_deferred_modules': loaded}
+        print(f"{statement:46s} {time_ms:8.1f}ms (budget {max_ms*args.budget_scale:6.0f})"
+              f"  +{rss_mb:6.1f}MB RSS (budget {max_mb*args.budget_scale:4.0f})")
+        if time_ms > max_ms*args.budget_scale:
+            failures.append(f"{statement}: import time {time_ms:.1f}ms")
+        if rss_mb > max_mb*args.budget_scale:
+            failures.append(f"{statement}: RSS +{rss_mb:.1f}MB")
+        if loaded:
+            failures.append(f"{statement}: imported {', '.join(loaded)}")
+
+    if args.json is not None:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'baseline_rss_mb': baseline_rss / 1024,
+                       'results': results}, f, indent=2)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Measure the resident memory (RSS) of loading several TTS configurations in
+one process, with and without shared ONNX sessions.
+
+For each mode, a fresh Python process loads the `--configs`
+(`model_id+vocoder_id`) one after another with `get_model` and synthesizes
+one sentence with each, so that the memory arenas are allocated. The RSS
+after each configuration is reported, relative to the process after
+`import tts_arabic` and onnxruntime. With sharing (the default, see
+`utils.sessions.create_session`), configurations that use the same vocoder
+reuse its session and the denoiser session; without it
+(`TTS_ARABIC_SHARE_SESSIONS=0`), every configuration holds its own copies.
+
+Usage:
+    python benchmarks/bench_sessions.py --configs fastpitch+hifigan mixer128+hifigan --json sessions.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+_SNIPPET = """
+import json, os, resource, sys
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1])*os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:  # no procfs: peak RSS (bytes on macOS)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / 2**20 if sys.platform == 'darwin' else rss / 2**10
+
+import onnxruntime
+from tts_arabic.models.core import get_model
+from tts_arabic.utils.sessions import session_info
+baseline = rss_mb()
+models, results = [], []
+for config in {configs!r}:
+    model_id, vocoder_id = config.split('+')
+    models.append(get_model(model_id, vocoder_id, cuda=None))
+    models[-1].infer({text!r})
+    results.append({{'config': config, 'rss_mb': rss_mb() - baseline}})
+print(json.dumps({{'results': results, 'sessions': session_info()}}))
+"""
+
+TEXT = "اَلسَّلامُ عَلَيكُم يَا صَدِيقِي."
+
+
+def measure(configs, share):
+    env = dict(os.environ, TTS_ARABIC_SHARE_SESSIONS='1' if share else '0')
+    output = subprocess.run(
+        [sys.executable, '-c', _SNIPPET.format(configs=configs, text=TEXT)],
+        check=True, capture_output=True, text=True, env=env).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--configs', nargs='+',
+                        default=['fastpitch+hifigan', 'mixer128+hifigan',
+                                 'mixer80+hifigan', 'fastpitch+vocos'])
+    parser.add_argument('--json', default=None,
+                        help="optionally write the results to this file")
+    args = parser.parse_args()
+
+    shared = measure(args.configs, share=True)
+    separate = measure(args.configs, share=False)
+
+    print(f"{'configuration':24s} {'shared':>10s} {'separate':>10s}"
+          f" {'saved':>10s}   (cumulative RSS increase)")
+    rows = []
+    for row_shared, row_separate in zip(shared['results'],
+                                        separate['results']):
+        saved = row_separate['rss_mb'] - row_shared['rss_mb']
+        rows.append({'config': row_shared['config'],
+                     'shared_rss_mb': row_shared['rss_mb'],
+                     'separate_rss_mb': row_separate['rss_mb'],
+                     'saved_mb': saved})
+        print(f"{row_shared['config']:24s} {row_shared['rss_mb']:8.1f}MB"
+              f" {row_separate['rss_mb']:8.1f}MB {saved:8.1f}MB")
+    print(f"sessions: {shared['sessions']['created']} created, "
+          f"{shared['sessions']['reused']} reused with sharing; "
+          f"{separate['sessions']['created']} without")
+
+    if args.json is not None:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'results': rows, 'sessions': shared['sessions']},
+                      f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
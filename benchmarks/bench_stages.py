@@ -0,0 +1,361 @@
+"""
+Per-stage benchmark of `FastPitch2Wave.infer`, with a compare mode to spot
+regressions between versions.
+
+`run` synthesizes texts of several length buckets with every Text->Mel
+model / vocoder combination and times each stage of the pipeline
+separately: vowelize, G2P, token ids, Text->Mel, vocoder, denoiser and
+normalization. Each combination runs in a fresh Python process, so that its
+peak RSS can be reported, and is warmed up before timing. For each
+combination and bucket, the results hold the mean and p50/p95/p99 latency of
+every stage and of the total, the real-time factor (RTF: synthesis time /
+audio duration), the throughput (utterances and audio seconds per second)
+and the peak RSS of the process so far.
+
+`compare` matches two result files by model, vocoder, bucket and stage,
+prints the relative changes and exits with status 1 if a latency, the RTF
+or the peak RSS grew by more than `--threshold`.
+
+The stages follow `FastPitch2Wave.infer`, except that G2P and token ids are
+timed as `_tokenize` and `_tokens_to_ids`, while `infer` uses the fused
+`_text_to_ids` (same ids). The denoiser is a separate stage for HiFi-GAN
+only; Vocos denoises inside the vocoder graph. Repeated words are served
+from the phonetiser's word cache unless `--cold-g2p` is given.
+
+Usage:
+    python benchmarks/bench_stages.py run --json new.json
+    python benchmarks/bench_stages.py run --models fastpitch --vocoders hifigan vocos --buckets short long --runs 50
+    python benchmarks/bench_stages.py compare base.json new.json --threshold 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+
+STAGES = ['vowelize', 'g2p', 'token_ids', 'text_to_mel', 'vocoder',
+          'denoiser', 'normalize']
+
+# target length in characters (diacritics included) of each bucket
+BUCKETS = {'short': 40, 'medium': 160, 'long': 480}
+
+WORDS = ("اَلسَّلامُ عَلَيكُم يَا صَدِيقِي. "
+         "اَلْقَهْوَةُ مَشْرُوبٌ يُعَدُّ مِنْ بُذُورِ اَلْبُنِّ اَلْمُحَمَّصَةِ. "
+         "هَلْ تُسَاعِدُنَا فِي فَهْمِ هَذِهِ الْمَسْأَلَةِ؟ "
+         "وَصَلَ الْقِطَارُ إِلَى الْمَحَطَّةِ مُتَأَخِّرًا. "
+         "كَانَ الْجَوُّ جَمِيلًا فَخَرَجْنَا إِلَى الْحَدِيقَةِ.").split()
+
+_diacritics_re = re.compile('[ً-ْٰ]')
+
+
+def bucket_texts(target_length, n_texts=4):
+    """`n_texts` different texts of about `target_length` characters."""
+    texts = []
+    for offset in range(n_texts):
+        words, length = [], 0
+        while length < target_length:
+            words.append(WORDS[(offset*7 + len(words)) % len(WORDS)])
+            length += len(words[-1]) + 1
+        texts.append(' '.join(words).rstrip('.؟') + '.')
+    return texts
+
+
+def percentiles(values):
+    import numpy as np
+    values_ms = np.asarray(values)*1000
+    p50, p95, p99 = np.percentile(values_ms, [50, 95, 99])
+    return {'mean_ms': float(values_ms.mean()), 'p50_ms': float(p50),
+            'p95_ms': float(p95), 'p99_ms': float(p99)}
+
+
+def peak_rss_mb():
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == 'darwin' else rss / 2**10
+
+
+# worker (one model/vocoder combination per process)
+
+def time_stages(model, text, vowelizer=None, denoise=0.005, volume=0.9):
+    """
+    Synthesize `text` like `FastPitch2Wave.infer`, stage by stage.
+
+    Returns:
+        (ndarray, dict): Waveform and seconds spent per stage
+    """
+    import numpy as np
+    ttmel, vocoder = model.ttmel_model, model.mel2wave_model
+    denoiser = getattr(vocoder, 'denoiser', None)
+    times = {}
+    time_last = time.perf_counter()
+
+    def lap(stage):
+        nonlocal time_last
+        now = time.perf_counter()
+        times[stage] = now - time_last
+        time_last = now
+
+    text = ttmel._vowelize(text, vowelizer=vowelizer)
+    lap('vowelize')
+    tokens = ttmel._tokenize(text)
+    lap('g2p')
+    token_ids = ttmel._tokens_to_ids(tokens)
+    lap('token_ids')
+    mel_spec = ttmel.infer_ids(token_ids)
+    lap('text_to_mel')
+    if denoiser is not None:
+        wave = vocoder.infer(mel_spec, denoise=0.)
+        lap('vocoder')
+        if denoise > 0:
+            wave = denoiser.infer(wave, denoise=denoise)
+        lap('denoiser')
+    else:
+        wave = vocoder.infer(mel_spec, denoise=denoise)
+        lap('vocoder')
+        times['denoiser'] = 0.
+    wave = volume*(wave / (np.max(np.abs(wave))+1e-5))
+    lap('normalize')
+    return wave, times
+
+
+def run_worker(config):
+    import numpy as np
+    from tts_arabic import text as text_utils
+    from tts_arabic.models.core import _vocoder_id_to_sr, get_model
+
+    model = get_model(config['model_id'], config['vocoder_id'], cuda=None)
+    sample_rate = _vocoder_id_to_sr.get(config['vocoder_id'], 22050)
+    vowelizer = config['vowelizer']
+
+    results = []
+    for bucket in config['buckets']:
+        texts = bucket_texts(BUCKETS[bucket])
+        if vowelizer is not None:
+            texts = [_diacritics_re.sub('', text) for text in texts]
+        wave, _ = time_stages(model, texts[0], vowelizer, config['denoise'])
+        reference = model.infer(texts[0], denoise=config['denoise'],
+                                vowelizer=vowelizer)
+        for i in range(config['warmup']):
+            time_stages(model, texts[i % len(texts)], vowelizer,
+                        config['denoise'])
+
+        stage_times = {stage: [] for stage in STAGES}
+        totals, audio_seconds = [], []
+        for i in range(config['runs']):
+            if config['cold_g2p']:
+                text_utils.clear_word_cache()
+            wave_i, times = time_stages(model, texts[i % len(texts)],
+                                        vowelizer, config['denoise'])
+            for stage in STAGES:
+                stage_times[stage].append(times[stage])
+            totals.append(sum(times.values()))
+            audio_seconds.append(len(wave_i) / sample_rate)
+
+        results.append({
+            'model_id': config['model_id'],
+            'vocoder_id': config['vocoder_id'],
+            'bucket': bucket,
+            'n_chars': float(np.mean([len(text) for text in texts])),
+            'audio_s': float(np.mean(audio_seconds)),
+            'stages': {stage: percentiles(stage_times[stage])
+                       for stage in STAGES},
+            'latency': percentiles(totals),
+            'rtf': sum(totals) / sum(audio_seconds),
+            'utterances_per_s': len(totals) / sum(totals),
+            'audio_s_per_s': sum(audio_seconds) / sum(totals),
+            'peak_rss_mb': peak_rss_mb(),
+            # the stage-wise path must give the output of `infer`
+            'matches_infer': bool(np.allclose(wave, reference, atol=1e-6)),
+        })
+    return results
+
+
+# run
+
+def metadata():
+    try:
+        git_rev = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except OSError:
+        git_rev = None
+    import numpy
+    import onnxruntime
+    return {'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'git_rev': git_rev,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'numpy': numpy.__version__,
+            'onnxruntime': onnxruntime.__version__}
+
+
+def run(args):
+    from tts_arabic.models.core import get_available_models
+    available = get_available_models()
+    models = args.models or list(available['models'])
+    vocoders = args.vocoders or list(available['vocoders'])
+
+    output = {'meta': metadata(),
+              'config': {'runs': args.runs, 'warmup': args.warmup,
+                         'vowelizer': args.vowelizer,
+                         'denoise': args.denoise, 'cold_g2p': args.cold_g2p,
+                         'buckets': {bucket: BUCKETS[bucket]
+                                     for bucket in args.buckets}},
+              'results': [], 'errors': []}
+    for model_id in models:
+        for vocoder_id in vocoders:
+            config = {'model_id': model_id, 'vocoder_id': vocoder_id,
+                      'buckets': args.buckets, 'runs': args.runs,
+                      'warmup': args.warmup, 'vowelizer': args.vowelizer,
+                      'denoise': args.denoise, 'cold_g2p': args.cold_g2p}
+            process = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '_worker',
+                 json.dumps(config)], capture_output=True, text=True)
+            if process.returncode != 0:
+                error = (process.stderr.strip().splitlines() or ['?'])[-1]
+                output['errors'].append({'model_id': model_id,
+                                         'vocoder_id': vocoder_id,
+                                         'error': error})
+                print(f"{model_id}+{vocoder_id}: failed ({error})",
+                      flush=True)
+                continue
+            for result in json.loads(process.stdout.strip().splitlines()[-1]):
+                output['results'].append(result)
+                print_result(result)
+
+    if args.json is not None:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(output, f, indent=2)
+    return 1 if output['errors'] or not all(
+        result['matches_infer'] for result in output['results']) else 0
+
+
+def print_result(result):
+    latency = result['latency']
+    print(f"{result['model_id']+'+'+result['vocoder_id']:28s} "
+          f"{result['bucket']:7s} {result['audio_s']:5.1f}s audio  "
+          f"RTF {result['rtf']:.4g}  p50 {latency['p50_ms']:8.1f}ms  "
+          f"p95 {latency['p95_ms']:8.1f}ms  p99 {latency['p99_ms']:8.1f}ms  "
+          f"{result['utterances_per_s']:7.1f} utt/s  "
+          f"peak RSS {result['peak_rss_mb']:6.0f}MB"
+          + ('' if result['matches_infer'] else '  OUTPUT MISMATCH'))
+    print('    ' + '  '.join(
+        f"{stage} {result['stages'][stage]['p50_ms']:.2f}"
+        for stage in STAGES) + '  (p50 ms)', flush=True)
+
+
+# compare
+
+def _metrics(result):
+    # the tail percentiles of single stages (and p99 of a few dozen runs)
+    # are too noisy to gate on
+    metrics = {f"latency.{name}": (result['latency'][name], True)
+               for name in ('p50_ms', 'p95_ms')}
+    for stage, stats in result['stages'].items():
+        metrics[f"{stage}.p50_ms"] = (stats['p50_ms'], True)
+    metrics['rtf'] = (result['rtf'], False)
+    metrics['peak_rss_mb'] = (result['peak_rss_mb'], False)
+    return metrics
+
+
+def compare(args):
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.new, encoding='utf-8') as f:
+        new = json.load(f)
+
+    def key(result):
+        return (result['model_id'], result['vocoder_id'], result['bucket'])
+
+    base_results = {key(result): result for result in base['results']}
+    regressions = []
+    print(f"base {base['meta'].get('git_rev')} ({base['meta']['time']}) -> "
+          f"new {new['meta'].get('git_rev')} ({new['meta']['time']}), "
+          f"threshold {args.threshold:+.0%}")
+    for result in new['results']:
+        name = '{}+{} {}'.format(*key(result))
+        if key(result) not in base_results:
+            print(f"{name}: not in base")
+            continue
+        base_metrics = _metrics(base_results.pop(key(result)))
+        lines = []
+        for metric, (value, is_ms) in _metrics(result).items():
+            base_value = base_metrics[metric][0]
+            # sub-`min_ms` stages are dominated by timer noise
+            if is_ms and max(value, base_value) < args.min_ms:
+                continue
+            change = value / base_value - 1 if base_value else 0.
+            regressed = change > args.threshold
+            if regressed:
+                regressions.append(f"{name} {metric} {change:+.1%}")
+            if regressed or args.verbose:
+                lines.append(f"    {metric:24s} {base_value:10.4g} -> "
+                             f"{value:10.4g}  {change:+7.1%}"
+                             + ('  REGRESSION' if regressed else ''))
+        rtf_change = result['rtf'] / base_metrics['rtf'][0] - 1
+        print(f"{name:36s} RTF {base_metrics['rtf'][0]:.4g} -> "
+              f"{result['rtf']:.4g} ({rtf_change:+.1%})")
+        for line in lines:
+            print(line)
+    for missing in base_results:
+        print('{}+{} {}: not in new'.format(*missing))
+
+    print(f"{len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == '_worker':
+        print(json.dumps(run_worker(json.loads(sys.argv[2]))))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser(
+        'run', help="benchmark model/vocoder combinations")
+    run_parser.add_argument('--models', nargs='+', default=None,
+                            help="Text->Mel model ids (default: all)")
+    run_parser.add_argument('--vocoders', nargs='+', default=None,
+                            help="vocoder ids (default: all)")
+    run_parser.add_argument('--buckets', nargs='+', default=list(BUCKETS),
+                            choices=list(BUCKETS))
+    run_parser.add_argument('--runs', type=int, default=20)
+    run_parser.add_argument('--warmup', type=int, default=2)
+    run_parser.add_argument('--vowelizer', default=None,
+                            choices=['shakkala', 'shakkelha', 'catt_eo'],
+                            help="strip the diacritics of the texts and "
+                            "time this vowelizer")
+    run_parser.add_argument('--denoise', type=float, default=0.005)
+    run_parser.add_argument('--cold-g2p', action='store_true',
+                            help="clear the word cache before every run")
+    run_parser.add_argument('--json', default=None,
+                            help="optionally write the results to this file")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser(
+        'compare', help="compare two result files")
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help="max. relative increase (default 0.1)")
+    compare_parser.add_argument('--min-ms', type=float, default=0.5,
+                                help="ignore latencies below this in both "
+                                "files")
+    compare_parser.add_argument('-v', '--verbose', action='store_true',
+                                help="print all metrics, not only "
+                                "regressions")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare session start-up time of raw and optimized ONNX models.
+
+Each measurement runs in a fresh Python process, so it includes the cold
+cost of loading the graph and running (or skipping) graph optimization, as
+a newly started worker would see it. Optimized artifacts are built before
+timing starts.
+
+Usage:
+    python benchmarks/bench_startup.py --models fastpitch hifigan --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from tts_arabic.models.core import get_model_path
+from tts_arabic.urls import files_dict
+from tts_arabic.utils.sessions import build_optimized_model
+
+PROVIDERS = ['CPUExecutionProvider']
+
+_SNIPPET = """
+import time
+time_start = time.perf_counter()
+from tts_arabic.utils.sessions import create_session
+time_import = time.perf_counter()
+create_session({path!r}, {providers!r}, optimize={optimize})
+time_end = time.perf_counter()
+print(time_end - time_import)
+"""
+
+
+def time_session(path: str, optimize: bool) -> float:
+    code = _SNIPPET.format(path=path, providers=PROVIDERS, optimize=optimize)
+    output = subprocess.run([sys.executable, '-c', code], check=True,
+                            capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--models', nargs='+', default=list(files_dict))
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--json', default=None,
+                        help="optionally write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.models:
+        path = get_model_path(name=name)
+        build_optimized_model(path, PROVIDERS)
+        raw = [time_session(path, False) for _ in range(args.runs)]
+        optimized = [time_session(path, True) for _ in range(args.runs)]
+        results[name] = {
+            'raw_median': statistics.median(raw),
+            'optimized_median': statistics.median(optimized),
+            'speedup': statistics.median(raw) / statistics.median(optimized),
+        }
+        print(f"{name:>10}: raw {results[name]['raw_median']*1000:8.1f}ms  "
+              f"optimized {results[name]['optimized_median']*1000:8.1f}ms  "
+              f"x{results[name]['speedup']:.2f}")
+
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
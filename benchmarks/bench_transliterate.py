@@ -0,0 +1,116 @@
+"""
+Compare the table-driven transliteration and the compiled utterance
+normalizer with the previous character loops and rewrite passes.
+
+The corpus is built by shuffling the words of a few vocalized sentences into
+random utterances, in Arabic script and in Buckwalter. Every fast function
+is checked to give the same output as its reference before it is timed.
+
+Usage:
+    python benchmarks/bench_transliterate.py --words 200000
+"""
+import argparse
+import json
+import random
+import time
+
+from tts_arabic.text import transliterate
+from tts_arabic.text.phonetise_buckwalter import (
+    preprocess_utterance,
+    preprocess_utterance_reference,
+)
+
+SENTENCES = [
+    "اَلسَّلامُ عَلَيكُم يَا صَدِيقِي.",
+    "اَلْقَهْوَةُ مَشْرُوبٌ يُعَدُّ مِنْ بُذُورِ اَلْبُنِّ اَلْمُحَمَّصَةِ.",
+    "كَذَٰلِكَ أَجَابَ عَلَى أَسْئِلَةِ التَّلَامِيذِ فِي الْفَصْلِ.",
+    "هَلْ تُسَاعِدُنَا فِي فَهْمِ هَذِهِ الْمَسْأَلَةِ؟",
+    "وَصَلَ الْقِطَارُ إِلَى الْمَحَطَّةِ مُتَأَخِّرًا بِسَبَبِ الْمَطَرِ، لَا",
+]
+
+
+def loop_transliterate(text, mapping):
+    # previous implementation: one dict lookup and concatenation per char
+    res = ''
+    for letter in text:
+        if letter in mapping:
+            res += mapping[letter]
+        else:
+            res += letter
+    return res
+
+
+def make_corpus(n_words, seed=0):
+    rng = random.Random(seed)
+    words = ' '.join(SENTENCES).split()
+    utterances, n = [], 0
+    while n < n_words:
+        length = rng.randint(4, 16)
+        utterances.append(' '.join(rng.choice(words) for _ in range(length)))
+        n += length
+    return utterances
+
+
+def timed(fn, corpus, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        time_start = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        best = min(best, time.perf_counter() - time_start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--words', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', default=None,
+                        help="optionally write the results to this file")
+    args = parser.parse_args()
+
+    corpus_ar = make_corpus(args.words)
+    corpus_bw = [transliterate.arabic_to_buckwalter(text)
+                 for text in corpus_ar]
+
+    cases = {
+        'arabic_to_buckwalter': (
+            corpus_ar,
+            lambda text: loop_transliterate(
+                text, transliterate.arabic_to_buckw_dict),
+            transliterate.arabic_to_buckwalter),
+        'buckwalter_to_arabic': (
+            corpus_bw,
+            lambda text: loop_transliterate(
+                text, transliterate.buckw_to_arabic_dict),
+            transliterate.buckwalter_to_arabic),
+        'catt_ar2bw': (
+            corpus_ar,
+            lambda text: loop_transliterate(text, transliterate.uni2buck),
+            lambda text: transliterate.arabic_to_buckwalter(
+                text, scheme='standard')),
+        'preprocess_utterance': (
+            corpus_bw,
+            preprocess_utterance_reference,
+            preprocess_utterance),
+    }
+
+    results = {}
+    for name, (corpus, reference, fast) in cases.items():
+        for text in corpus:
+            assert fast(text) == reference(text), (name, text)
+        time_ref = timed(reference, corpus, args.repeat)
+        time_fast = timed(fast, corpus, args.repeat)
+        results[name] = {'reference_s': time_ref, 'fast_s': time_fast,
+                         'speedup': time_ref / time_fast}
+        print(f"{name:24s} reference {time_ref:7.3f}s  "
+              f"fast {time_fast:7.3f}s  x{time_ref / time_fast:.1f}")
+
+    if args.json is not None:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'words': args.words, 'results': results}, f,
+                      indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Differential check of the compiled phonetiser against the reference
+implementation.
+
+Runs `process_word` and `process_word_reference`, `preprocess_utterance` and
+`preprocess_utterance_reference`, the cached and reference modes of
+`process_utterance`, and the token id compiler `buckwalter_to_ids` and
+`tokens_to_ids(buckwalter_to_tokens(...))` over a generated Buckwalter
+corpus, fails on the first difference and reports the timing of both
+sides. The corpus mixes syllable-structured words (consonant, diacritics,
+long vowel letters, definite article and clitic prefixes), random strings
+over the phonetiser alphabet and utterances built from both.
+
+Madda (`|`) is left out of the word-level corpus: the normaliser rewrites
+it to `>A` before `process_word` runs, and the reference appends a shared
+`maddaMap` list that a following shadda grows in place on every call.
+
+Usage:
+    python benchmarks/check_g2p_equivalence.py --words 200000 --seed 0
+"""
+import argparse
+import random
+import sys
+import time
+
+from tts_arabic import text
+from tts_arabic.text import phonetise_buckwalter as pb
+
+CONSONANTS = list("btv^jHxd*rzs$SDTZEgfqklmnhwy'><}&")
+DIACRITICS = list("aui") + ['o', '~a', '~u', '~i', 'F', 'N', 'K', '']
+LONG_VOWELS = ['A', 'w', 'y', 'Y', '']
+PREFIXES = ['', '', '', 'Al', 'wa', 'bi', 'li', 'fa', 'wAl', 'bAl', 'ka']
+SUFFIXES = ['', '', 'p', 'pu', 'pi', 'pa', 'A', 'wA', 'hu', 'hA', 'kum',
+            'nA', 'iy', 'uw']
+WORD_CHARS = "bdtTmrZn^zEhjsgHqfxS$Dk><}&'AYpywlFNKauio~e"
+UTTERANCE_CHARS = WORD_CHARS + "|ـ .?,!-"
+
+
+def syllable_word(rng):
+    n_syllables = rng.randint(1, 5)
+    word = rng.choice(PREFIXES)
+    for _ in range(n_syllables):
+        word += rng.choice(CONSONANTS) + rng.choice(DIACRITICS)
+        if rng.random() < 0.3:
+            word += rng.choice(LONG_VOWELS)
+    return word + rng.choice(SUFFIXES)
+
+
+def random_string(rng, chars, max_len):
+    return ''.join(rng.choice(chars) for _ in range(rng.randint(0, max_len)))
+
+
+def make_words(n, rng):
+    return [syllable_word(rng) if i % 2 else
+            random_string(rng, WORD_CHARS, 10) for i in range(n)]
+
+
+def make_utterances(words, rng):
+    utterances = []
+    for i in range(0, len(words), 8):
+        utterance = ' '.join(words[i:i+8])
+        if rng.random() < 0.5:
+            utterance += ' ' + random_string(rng, UTTERANCE_CHARS, 12)
+        utterances.append(utterance)
+    return utterances
+
+
+def outcome(fn):
+    # output, or the exception type, so that failures are compared as well
+    def wrapped(item):
+        try:
+            output = fn(item)
+        except Exception as exc:
+            return type(exc)
+        return output.tolist() if hasattr(output, 'tolist') else output
+    return wrapped
+
+
+def check(name, items, fast, reference):
+    time_fast = time_ref = 0.
+    for item in items:
+        time_start = time.perf_counter()
+        out_fast = fast(item)
+        time_mid = time.perf_counter()
+        out_ref = reference(item)
+        time_ref += time.perf_counter() - time_mid
+        time_fast += time_mid - time_start
+        if out_fast != out_ref:
+            print(f"{name}: mismatch for {item!r}\n"
+                  f"  compiled:  {out_fast!r}\n  reference: {out_ref!r}")
+            return False
+    print(f"{name:22s} {len(items):7d} inputs identical; "
+          f"reference {time_ref:6.2f}s, compiled {time_fast:6.2f}s "
+          f"(x{time_ref / time_fast:.1f})")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--words', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = make_words(args.words, rng)
+    utterances = make_utterances(words, rng)
+
+    pb.word_cache.clear()
+    ok = check('process_word', words,
+               pb.process_word, pb.process_word_reference) \
+        and check('preprocess_utterance', utterances,
+                  pb.preprocess_utterance, pb.preprocess_utterance_reference) \
+        and check('process_utterance', utterances,
+                  pb.process_utterance,
+                  lambda u: pb.process_utterance(u, reference=True)) \
+        and check('buckwalter_to_ids', utterances,
+                  outcome(text.buckwalter_to_ids),
+                  outcome(lambda u: text.tokens_to_ids(
+                      text.buckwalter_to_tokens(u))))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
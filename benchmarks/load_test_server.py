@@ -0,0 +1,167 @@
+"""
+Load test of the `tts-arabic serve` HTTP server under different batch
+settings.
+
+For every combination of `--max-batch` and `--max-wait-ms`, a server is
+started in a subprocess, `--concurrency` client threads send `--requests`
+synthesis requests over keep-alive connections, and the throughput
+(requests/s and seconds of audio per second), the client-side latency
+percentiles and the mean batch size reported by `/metrics` are printed.
+With `--url`, an already running server is tested instead.
+
+Usage:
+    python benchmarks/load_test_server.py --max-batch 1 4 8 16 --concurrency 16
+"""
+import argparse
+import http.client
+import json
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+TEXTS = [
+    "اَلسَّلامُ عَلَيكُم يَا صَدِيقِي.",
+    "اَلْقَهْوَةُ مَشْرُوبٌ يُعَدُّ مِنْ بُذُورِ اَلْبُنِّ اَلْمُحَمَّصَةِ.",
+    "هَلْ تُسَاعِدُنَا فِي فَهْمِ هَذِهِ الْمَسْأَلَةِ؟",
+    "وَصَلَ الْقِطَارُ إِلَى الْمَحَطَّةِ مُتَأَخِّرًا.",
+]
+
+
+def get_json(host, port, path):
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    try:
+        conn.request('GET', path)
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+def wait_ready(host, port, timeout=300.):
+    time_end = time.time() + timeout
+    while time.time() < time_end:
+        try:
+            if get_json(host, port, '/health')['status'] == 'ok':
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"server on port {port} did not start")
+
+
+def run_clients(host, port, n_requests, concurrency, sample_rate):
+    latencies, audio_seconds, errors = [], [0.], [0]
+    counter = iter(range(n_requests))
+    lock = threading.Lock()
+
+    def client():
+        conn = http.client.HTTPConnection(host, port, timeout=300)
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            body = json.dumps({'text': TEXTS[i % len(TEXTS)],
+                               'speaker': i % 4, 'format': 'pcm'})
+            time_start = time.perf_counter()
+            conn.request('POST', '/tts', body=body,
+                         headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            data = response.read()
+            latency = time.perf_counter() - time_start
+            with lock:
+                if response.status != 200:
+                    errors[0] += 1
+                    continue
+                latencies.append(latency)
+                audio_seconds[0] += len(data) / 2 / sample_rate
+        conn.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    time_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - time_start
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) \
+        if latencies else (float('nan'),)*3
+    return {'requests': len(latencies), 'errors': errors[0],
+            'elapsed_s': elapsed,
+            'requests_per_s': len(latencies) / elapsed,
+            'audio_s_per_s': audio_seconds[0] / elapsed,
+            'latency_p50': p50, 'latency_p90': p90, 'latency_p99': p99}
+
+
+def test_server(host, port, args):
+    config = get_json(host, port, '/metrics')['config']
+    sample_rate = 44100 if config['vocoder_id'].startswith('vocos44') \
+        else 22050
+    # warm-up: first calls allocate the session buffers
+    run_clients(host, port, args.concurrency, args.concurrency, sample_rate)
+    result = run_clients(host, port, args.requests, args.concurrency,
+                         sample_rate)
+    metrics = get_json(host, port, '/metrics')
+    result.update(max_batch=config['max_batch'],
+                  max_wait_ms=config['max_wait']*1000,
+                  mean_batch_size=metrics['mean_batch_size'])
+    print(f"max_batch {result['max_batch']:3d} "
+          f"max_wait {result['max_wait_ms']:6.1f}ms  "
+          f"{result['requests_per_s']:7.2f} req/s  "
+          f"{result['audio_s_per_s']:7.2f} audio s/s  "
+          f"p50 {result['latency_p50']*1000:7.1f}ms  "
+          f"p99 {result['latency_p99']*1000:7.1f}ms  "
+          f"mean batch {result['mean_batch_size']:5.2f}  "
+          f"errors {result['errors']}", flush=True)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--url', default=None,
+                        help="test a running server instead of starting one")
+    parser.add_argument('--max-batch', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--max-wait-ms', type=float, nargs='+', default=[10.])
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--model-id', default='fastpitch')
+    parser.add_argument('--vocoder-id', default='hifigan')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--json', default=None,
+                        help="optionally write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    if args.url is not None:
+        url = urlsplit(args.url)
+        results.append(test_server(url.hostname, url.port or 80, args))
+    else:
+        for max_batch in args.max_batch:
+            for max_wait_ms in args.max_wait_ms:
+                process = subprocess.Popen(
+                    [sys.executable, '-m', 'tts_arabic.cli', 'serve',
+                     '--port', str(args.port),
+                     '--max-batch', str(max_batch),
+                     '--max-wait-ms', str(max_wait_ms),
+                     '--workers', str(args.workers),
+                     '--model-id', args.model_id,
+                     '--vocoder-id', args.vocoder_id],
+                    stdout=subprocess.DEVNULL)
+                try:
+                    wait_ready('127.0.0.1', args.port)
+                    results.append(test_server('127.0.0.1', args.port, args))
+                finally:
+                    process.terminate()
+                    process.wait()
+
+    if args.json is not None:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
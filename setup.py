@@ -40,6 +40,12 @@ setup(
         "onnxruntime; sys_platform == 'darwin'",  # for Mac
         'gdown>=5.1.0'
     ],
+    extras_require={
+        'quantize': ['onnx'],
+    },
+    entry_points={
+        'console_scripts': ['tts-arabic=tts_arabic.cli:main'],
+    },
     include_package_data=True,
     data_files=[
         ('license', ['tts_arabic/ThirdPartyLicenses',])
@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.fixture(scope='session')
+def synthetic_models(tmp_path_factory):
+    """`get_model_path` of a store of tiny synthetic models (see
+    `models.synthetic`), generated on first use."""
+    pytest.importorskip('onnx')
+    from tts_arabic.utils import model_store
+    model_store.set_store_dir(tmp_path_factory.mktemp('store'))
+    model_store.set_synthetic('tiny')
+    yield model_store.get_model_path
+    model_store.set_synthetic(None)
+    model_store.set_store_dir(None)
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from tts_arabic.models.tts_models import FastPitch2Mel, _broadcast, _mel_lengths
+
+
+def _mel(n_frames, seed):
+    return np.random.default_rng(seed).normal(size=(80, n_frames))
+
+
+def _padded(mels, pad_value=-11.5):
+    batch = np.full((len(mels), 80, max(m.shape[-1] for m in mels)),
+                    pad_value)
+    for i, mel in enumerate(mels):
+        batch[i, :, :mel.shape[-1]] = mel
+    return batch
+
+
+def test_mel_lengths_trims_constant_padding():
+    mels = [_mel(50, 0), _mel(20, 1), _mel(49, 2)]
+    # one padding frame is kept (documented)
+    assert _mel_lengths(_padded(mels)) == [50, 20, 50]
+
+
+def test_mel_lengths_limitations():
+    mel = _mel(30, 0)
+    # trailing identical real frames are all taken for padding
+    mel[:, 25:] = mel[:, 25:26]
+    # padding that is not constant is kept
+    noisy_pad = np.concatenate([_mel(20, 1), _mel(10, 2)], axis=-1)
+    assert _mel_lengths(np.stack([mel, noisy_pad])) == [25, 30]
+
+
+def test_broadcast_rejects_wrong_length():
+    with pytest.raises(ValueError):
+        _broadcast([1., 2.], 3, np.float32)
+
+
+def test_tts_batch_rejects_save_to_mismatch():
+    from tts_arabic import tts_batch
+    with pytest.raises(ValueError):
+        tts_batch(["a", "b"], save_to=["a.wav"])
+
+
+def test_infer_ids_batch_matches_single(synthetic_models):
+    model = FastPitch2Mel(synthetic_models('fastpitch'))
+    rng = np.random.default_rng(0)
+    ids_list = [rng.integers(1, 40, n) for n in (12, 40, 3, 25)]
+    mels = model.infer_ids_batch(ids_list, speakers=[0, 1, 2, 3])
+    for i, (ids, mel) in enumerate(zip(ids_list, mels)):
+        np.testing.assert_allclose(mel, model.infer_ids(ids, speaker=i),
+                                   atol=1e-5)
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from tts_arabic import bulk
+
+ROWS = [
+    {'id': 'a', 'text': 'اَلسَّلامُ عَلَيكُم.'},
+    {'id': 'b', 'text': 'كَيفَ حَالُكَ؟', 'speaker': 1, 'pace': 1.2},
+    # out of the speaker table: fails in the model
+    {'id': 'bad', 'text': 'شُكرًا.', 'speaker': 99},
+]
+
+
+def _manifest(path, rows):
+    path.write_text(''.join(json.dumps(row, ensure_ascii=False) + '\n'
+                            for row in rows), encoding='utf-8')
+    return path
+
+
+def test_synthesize_and_resume(synthetic_models, tmp_path):
+    synthetic_models('fastpitch')
+    manifest = _manifest(tmp_path / 'manifest.jsonl', ROWS)
+    out_dir = tmp_path / 'out'
+
+    summary = bulk.synthesize_manifest(manifest, out_dir, verbose=False)
+    assert (summary['synthesized'], summary['failed'], summary['skipped']) \
+        == (2, 1, 0)
+    assert summary['failed_ids'] == ['bad']
+    assert sorted(path.name for path in out_dir.glob('*.wav')) \
+        == ['a.wav', 'b.wav']
+    assert json.loads(out_dir.joinpath(bulk.SUMMARY_NAME).read_text()) \
+        == summary
+
+    # finished ids are skipped, the failed one is retried
+    summary = bulk.synthesize_manifest(manifest, out_dir, verbose=False)
+    assert (summary['synthesized'], summary['failed'], summary['skipped']) \
+        == (0, 1, 2)
+    ledger = bulk.read_ledger(out_dir / bulk.LEDGER_NAME)
+    assert {id: entry['status'] for id, entry in ledger.items()} \
+        == {'a': 'ok', 'b': 'ok', 'bad': 'failed'}
+
+
+def test_empty_audio_has_no_rtf(tmp_path, monkeypatch):
+    results = [{'id': 'a', 'status': 'ok', 'path': 'a.wav', 'duration': 0.,
+                'synth_time': .1, 'rtf': None},
+               {'id': 'b', 'status': 'ok', 'path': 'b.wav', 'duration': 2.,
+                'synth_time': 1., 'rtf': .5}]
+    monkeypatch.setattr(bulk, '_run_items',
+                        lambda items, workers, initargs: iter(results))
+    manifest = _manifest(tmp_path / 'manifest.jsonl', ROWS[:2])
+    summary = bulk.synthesize_manifest(manifest, tmp_path / 'out',
+                                       verbose=False)
+    assert summary['synthesized'] == 2
+    assert summary['rtf_p50'] == summary['rtf_p95'] == .5
+
+
+@pytest.mark.parametrize('rows, message', [
+    ([{'id': 'a', 'text': 'x'}, {'id': 'a', 'text': 'y'}], 'duplicate id'),
+    ([{'id': '../a', 'text': 'x'}], 'not a file name'),
+    ([{'id': 'a/b', 'text': 'x'}], 'not a file name'),
+    ([{'id': 'a'}], "needs 'id' and 'text'"),
+])
+def test_bad_manifest(tmp_path, rows, message):
+    manifest = _manifest(tmp_path / 'manifest.jsonl', rows)
+    with pytest.raises(ValueError, match=message):
+        bulk.synthesize_manifest(manifest, tmp_path / 'out', verbose=False)
+    assert not (tmp_path / 'out').joinpath(bulk.LEDGER_NAME).exists()
+
+
+def test_csv_manifest(tmp_path):
+    manifest = tmp_path / 'manifest.csv'
+    manifest.write_text('id,text,speaker,pitch\na,x,1,0.5\nb,y,,\n',
+                        encoding='utf-8')
+    assert bulk.read_manifest(manifest) == [
+        {'id': 'a', 'text': 'x', 'speaker': 1, 'pitch_add': .5},
+        {'id': 'b', 'text': 'y'}]
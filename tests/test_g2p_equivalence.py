@@ -0,0 +1,63 @@
+"""
+Differential checks of the compiled phonetiser and token id compiler
+against the reference paths, over fixed inputs (see
+benchmarks/check_g2p_equivalence.py for a large generated corpus).
+"""
+import pytest
+
+from tts_arabic import text
+from tts_arabic.text import phonetise_buckwalter as pb
+
+WORDS = [
+    'Als~alAmu', 'Ealaykum', 'yA', 'Sadiyqiy', 'kitAbN', 'kitAbK', 'kitAbF',
+    'Alkitaabu', 'wAlqalamu', 'bAlbayti', 'lilmadrasapi', 'madrasapN',
+    'muEal~imuwna', 'qAlat', '>aHmadu', '<ilaY', 'mu&ma}inN', '$ay\'N',
+    'Al$~amsu', 'Alqamaru', 'fa>ak~ada', 'kataba', 'yaktubu', 'Ai}otilAfN',
+    '{lo<isolAmu', 'xayorN', 'Tab~aAx', 'Zuhorun', 'hu', 'hA', 'Y', '',
+    '~a', 'Ao', '>>', 'ppp',
+]
+
+UTTERANCES = [
+    'Als~alAmu Ealaykum yA Sadiyqiy.',
+    '>aHmadu fiy Albayti, wa>axuwhu fiy Almadrasapi!',
+    'qAla: |mana bAl~ahi?',
+    'kitAbN jamiylN - kitAbK Sagiyr',
+    'Alqamaru ـ Al$~amsu',
+    'ppp >> ~a Ao ...',
+    '',
+]
+
+
+def _outcome(fn, item):
+    # output, or the exception type, so that failures are compared as well
+    try:
+        output = fn(item)
+    except Exception as exc:
+        return type(exc)
+    return output.tolist() if hasattr(output, 'tolist') else output
+
+
+@pytest.mark.parametrize('word', WORDS)
+def test_process_word(word):
+    assert _outcome(pb.process_word, word) \
+        == _outcome(pb.process_word_reference, word)
+
+
+@pytest.mark.parametrize('utterance', UTTERANCES)
+def test_preprocess_utterance(utterance):
+    assert _outcome(pb.preprocess_utterance, utterance) \
+        == _outcome(pb.preprocess_utterance_reference, utterance)
+
+
+@pytest.mark.parametrize('utterance', UTTERANCES)
+def test_process_utterance(utterance):
+    pb.word_cache.clear()
+    assert _outcome(pb.process_utterance, utterance) == _outcome(
+        lambda u: pb.process_utterance(u, reference=True), utterance)
+
+
+@pytest.mark.parametrize('utterance', UTTERANCES)
+def test_buckwalter_to_ids(utterance):
+    assert _outcome(text.buckwalter_to_ids, utterance) == _outcome(
+        lambda u: text.tokens_to_ids(text.buckwalter_to_tokens(u)),
+        utterance)
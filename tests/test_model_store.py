@@ -0,0 +1,108 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from tts_arabic.cli import main
+from tts_arabic.urls import files_dict
+from tts_arabic.utils import model_store
+
+# stand-in contents of the mirrored model files
+FILES = {'hifigan': b'hifigan weights' * 1000, 'denoiser': b'denoiser' * 10}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Empty store root, fetching from a `file://` mirror of `FILES`."""
+    for var in ('TTS_ARABIC_HOME', 'TTS_ARABIC_MIRROR', 'TTS_ARABIC_OFFLINE',
+                'TTS_ARABIC_SYNTHETIC'):
+        monkeypatch.delenv(var, raising=False)
+    # restored after the test, including changes made by the CLI
+    for setting in ('_store_dir', '_mirror', '_offline', '_synthetic'):
+        monkeypatch.setattr(model_store, setting, None)
+    mirror = tmp_path / 'mirror'
+    mirror.mkdir()
+    for name, data in FILES.items():
+        mirror.joinpath(Path(files_dict[name]['file']).name) \
+            .write_bytes(data)
+    model_store.set_store_dir(tmp_path / 'store')
+    model_store.set_mirror(mirror.as_uri())
+    model_store.set_offline(False)
+    return tmp_path / 'store'
+
+
+def _leftovers(store):
+    return [path.name for path in store.rglob('*')
+            if path.name.endswith('.tmp')]
+
+
+def test_fetch_from_mirror(store):
+    path = model_store.get_model_path('hifigan')
+    assert Path(path).read_bytes() == FILES['hifigan']
+    assert model_store.verify_models(['hifigan']) == {'hifigan': 'ok'}
+    assert not _leftovers(store)
+
+
+def test_concurrent_fetch(store, monkeypatch):
+    fetch_url = model_store._fetch_url
+    calls = []
+
+    def slow_fetch_url(url, output_path):
+        calls.append(url)
+        fetch_url(url, output_path)
+        time.sleep(0.2)  # the other threads reach the lock meanwhile
+
+    monkeypatch.setattr(model_store, '_fetch_url', slow_fetch_url)
+    results = []
+
+    def fetch():
+        path = model_store.get_model_path('hifigan')
+        results.append(Path(path).read_bytes())
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [FILES['hifigan']] * 8
+    assert not _leftovers(store)
+
+
+def test_checksum_mismatch(store, monkeypatch):
+    monkeypatch.setitem(files_dict['hifigan'], 'sha256', '0' * 64)
+    with pytest.raises(OSError, match='checksum mismatch'):
+        model_store.get_model_path('hifigan')
+    assert not model_store.model_path('hifigan').exists()
+    assert not _leftovers(store)
+
+
+def test_corrupted_file_fails_verification(store, capsys):
+    args = ['prefetch', '--models', 'hifigan', 'denoiser', '--verify']
+    assert main(args) == 0
+    path = model_store.model_path('hifigan')
+    path.write_bytes(path.read_bytes()[:-1] + b'!')
+    assert model_store.verify_models(['hifigan', 'denoiser']) \
+        == {'hifigan': 'mismatch', 'denoiser': 'ok'}
+    assert main(args) == 1
+
+
+def test_prefetch_reports_failures(store, capsys):
+    # vocos is not in the mirror
+    assert main(['prefetch', '--models', 'hifigan', 'vocos']) == 1
+    paths = model_store.prefetch(['hifigan', 'vocos'])
+    assert paths['hifigan'] == model_store.model_path('hifigan').as_posix()
+    assert paths['vocos'].startswith('error:')
+
+
+def test_offline_without_local_file(store, monkeypatch):
+    model_store.get_model_path('denoiser')
+    monkeypatch.setattr(model_store, '_fetch_url', None)  # never called
+    model_store.set_offline(True)
+    with pytest.raises(FileNotFoundError, match='offline'):
+        model_store.get_model_path('hifigan')
+    assert not model_store.model_path('hifigan').exists()
+    # files already in the store are still served
+    assert model_store.get_model_path('denoiser') \
+        == model_store.model_path('denoiser').as_posix()
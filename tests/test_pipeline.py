@@ -0,0 +1,83 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from tts_arabic.models.pipeline import PipelinedSynthesizer
+
+TEXTS = ["اَلسَّلامُ عَلَيكُم.", "كَيفَ حَالُكَ؟", "شُكرًا جَزِيلًا.",
+         "إِلَى اللِّقَاء.", "نَعَم.", "اَلقَهوَةُ جَاهِزَةٌ."]
+
+
+@pytest.fixture(scope='module')
+def model(synthetic_models):
+    from tts_arabic.models.core import get_model
+    synthetic_models('fastpitch')
+    return get_model('fastpitch', 'vocos', cuda=None)
+
+
+def _wait_for_threads(before, timeout=5.):
+    """True once all threads started since `before` have ended."""
+    time_end = time.monotonic() + timeout
+    while time.monotonic() < time_end:
+        if not set(threading.enumerate()) - before:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_matches_tts_in_order(model):
+    from tts_arabic.models.core import tts
+    items = [{'text': text, 'speaker': i % 4, 'pace': 1. + i/10}
+             for i, text in enumerate(TEXTS)]
+    synth = PipelinedSynthesizer(model, queue_size=1)
+    waves = list(synth.run(items, volume=0.8))
+    assert len(waves) == len(items)
+    for item, wave in zip(items, waves):
+        expected = tts(item['text'], speaker=item['speaker'],
+                       pace=item['pace'], volume=0.8, cuda=None,
+                       model_id='fastpitch', vocoder_id='vocos')
+        np.testing.assert_allclose(wave, expected, rtol=1e-6, atol=1e-6)
+    stats = synth.stats()
+    assert all(stats[name]['items'] == len(items)
+               for name in synth.stage_names)
+
+
+@pytest.mark.parametrize('queue_size', [1, 4])
+@pytest.mark.parametrize('bad_item, error', [
+    ({'speaker': 1}, KeyError),  # frontend: no text
+    # Text->Mel model: out of the speaker table (an onnxruntime error)
+    ({'text': TEXTS[2], 'speaker': 99}, Exception),
+])
+def test_stage_error_reaches_caller(model, queue_size, bad_item, error):
+    before = set(threading.enumerate())
+    items = TEXTS[:2] + [bad_item] + TEXTS * 4
+    waves = []
+    with pytest.raises(error):
+        for wave in PipelinedSynthesizer(model, queue_size).run(items):
+            waves.append(wave)
+    assert len(waves) == 2
+    assert _wait_for_threads(before)
+
+
+def test_input_error_reaches_caller(model):
+    def texts():
+        yield TEXTS[0]
+        raise KeyError('bad manifest')
+
+    before = set(threading.enumerate())
+    run = PipelinedSynthesizer(model, queue_size=1).run(texts())
+    assert next(run) is not None
+    with pytest.raises(KeyError, match='bad manifest'):
+        next(run)
+    assert _wait_for_threads(before)
+
+
+def test_close_with_full_queues(model):
+    before = set(threading.enumerate())
+    run = PipelinedSynthesizer(model, queue_size=1).run(TEXTS * 10)
+    next(run)
+    time.sleep(0.2)  # the stages fill their queues and block
+    run.close()
+    assert _wait_for_threads(before)
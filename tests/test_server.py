@@ -0,0 +1,128 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from tts_arabic.server import HTTPError, SynthesisServer, _Request, _parse_params
+from tts_arabic.utils.audio import to_pcm
+
+
+class _FakeModel:
+    ready = True
+    n_speakers = 4
+
+    def infer_batch(self, texts, **kwargs):
+        if 'bad' in texts:
+            raise RuntimeError("bad input")
+        # 'loud' peaks beyond [-1, 1], like an unnormalized vocoder output
+        return [np.array([1.35, -1.4]) if text == 'loud'
+                else np.ones(len(text)) for text in texts]
+
+
+def _server(n_speakers=4):
+    server = SynthesisServer(warmup=False)
+    server.model = _FakeModel()
+    server.model.n_speakers = n_speakers
+    return server
+
+
+@pytest.mark.parametrize('params', [
+    {'text': 'x', 'speaker': 99},
+    {'text': 'x', 'pace': 0},
+    {'text': 'x', 'volume': 'nan'},
+    {'text': 'x', 'volume': 1.5},
+    {'text': 'x', 'denoise': -1},
+])
+def test_parse_params_rejects_out_of_range(params):
+    with pytest.raises(HTTPError) as info:
+        _parse_params(params, _server().defaults, n_speakers=4)
+    assert info.value.status == 400
+
+
+def test_failing_request_does_not_fail_its_batch():
+    server = _server()
+
+    async def run():
+        server._slots = asyncio.Semaphore(1)
+        await server._slots.acquire()
+        batch = [_Request(_parse_params({'text': text}, server.defaults))
+                 for text in ('ab', 'bad', 'abc')]
+        await server._run_batch(batch)
+        return batch
+
+    batch = asyncio.run(run())
+    assert len(batch[0].future.result()) == 2
+    assert isinstance(batch[1].future.exception(), RuntimeError)
+    assert len(batch[2].future.result()) == 3
+
+
+def _post(server, body):
+    """Status and body of a POST /tts with `body` (bytes)."""
+    async def run():
+        tcp_server = await server.start(port=0)
+        port = tcp_server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'POST /tts HTTP/1.1\r\nConnection: close\r\n'
+                     b'Content-Length: %d\r\n\r\n%s' % (len(body), body))
+        response = await reader.read()
+        writer.close()
+        tcp_server.close()
+        server._batcher.cancel()
+        return response
+
+    head, _, data = asyncio.run(run()).partition(b'\r\n\r\n')
+    return int(head.split()[1]), data
+
+
+def test_to_pcm_clips():
+    assert np.frombuffer(to_pcm(np.array([1.35, -1.4])), np.int16).tolist() \
+        == [32767, -32767]
+
+
+def test_loud_volume():
+    status, data = _post(_server(), json.dumps(
+        {'text': 'x', 'volume': 1.5}).encode())
+    assert status == 400
+    assert 'volume' in json.loads(data)['error']
+    status, data = _post(_server(), json.dumps(
+        {'text': 'loud', 'volume': 1, 'format': 'pcm'}).encode())
+    assert status == 200
+    assert np.frombuffer(data, np.int16).tolist() == [32767, -32767]
+
+
+@pytest.mark.parametrize('body', [b'[1, 2]', b'"text"', b'3', b'null',
+                                  b'{"text": '])
+def test_body_must_be_a_json_object(body):
+    status, data = _post(_server(), body)
+    assert status == 400
+    assert 'JSON' in json.loads(data)['error']
+
+
+def test_speakers_follow_the_model():
+    body = json.dumps({'text': 'x', 'speaker': 2}).encode()
+    assert _post(_server(n_speakers=4), body)[0] == 200
+    status, data = _post(_server(n_speakers=2), body)
+    assert status == 400
+    assert json.loads(data)['error'] == "'speaker' must be in 0..1"
+
+
+def test_model_speaker_count(synthetic_models):
+    from tts_arabic.models.core import get_model
+    synthetic_models('fastpitch')
+    assert get_model('fastpitch', 'vocos', cuda=None).n_speakers == 4
+
+
+def test_warmup_failure_is_logged(caplog):
+    def warmup(**kwargs):
+        raise RuntimeError("no memory")
+
+    server = _server()
+    server.warmup = True
+    server.model.ready = False
+    server.model.warmup = warmup
+    with caplog.at_level('INFO', logger='tts_arabic.server'):
+        server._warmup()
+    assert server.status() == 'warmup_failed'
+    assert caplog.records[-1].levelname == 'ERROR'
+    assert 'no memory' in caplog.records[-1].getMessage()
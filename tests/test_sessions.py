@@ -0,0 +1,29 @@
+import threading
+
+from tts_arabic.utils import sessions
+
+PROVIDERS = ['CPUExecutionProvider']
+
+
+def test_concurrent_create_session(synthetic_models):
+    paths = [synthetic_models(name)
+             for name in ('hifigan', 'vocos', 'denoiser')]
+    created = sessions.session_info()['created']
+    results = []
+
+    def create(path):
+        results.append((path, sessions.create_session(path, PROVIDERS,
+                                                      share=True)))
+
+    threads = [threading.Thread(target=create, args=(path,))
+               for path in paths * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # one session per model file, and no locks kept once they are stored
+    by_path = {}
+    for path, ort_sess in results:
+        assert by_path.setdefault(path, ort_sess) is ort_sess
+    assert sessions.session_info()['created'] - created <= len(paths)
+    assert not sessions._key_locks
@@ -0,0 +1,34 @@
+import numpy as np
+
+from tts_arabic.models import synthesis_cache
+from tts_arabic.models.synthesis_cache import SynthesisCache
+from tts_arabic.text import lexicon
+
+
+def _mel_key():
+    return SynthesisCache.mel_key("كتاب جميل", 0, 1., 1., 0., None,
+                                  'fastpitch')
+
+
+def test_mel_key_depends_on_overrides():
+    key = _mel_key()
+    lexicon.set_override('كتاب', 'k i0 t aa b u0')
+    try:
+        assert _mel_key() != key
+    finally:
+        lexicon.clear_overrides()
+    assert _mel_key() == key
+
+
+def test_overrides_keep_cached_audio():
+    # entries of other lexicon states are unreachable, not cleared
+    synthesis_cache.set_synthesis_cache()
+    try:
+        key = _mel_key()
+        synthesis_cache.get_synthesis_cache().put_mel(key, np.ones((80, 3)))
+        lexicon.set_override('كتاب', 'k i0 t aa b u0')
+        lexicon.clear_overrides()
+        assert _mel_key() == key
+        assert synthesis_cache.get_synthesis_cache().get_mel(key) is not None
+    finally:
+        synthesis_cache.disable_synthesis_cache()
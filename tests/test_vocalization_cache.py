@@ -0,0 +1,31 @@
+from tts_arabic.utils.cache import DiskCache
+from tts_arabic.vocalizer.models import core
+
+
+class _FakeVocalizer:
+    """Disables the cache while a prediction is running."""
+
+    def predict(self, texts, batch_size=64, **kwargs):
+        core.disable_vocalization_cache()
+        return [text + '!' for text in texts]
+
+
+def test_disable_during_vocalize(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, '_get_vocalizer', lambda model: _FakeVocalizer())
+    core.set_vocalization_cache(tmp_path / 'cache.sqlite')
+    try:
+        assert core.vocalize(['كتب', 'قرأ']) == ['كتب!', 'قرأ!']
+        assert core.vocalization_cache_info() == {'memory': None,
+                                                  'disk': None}
+    finally:
+        core.disable_vocalization_cache()
+
+
+def test_closed_disk_cache_misses(tmp_path):
+    cache = DiskCache(tmp_path / 'cache.sqlite')
+    cache.put('key', b'value')
+    cache.close()
+    cache.close()
+    cache.put('key', b'other')
+    assert cache.get('key') is None
+    assert DiskCache(tmp_path / 'cache.sqlite').get('key') == b'value'
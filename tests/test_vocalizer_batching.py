@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+TEXTS = ["السلام عليكم يا صديقي", "كتاب", "مرحبا بكم في المدينة الجميلة",
+         "كتب", "ذهب الولد الى المدرسة"]
+
+
+def _vocalizer(synthetic_models, model):
+    from tts_arabic.vocalizer.models.core import get_model
+    synthetic_models(model)
+    return get_model(model)
+
+
+def _assert_batch_matches_single(vocalizer, **kwargs):
+    texts, probs = vocalizer.predict(TEXTS, return_probs=True, **kwargs)
+    for text, output, prob in zip(TEXTS, texts, probs):
+        single, single_prob = vocalizer.predict(text, return_probs=True)
+        assert output == single
+        # the non-argmax probabilities are tiny: compare them relatively,
+        # padding leaking into the recurrent models changes them by ~1e-3
+        np.testing.assert_allclose(prob, single_prob, rtol=1e-5, atol=0)
+
+
+@pytest.mark.parametrize('model', ['shakkelha', 'shakkala'])
+@pytest.mark.parametrize('batch_size', [1, 2, 64])
+def test_rnn_batch_matches_single(synthetic_models, model, batch_size):
+    _assert_batch_matches_single(_vocalizer(synthetic_models, model),
+                                 batch_size=batch_size)
+
+
+@pytest.mark.parametrize('batch_size', [1, 2, 64])
+def test_catt_list_matches_single(synthetic_models, batch_size):
+    vocalizer = _vocalizer(synthetic_models, 'catt_eo')
+    _assert_batch_matches_single(vocalizer, batch_size=batch_size)
+    assert vocalizer.predict(TEXTS, batch_size=batch_size) \
+        == [vocalizer.predict(text) for text in TEXTS]
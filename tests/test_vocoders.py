@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from tts_arabic.models.tts_models import (
+    CHUNKED_VOCODER_ATOL, HifiGanVocoder, VocosVocoder, _vocode_chunked)
+
+
+@pytest.fixture(scope='module')
+def vocoders(synthetic_models):
+    return {
+        'hifigan': HifiGanVocoder(synthetic_models('hifigan'),
+                                  synthetic_models('denoiser'), cuda=None),
+        'vocos': VocosVocoder(synthetic_models('vocos')),
+    }
+
+
+def _mels(lengths, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.normal(-6., 2., (80, n)).astype(np.float32) for n in lengths]
+
+
+@pytest.mark.parametrize('chunk_size', [0, -4])
+def test_chunk_size_must_be_positive(chunk_size):
+    with pytest.raises(ValueError):
+        _vocode_chunked(lambda mel: mel, np.zeros((80, 10)),
+                        chunk_size=chunk_size)
+
+
+@pytest.mark.parametrize('vocoder_id', ['hifigan', 'vocos'])
+@pytest.mark.parametrize('chunk_size', [16, 64, 1000])
+def test_chunked_matches_one_shot(vocoders, vocoder_id, chunk_size):
+    vocoder = vocoders[vocoder_id]
+    mel_spec, = _mels([300])
+    wave = vocoder.infer(mel_spec)
+    chunks = np.concatenate(list(vocoder.infer_chunked(
+        mel_spec, chunk_size=chunk_size)))
+    assert chunks.shape == wave.shape
+    np.testing.assert_allclose(chunks, wave, atol=CHUNKED_VOCODER_ATOL)
+
+
+@pytest.mark.parametrize('vocoder_id', ['hifigan', 'vocos'])
+def test_infer_batch_matches_single(vocoders, vocoder_id):
+    vocoder = vocoders[vocoder_id]
+    mel_specs = _mels([120, 40, 300])
+    waves = vocoder.infer_batch(mel_specs)
+    for mel_spec, wave in zip(mel_specs, waves):
+        single = vocoder.infer(mel_spec)
+        assert wave.shape == single.shape
+        # only the frames next to the padding see different context
+        edge = 16 * (len(single) // mel_spec.shape[-1])
+        np.testing.assert_allclose(wave[:-edge], single[:-edge], atol=1e-5)
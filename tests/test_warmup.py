@@ -0,0 +1,26 @@
+import pytest
+
+from tts_arabic.utils.sessions import WarmupMixin
+
+
+def test_tts_model_warmup(synthetic_models):
+    from tts_arabic.models.core import get_model
+    synthetic_models('fastpitch')
+    model = get_model('fastpitch', 'hifigan', cuda=None)
+    assert not model.ready
+    warmup_time = model.warmup(token_lengths=(8, 16), mel_lengths=(16,),
+                               batch_size=2)
+    assert model.ready
+    assert model.warmup_time == warmup_time
+    assert warmup_time >= model.ttmel_model.warmup_time > 0
+
+
+@pytest.mark.parametrize('vocalizer_id', ['shakkelha', 'shakkala', 'catt_eo'])
+def test_vocalizer_warmup(synthetic_models, vocalizer_id):
+    from tts_arabic.vocalizer.models.core import get_model
+    synthetic_models(vocalizer_id)
+    vocalizer = get_model(vocalizer_id)
+    assert isinstance(vocalizer, WarmupMixin) and not vocalizer.ready
+    assert vocalizer.warmup_sizes[-1] == vocalizer.max_length
+    assert vocalizer.warmup([16]) == vocalizer.warmup_time
+    assert vocalizer.ready
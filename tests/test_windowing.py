@@ -0,0 +1,17 @@
+from tts_arabic.vocalizer.models.batching import predict_windowed, word_windows
+
+
+def test_word_windows_without_words():
+    assert word_windows([], 10, 2) == []
+
+
+def test_predict_windowed_whitespace_only():
+    texts = [' ' * 20, '']
+    assert predict_windowed(lambda batch: list(batch), texts, 10) == texts
+
+
+def test_predict_windowed_keeps_words():
+    text = ' '.join(f"w{i}" for i in range(50))
+    outputs = predict_windowed(lambda batch: [t.upper() for t in batch],
+                               [text, 'short'], 20)
+    assert outputs == [text.upper(), 'SHORT']
@@ -22,6 +22,10 @@ Public API
 ----------
 tts
     Synthesize speech from Arabic text and return a waveform.
+tts_batch
+    Synthesize many texts with batched model calls.
+tts_stream
+    Synthesize text sentence by sentence as a generator of waveform chunks.
 get_available_models
     List available Text→Mel and vocoder model identifiers.
 get_model
@@ -32,6 +36,14 @@ save_wave
     Save a waveform array to a WAV file.
 vocalize
     Apply automatic Arabic diacritization to unvocalized text.
+set_vocalization_cache
+    Cache vocalizer outputs in memory and, optionally, in a shared sqlite file.
+set_synthesis_cache
+    Cache synthesized mels/waveforms in memory and in a size-capped sqlite file.
+warm_synthesis_cache
+    Synthesize a prompt list ahead of time into the synthesis cache.
+model_registry
+    Process-wide cache of loaded models (limits, eviction and stats).
 
 Examples
 --------
@@ -50,11 +62,74 @@ Undiacritized input with automatic vowelization:
 >>> text = "القهوة مشروب يعد من بذور البن المحمصة"
 >>> wave = tts(text, play=True, vowelizer="shakkelha")
 """
-from .models.core import (
-    tts, 
-    play_wave, 
-    get_model, 
-    save_wave, 
-    get_available_models
-    )
-from .vocalizer.models.core import vocalize
\ No newline at end of file
+import importlib
+from typing import TYPE_CHECKING
+
+# public name -> module it is defined in; the modules (and with them
+# onnxruntime, gdown, ...) are imported on first access (PEP 562)
+_LAZY_ATTRS = {
+    'tts': '.models.core',
+    'tts_batch': '.models.core',
+    'tts_stream': '.models.core',
+    'play_wave': '.models.core',
+    'get_model': '.models.core',
+    'get_available_models': '.models.core',
+    'save_wave': '.utils.audio',
+    'vocalize': '.vocalizer.models.core',
+    'set_vocalization_cache': '.vocalizer.models.core',
+    'disable_vocalization_cache': '.vocalizer.models.core',
+    'clear_vocalization_cache': '.vocalizer.models.core',
+    'vocalization_cache_info': '.vocalizer.models.core',
+    'set_synthesis_cache': '.models.synthesis_cache',
+    'disable_synthesis_cache': '.models.synthesis_cache',
+    'clear_synthesis_cache': '.models.synthesis_cache',
+    'synthesis_cache_info': '.models.synthesis_cache',
+    'warm_synthesis_cache': '.models.synthesis_cache',
+    'model_registry': '.utils.registry',
+}
+_LAZY_MODULES = ('text', 'vocalizer', 'models', 'utils')
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__),
+                        name)
+    elif name in _LAZY_MODULES:
+        value = importlib.import_module(f'.{name}', __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS) | set(_LAZY_MODULES))
+
+
+if TYPE_CHECKING:
+    from .models.core import (
+        tts,
+        tts_batch,
+        tts_stream,
+        play_wave,
+        get_model,
+        save_wave,
+        get_available_models
+        )
+    from .vocalizer.models.core import (
+        vocalize,
+        set_vocalization_cache,
+        disable_vocalization_cache,
+        clear_vocalization_cache,
+        vocalization_cache_info,
+        )
+    from .models.synthesis_cache import (
+        set_synthesis_cache,
+        disable_synthesis_cache,
+        clear_synthesis_cache,
+        synthesis_cache_info,
+        warm_synthesis_cache,
+        )
+    from .utils.registry import model_registry
@@ -0,0 +1,207 @@
+"""
+Resumable, manifest-driven bulk synthesis.
+
+A manifest is a JSONL or CSV file with one utterance per row. Required
+fields are `id` and `text`; optional fields are `speaker`, `pace`,
+`pitch_mul` and `pitch_add` (`pitch` is accepted as an alias of
+`pitch_add`). Outputs are written to `<out_dir>/<id>.wav`, and every
+finished row is appended to `<out_dir>/ledger.jsonl`, so that a re-run skips
+ids that were already synthesized and retries the failed ones.
+"""
+import csv
+import json
+import multiprocessing as mp
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+_ITEM_PARAMS = {'speaker': int, 'pace': float,
+                'pitch_mul': float, 'pitch_add': float}
+
+LEDGER_NAME = 'ledger.jsonl'
+SUMMARY_NAME = 'summary.json'
+
+
+def read_manifest(path: str) -> List[dict]:
+    """Read a JSONL or CSV manifest into a list of utterance dicts."""
+    path = Path(path)
+    with open(path, encoding='utf-8', newline='') as f:
+        if path.suffix.lower() == '.csv':
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    items, seen = [], set()
+    for i, row in enumerate(rows):
+        if 'id' not in row or 'text' not in row:
+            raise ValueError(f"{path}: row {i+1} needs 'id' and 'text'")
+        item = {'id': str(row['id']), 'text': row['text']}
+        if Path(item['id']).name != item['id']:
+            raise ValueError(f"{path}: id {item['id']!r} is not a file name")
+        if item['id'] in seen:
+            raise ValueError(f"{path}: duplicate id {item['id']!r}")
+        seen.add(item['id'])
+        if row.get('pitch') not in (None, '') and 'pitch_add' not in row:
+            row['pitch_add'] = row['pitch']
+        for key, cast in _ITEM_PARAMS.items():
+            if row.get(key) not in (None, ''):
+                item[key] = cast(row[key])
+        items.append(item)
+    return items
+
+
+def read_ledger(path: Path) -> dict:
+    """Return the last ledger entry of each id."""
+    entries = {}
+    if path.exists():
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # truncated line of an interrupted run
+                entries[entry['id']] = entry
+    return entries
+
+
+_worker = {}
+
+
+def _init_worker(model_id, vocoder_id, cuda, options):
+    # the models are loaded by the first task: an exception raised in a
+    # Pool initializer makes the pool respawn workers forever
+    _worker['model_args'] = (model_id, vocoder_id, cuda)
+    _worker['model'] = None
+    _worker['options'] = options
+
+
+def _load_worker_model():
+    from .models.core import get_model, _vocoder_id_to_sr
+    model_id, vocoder_id, cuda = _worker['model_args']
+    _worker['model'] = get_model(model_id, vocoder_id, cuda=cuda)
+    _worker['sr'] = _vocoder_id_to_sr.get(vocoder_id, 22050)
+
+
+def _synthesize(item: dict) -> dict:
+    from .utils.audio import save_wave
+    if _worker['model'] is None:
+        # a loading error ends the run (raised in the parent by imap)
+        _load_worker_model()
+    options = _worker['options']
+    time_start = time.perf_counter()
+    try:
+        wave = _worker['model'].infer(
+            item['text'],
+            denoise=options['denoise'],
+            volume=options['volume'],
+            vowelizer=options['vowelizer'],
+            **{k: item[k] for k in _ITEM_PARAMS if k in item})
+        out_path = Path(options['out_dir']).joinpath(f"{item['id']}.wav")
+        save_wave(wave, out_path.as_posix(), sample_rate=_worker['sr'],
+                  bits_per_sample=options['bits_per_sample'])
+    except Exception as exc:
+        return {'id': item['id'], 'status': 'failed',
+                'error': f"{type(exc).__name__}: {exc}"}
+    synth_time = time.perf_counter() - time_start
+    duration = len(wave) / _worker['sr']
+    return {'id': item['id'], 'status': 'ok', 'path': out_path.name,
+            'duration': duration, 'synth_time': synth_time,
+            'rtf': synth_time / duration if duration else None}
+
+
+def _run_items(items, workers, initargs) -> Iterator[dict]:
+    if not items:
+        return  # everything is in the ledger: do not load the models
+    if workers <= 1:
+        _init_worker(*initargs)
+        yield from map(_synthesize, items)
+        return
+    ctx = mp.get_context('spawn')
+    with ctx.Pool(workers, initializer=_init_worker,
+                  initargs=initargs) as pool:
+        yield from pool.imap_unordered(_synthesize, items, chunksize=4)
+
+
+def synthesize_manifest(manifest: str,
+                        out_dir: str,
+                        workers: int = 1,
+                        model_id: str = 'fastpitch',
+                        vocoder_id: str = 'hifigan',
+                        cuda: Optional[int] = None,
+                        vowelizer: Optional[str] = None,
+                        denoise: float = 0.005,
+                        volume: float = 0.9,
+                        bits_per_sample: int = 16,
+                        verbose: bool = True,
+                        ) -> dict:
+    """
+    Synthesize all rows of a manifest that are not yet in the ledger.
+
+    Parameters:
+        manifest (str): Path of the JSONL or CSV manifest
+        out_dir (str): Output folder for WAV files, ledger and summary
+        workers (int): Number of worker processes, each loading the models
+            once
+        (other parameters as in `tts`)
+
+    Returns:
+        (dict): Summary with item counts, failures, wall time, throughput
+            and RTF statistics; also written to `<out_dir>/summary.json`
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    ledger_path = out_dir.joinpath(LEDGER_NAME)
+
+    items = read_manifest(manifest)
+    done = {id for id, entry in read_ledger(ledger_path).items()
+            if entry['status'] == 'ok'}
+    todo = [item for item in items if item['id'] not in done]
+
+    options = dict(out_dir=out_dir.as_posix(), vowelizer=vowelizer,
+                   denoise=denoise, volume=volume,
+                   bits_per_sample=bits_per_sample)
+    initargs = (model_id, vocoder_id, cuda, options)
+    workers = max(1, min(workers, len(todo)))
+
+    n_ok, failures = 0, []
+    audio_time, synth_time, rtfs = 0., 0., []
+    time_start = time.perf_counter()
+    with open(ledger_path, 'a', encoding='utf-8') as ledger:
+        for i, result in enumerate(_run_items(todo, workers, initargs)):
+            ledger.write(json.dumps(result, ensure_ascii=False) + '\n')
+            ledger.flush()
+            if result['status'] == 'ok':
+                n_ok += 1
+                audio_time += result['duration']
+                synth_time += result['synth_time']
+                if result['rtf'] is not None:  # None for empty audio
+                    rtfs.append(result['rtf'])
+            else:
+                failures.append(result)
+            if verbose:
+                print(f"[{i+1}/{len(todo)}] {result['id']}: "
+                      f"{result['status']}", flush=True)
+    wall_time = time.perf_counter() - time_start
+
+    rtfs.sort()
+    summary = {
+        'manifest': str(manifest),
+        'items': len(items),
+        'skipped': len(items) - len(todo),
+        'synthesized': n_ok,
+        'failed': len(failures),
+        'failed_ids': [r['id'] for r in failures],
+        'workers': workers,
+        'wall_time': wall_time,
+        'audio_time': audio_time,
+        'items_per_second': n_ok / wall_time if wall_time else None,
+        'audio_seconds_per_second': audio_time / wall_time
+        if wall_time else None,
+        'rtf_mean': synth_time / audio_time if audio_time else None,
+        'rtf_p50': rtfs[len(rtfs)//2] if rtfs else None,
+        'rtf_p95': rtfs[min(len(rtfs)-1, int(0.95*len(rtfs)))]
+        if rtfs else None,
+    }
+    with open(out_dir.joinpath(SUMMARY_NAME), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    return summary
@@ -0,0 +1,260 @@
+"""
+Command line interface of tts_arabic.
+
+Usage:
+    tts-arabic synth MANIFEST OUT_DIR [--workers N] [...]
+    tts-arabic quantize [--models ID ...] [--report REPORT.json]
+    tts-arabic lexicon CORPUS OUT [--min-count N] [--overrides FILE]
+    tts-arabic serve [--port PORT] [--max-batch N] [--max-wait-ms MS]
+    tts-arabic prefetch [--models ID ...] [--store-dir DIR] [--verify]
+                        [--synthetic PRESET]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import List, Optional
+
+
+def _add_model_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('--model-id', default='fastpitch',
+                        help="Text->Mel model (default: fastpitch)")
+    parser.add_argument('--vocoder-id', default='hifigan',
+                        help="vocoder model (default: hifigan)")
+    parser.add_argument('--cuda', type=int, default=None,
+                        help="CUDA device index (default: CPU)")
+
+
+def _synth(args: argparse.Namespace) -> int:
+    from .bulk import synthesize_manifest
+    if args.lexicon:
+        # read by the frontend of this and of the worker processes
+        os.environ['TTS_ARABIC_LEXICON'] = os.pathsep.join(
+            os.path.abspath(path) for path in args.lexicon)
+    summary = synthesize_manifest(
+        args.manifest,
+        args.out_dir,
+        workers=args.workers,
+        model_id=args.model_id,
+        vocoder_id=args.vocoder_id,
+        cuda=args.cuda,
+        vowelizer=args.vowelizer,
+        denoise=args.denoise,
+        volume=args.volume,
+        bits_per_sample=args.bits_per_sample,
+        verbose=not args.quiet,
+    )
+    print(json.dumps(summary, indent=2))
+    return 1 if summary['failed'] else 0
+
+
+def _quantize(args: argparse.Namespace) -> int:
+    from .models.quantize import (
+        DEFAULT_OP_TYPES, quantize_models, quantization_report)
+    paths = quantize_models(args.models,
+                            op_types=args.op_types or DEFAULT_OP_TYPES,
+                            per_channel=args.per_channel,
+                            overwrite=args.overwrite)
+    for name, path in paths.items():
+        print(f"{name}: {path}")
+    if args.report is not None:
+        report = quantization_report(args.models, cuda=args.cuda)
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+def _lexicon(args: argparse.Namespace) -> int:
+    from .text.lexicon import compile_lexicon, read_overrides
+    overrides = read_overrides(args.overrides) if args.overrides else None
+    with open(args.corpus, encoding='utf-8') as f:
+        info = compile_lexicon((line.strip() for line in f if line.strip()),
+                               args.out, min_count=args.min_count,
+                               overrides=overrides)
+    print(json.dumps(info, indent=2))
+    return 0
+
+
+def _serve(args: argparse.Namespace) -> int:
+    from .server import serve
+    # the server reports start-up and warm-up through `logging`
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if args.lexicon:
+        os.environ['TTS_ARABIC_LEXICON'] = os.pathsep.join(
+            os.path.abspath(path) for path in args.lexicon)
+    serve(args.host, args.port,
+          model_id=args.model_id,
+          vocoder_id=args.vocoder_id,
+          cuda=args.cuda,
+          max_batch=args.max_batch,
+          max_wait=args.max_wait_ms / 1000,
+          workers=args.workers,
+          max_queue=args.max_queue,
+          vowelizer=args.vowelizer,
+          bits_per_sample=args.bits_per_sample,
+          warmup=not args.no_warmup)
+    return 0
+
+
+def _prefetch(args: argparse.Namespace) -> int:
+    from .utils import model_store
+    if args.store_dir:
+        model_store.set_store_dir(args.store_dir)
+    if args.mirror:
+        model_store.set_mirror(args.mirror)
+    if args.synthetic:
+        model_store.set_synthetic(args.synthetic)
+    paths = model_store.prefetch(args.models, workers=args.workers)
+    failed = [name for name, path in paths.items()
+              if path.startswith('error:')]
+    output = {'store_dir': model_store.store_dir().as_posix(),
+              'models': paths}
+    if args.verify:
+        status = model_store.verify_models(args.models or list(paths))
+        failed += [name for name, state in status.items()
+                   if state == 'mismatch']
+        output['verify'] = status
+    print(json.dumps(output, indent=2))
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='tts-arabic',
+        description="Arabic TTS with FastPitch/MixerTTS ONNX models.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    synth = subparsers.add_parser(
+        'synth',
+        help="synthesize a JSONL/CSV manifest to WAV files",
+        description="Synthesize every row (id, text, speaker, pace, "
+        "pitch_mul, pitch_add) of a JSONL/CSV manifest to OUT_DIR/<id>.wav. "
+        "Finished ids are recorded in OUT_DIR/ledger.jsonl and skipped "
+        "when the command is run again.")
+    synth.add_argument('manifest', help="JSONL or CSV manifest")
+    synth.add_argument('out_dir', help="output folder")
+    synth.add_argument('-j', '--workers', type=int, default=1,
+                       help="number of worker processes (default: 1)")
+    _add_model_args(synth)
+    synth.add_argument('--vowelizer', default=None,
+                       choices=['catt_eo', 'shakkala', 'shakkelha'])
+    synth.add_argument('--denoise', type=float, default=0.005)
+    synth.add_argument('--volume', type=float, default=0.9)
+    synth.add_argument('--bits-per-sample', type=int, default=16,
+                       choices=[8, 16, 24, 32])
+    synth.add_argument('--lexicon', nargs='+', default=None,
+                       help="pronunciation lexicons to consult before the "
+                       "G2P rules, see 'tts-arabic lexicon'")
+    synth.add_argument('-q', '--quiet', action='store_true',
+                       help="do not print per-item progress")
+    synth.set_defaults(func=_synth)
+
+    # models.quantize is imported by _quantize only (it loads numpy and
+    # the model package); the variants are the files_dict entries with a
+    # 'source'
+    from .urls import files_dict
+    quantize = subparsers.add_parser(
+        'quantize',
+        help="build dynamically quantized (INT8) model variants",
+        description="Create the INT8 variants (e.g. fastpitch-int8, "
+        "hifigan-int8) of the Text->Mel and vocoder models, and optionally "
+        "a report comparing RTF, file size and output distance with the "
+        "fp32 models.")
+    quantize.add_argument('--models', nargs='+', default=None,
+                          choices=[name for name, entry in files_dict.items()
+                                   if 'source' in entry],
+                          help="variants to build (default: all)")
+    quantize.add_argument('--op-types', nargs='+',
+                          default=None,
+                          help="ONNX op types to quantize "
+                          "(default: MatMul Attention LSTM Conv)")
+    quantize.add_argument('--per-channel', action='store_true')
+    quantize.add_argument('--overwrite', action='store_true',
+                          help="rebuild existing variants")
+    quantize.add_argument('--report', default=None, metavar='REPORT.json',
+                          help="write a quality/latency report to this file")
+    quantize.add_argument('--cuda', type=int, default=None)
+    quantize.set_defaults(func=_quantize)
+
+    lexicon = subparsers.add_parser(
+        'lexicon',
+        help="compile a pronunciation lexicon from a text corpus",
+        description="Phonetise the words of a diacritized corpus (one "
+        "utterance per line, Arabic script or Buckwalter) and store them in "
+        "a lexicon file that is consulted before the G2P rules.")
+    lexicon.add_argument('corpus', help="text file, one utterance per line")
+    lexicon.add_argument('out', help="output lexicon file")
+    lexicon.add_argument('--min-count', type=int, default=1,
+                         help="keep words occurring at least this often")
+    lexicon.add_argument('--overrides', default=None,
+                         help="file of 'word<TAB>phonemes' lines that "
+                         "replace the G2P output")
+    lexicon.set_defaults(func=_lexicon)
+
+    serve = subparsers.add_parser(
+        'serve',
+        help="run a local HTTP synthesis server",
+        description="Serve POST/GET /tts (WAV or raw PCM, optionally "
+        "streamed sentence by sentence), /metrics and /health. Concurrent "
+        "requests are collected into micro-batches of up to --max-batch "
+        "requests, waiting at most --max-wait-ms for a batch to fill.")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000)
+    _add_model_args(serve)
+    serve.add_argument('--max-batch', type=int, default=8,
+                       help="max requests per model call (default: 8)")
+    serve.add_argument('--max-wait-ms', type=float, default=10.,
+                       help="max time a batch waits to fill (default: 10)")
+    serve.add_argument('-j', '--workers', type=int, default=1,
+                       help="batches run concurrently (default: 1)")
+    serve.add_argument('--max-queue', type=int, default=256,
+                       help="reject requests beyond this queue depth")
+    serve.add_argument('--vowelizer', default=None,
+                       choices=['catt_eo', 'shakkala', 'shakkelha'],
+                       help="default vowelizer of the requests")
+    serve.add_argument('--bits-per-sample', type=int, default=16,
+                       choices=[8, 16, 24, 32])
+    serve.add_argument('--lexicon', nargs='+', default=None,
+                       help="pronunciation lexicons, see 'tts-arabic lexicon'")
+    serve.add_argument('--no-warmup', action='store_true',
+                       help="skip the model warm-up at start "
+                       "(/health reports ok as soon as the models are loaded)")
+    serve.set_defaults(func=_serve)
+
+    prefetch = subparsers.add_parser(
+        'prefetch',
+        help="download models into the model store ahead of time",
+        description="Fetch model files in parallel (with a lock per file "
+        "and atomic renames, so running workers are not disturbed), e.g. "
+        "before switching workers to TTS_ARABIC_OFFLINE=1.")
+    prefetch.add_argument('--models', nargs='+', default=None,
+                          choices=list(files_dict),
+                          help="names to fetch (default: all downloadable)")
+    prefetch.add_argument('-j', '--workers', type=int, default=4)
+    prefetch.add_argument('--store-dir', default=None,
+                          help="store root (default: TTS_ARABIC_HOME or the "
+                          "package folder)")
+    prefetch.add_argument('--mirror', default=None,
+                          help="file:// or http(s):// base URL to fetch the "
+                          "files from instead of their files_dict URLs")
+    prefetch.add_argument('--verify', action='store_true',
+                          help="check the files against their checksums")
+    prefetch.add_argument('--synthetic', default=None,
+                          choices=['tiny', 'realistic'],
+                          help="generate random-weight stand-in models with "
+                          "this cost preset instead of downloading (used "
+                          "by other commands with TTS_ARABIC_SYNTHETIC)")
+    prefetch.set_defaults(func=_prefetch)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,27 @@
 # from typing import Literal
 # _VOWELIZER = Literal['catt', 'shakkala', 'shakkelha']
+import importlib
 
-from .. import text
-from .. import vocalizer
 from ..vocalizer.models.core import _MODEL_TYPE as _VOWELIZER
-from .tts_models import FastPitch2Wave, FastPitch2Mel, VocosVocoder, HifiGanVocoder
 from ..urls import files_dict
+
+# the model modules import onnxruntime and the text frontend; load them on
+# first access (PEP 562)
+_LAZY_ATTRS = {
+    'FastPitch2Wave': '.tts_models',
+    'FastPitch2Mel': '.tts_models',
+    'VocosVocoder': '.tts_models',
+    'HifiGanVocoder': '.tts_models',
+    'PipelinedSynthesizer': '.pipeline',
+    'text': '..text',
+    'vocalizer': '..vocalizer',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(_LAZY_ATTRS[name], __name__)
+    value = module if name in ('text', 'vocalizer') else getattr(module, name)
+    globals()[name] = value
+    return value
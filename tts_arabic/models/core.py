@@ -1,67 +1,100 @@
-from typing import Literal, Optional, get_args
-from packaging.version import Version
+from typing import (TYPE_CHECKING, Iterator, List, Literal, Optional,
+                    Sequence, Union, get_args)
+import time
 
 import numpy as np
-import gdown
 
-from . import FastPitch2Wave, files_dict, _VOWELIZER
+from . import files_dict, _VOWELIZER
+from .synthesis_cache import SynthesisCache, get_synthesis_cache, normalize_text
 from ..utils.audio import save_wave
+from ..utils import model_store
+from ..utils.registry import model_registry
 from pathlib import Path
-try:
-    import sounddevice as sd
-except:
-    pass
 
-_MODEL_ID = Literal['fastpitch', 'mixer128', 'mixer80']
-_VOCODER_ID = Literal['hifigan', 'vocos', 'vocos44']
+# onnxruntime (through the model classes), gdown and sounddevice are
+# imported on first use, to keep `import tts_arabic` fast
+if TYPE_CHECKING:
+    from .tts_models import FastPitch2Wave
+
+_MODEL_ID = Literal['fastpitch', 'mixer128', 'mixer80',
+                    'fastpitch-int8', 'mixer128-int8', 'mixer80-int8']
+_VOCODER_ID = Literal['hifigan', 'vocos', 'vocos44',
+                      'hifigan-int8', 'vocos-int8', 'vocos44-int8']
 _vocoder_id_to_sr = {
     'hifigan': 22050, 'vocos': 22050, 'vocos44': 44100,
+    'hifigan-int8': 22050, 'vocos-int8': 22050, 'vocos44-int8': 44100,
 }
 
 
+def _source_id(model_id: str) -> str:
+    """Id of the fp32 model a (quantized) variant was derived from."""
+    return files_dict[model_id].get('source', model_id)
+
+
 def play_wave(wave,
               sr: int = 22050,
               blocking: bool = False
               ) -> None:
+    import sounddevice as sd
     sd.play(wave, samplerate=sr, blocking=blocking)
 
 
 def get_model_path(package_path: Optional[Path] = None,
                    name: str = "fastpitch"
                    ) -> str:
-    file_entry = files_dict[name]
-    if package_path is None:
-        package_path = Path(__file__).parent.parent
-    model_path = package_path.joinpath(file_entry['file'])
-    if not model_path.parent.exists():
-        model_path.parent.mkdir(parents=True)
-    # or (model_path.lstat().st_mtime < file_entry.get('timestamp', 0)):
-    if not model_path.exists():
-        if Version(gdown.__version__) < Version("6"):
-            gdown.download(file_entry['url'], output=model_path.as_posix(), fuzzy=True)
-        else:
-            gdown.download(file_entry['url'], output=model_path.as_posix())
-
-    return model_path.as_posix()
+    """
+    Local path of a model file, fetched into the model store if missing
+    (see `utils.model_store`).
+
+    Parameters:
+        package_path (Path): Optional; Store root overriding `store_dir()`
+        name (str): `files_dict` name
+    """
+    return model_store.get_model_path(name, root=package_path)
 
 
 def get_model(model_id: _MODEL_ID = 'fastpitch',
               vocoder_id: _VOCODER_ID = 'hifigan',
-              cuda: bool = True
-              ) -> FastPitch2Wave:
-    package_path = Path(__file__).parent.parent
+              cuda: bool = True,
+              optimize: Optional[bool] = None,
+              warmup: bool = False,
+              ) -> 'FastPitch2Wave':
+    """
+    Load a Text->Mel model/vocoder pair, downloading missing model files.
+
+    Parameters:
+        model_id (str): Text->Mel model
+        vocoder_id (str): Vocoder model
+        cuda (int): Optional; CUDA device index
+        optimize (bool): Optional; Build (once) and load graph-optimized
+            artifacts stored next to the model files, keyed by the
+            onnxruntime version and execution provider, instead of
+            optimizing the raw graphs on every start. Defaults to the
+            `TTS_ARABIC_OPTIMIZE` environment variable being set to `1`.
+        warmup (bool): Optional; Run representative input lengths through
+            the models before returning (see `FastPitch2Wave.warmup`), so
+            that the first request is not slowed down by lazy allocation
+
+    Returns:
+        (FastPitch2Wave): TTS pipeline
+    """
+    from .tts_models import FastPitch2Wave
 
-    fastpitch_path = get_model_path(package_path, model_id)
-    hifigan_path = get_model_path(package_path, vocoder_id)
-    denoiser_path = get_model_path(package_path, 'denoiser') \
-        if vocoder_id == 'hifigan' else None
+    fastpitch_path = get_model_path(name=model_id)
+    hifigan_path = get_model_path(name=vocoder_id)
+    denoiser_path = get_model_path(name='denoiser') \
+        if _source_id(vocoder_id) == 'hifigan' else None
 
     tts_model = FastPitch2Wave(
         fastpitch_path,
         hifigan_path,
         denoiser_path,
-        vocoder_id=vocoder_id,
-        cuda=cuda)
+        vocoder_id=_source_id(vocoder_id),
+        cuda=cuda,
+        optimize=optimize,
+        n_speakers=files_dict[_source_id(model_id)].get('n_speakers'))
+    if warmup:
+        tts_model.warmup()
 
     return tts_model
 
@@ -73,6 +106,70 @@ def get_available_models():
     }
 
 
+def _files_nbytes(*names: str) -> int:
+    return sum(model_store.model_path(name).stat().st_size
+               for name in names)
+
+
+def _load_cached_model(model_id: _MODEL_ID,
+                       vocoder_id: _VOCODER_ID,
+                       cuda: Optional[int]
+                       ) -> 'FastPitch2Wave':
+    names = (model_id, vocoder_id) + \
+        (('denoiser',) if _source_id(vocoder_id) == 'hifigan' else ())
+    return model_registry.get(
+        ('tts', model_id, vocoder_id, cuda),
+        lambda: get_model(model_id, vocoder_id, cuda),
+        nbytes=lambda model: _files_nbytes(*names))
+
+
+def _infer_cached(synthesis_cache: SynthesisCache,
+                  text: str,
+                  speaker: int,
+                  pace: float,
+                  denoise: float,
+                  volume: float,
+                  vowelizer: Optional[_VOWELIZER],
+                  pitch_mul: float,
+                  pitch_add: float,
+                  cuda: Optional[int],
+                  model_id: _MODEL_ID,
+                  vocoder_id: _VOCODER_ID,
+                  return_mel: bool,
+                  vocoder_chunk_size: Optional[int],
+                  ):
+    text = normalize_text(text)
+    mel_key = synthesis_cache.mel_key(text, speaker, pace, pitch_mul,
+                                      pitch_add, vowelizer, model_id)
+    denoiser_id = 'denoiser' if _source_id(vocoder_id) == 'hifigan' else None
+    wave_key = synthesis_cache.wave_key(mel_key, vocoder_id, denoise,
+                                        vocoder_chunk_size, denoiser_id)
+
+    wave_out = synthesis_cache.get_wave(wave_key)
+    mel_spec = synthesis_cache.get_mel(mel_key) \
+        if wave_out is None or return_mel else None
+    if wave_out is None or (return_mel and mel_spec is None):
+        # the models are only loaded on a miss
+        model = _load_cached_model(model_id, vocoder_id, cuda)
+        if mel_spec is None:
+            mel_spec = model.ttmel_model.infer(text,
+                                               pace=pace,
+                                               speaker=speaker,
+                                               vowelizer=vowelizer,
+                                               pitch_mul=pitch_mul,
+                                               pitch_add=pitch_add)
+            synthesis_cache.put_mel(mel_key, mel_spec)
+        if wave_out is None:
+            wave_out = model.vocode(mel_spec, denoise=denoise,
+                                    vocoder_chunk_size=vocoder_chunk_size)
+            synthesis_cache.put_wave(wave_key, wave_out)
+    wave_out = volume*wave_out
+
+    if return_mel:
+        return wave_out, mel_spec
+    return wave_out
+
+
 def tts(text: str,
         speaker: int = 0,
         pace: float = 1.,
@@ -89,6 +186,8 @@ def tts(text: str,
         bits_per_sample: Literal[8, 16, 24, 32] = 32,
         return_mel: bool = False,
         blocking: bool = True,
+        vocoder_chunk_size: Optional[int] = None,
+        cache: Optional[bool] = None,
         ) -> np.ndarray:
     """
     Synthesize speech from Arabic text using a neural TTS pipeline.
@@ -98,7 +197,9 @@ def tts(text: str,
     vocalized (diacritized) Arabic, unvocalized Arabic with optional automatic
     diacritization, and Buckwalter transliteration.
 
-    Models are lazily loaded and cached per (model_id, vocoder_id, cuda) tuple.
+    Models are lazily loaded and cached per (model_id, vocoder_id, cuda) tuple
+    in the process-wide `model_registry`, which holds several pipelines at
+    once and can be shared by many threads.
 
     Parameters
     ----------
@@ -173,6 +274,16 @@ def tts(text: str,
     blocking : bool, default=True
         If `play=True`, block execution until playback finishes.
 
+    vocoder_chunk_size : Optional[int], default=None
+        If provided, run the vocoder on windows of this many mel frames
+        (with context padding and crossfading) instead of the whole mel
+        spectrogram at once, which bounds the vocoder's peak memory.
+
+    cache : Optional[bool], default=None
+        Serve and store the mel spectrogram and waveform through the
+        synthesis cache (see `set_synthesis_cache`); by default, whenever
+        the cache is enabled. The text is whitespace-normalized first.
+
     Returns
     -------
     numpy.ndarray or tuple
@@ -194,28 +305,214 @@ def tts(text: str,
     >>> text = "القهوة مشروب يعد من بذور البن المحمصة."
     >>> wave = tts(text, play=True, vowelizer="shakkelha")
     """
-    model_params = (model_id, vocoder_id, cuda)
-    if not hasattr(tts, 'model') or tts.params != model_params:
-        # cache models
-        setattr(tts, 'model', get_model(*model_params))
-        setattr(tts, 'params', model_params)
-        setattr(tts, 'sr', _vocoder_id_to_sr.get(vocoder_id, 22050))
+    sr = _vocoder_id_to_sr.get(vocoder_id, 22050)
+    synthesis_cache = get_synthesis_cache() if cache is not False else None
+    if cache and synthesis_cache is None:
+        raise ValueError("the synthesis cache is not enabled "
+                         "(see set_synthesis_cache)")
 
     # TTS inference
-    output = tts.model.infer(
-        text, speaker, pace,
-        denoise,
+    if synthesis_cache is not None:
+        output = _infer_cached(
+            synthesis_cache, text, speaker, pace, denoise, volume,
+            vowelizer, pitch_mul, pitch_add, cuda, model_id, vocoder_id,
+            return_mel, vocoder_chunk_size)
+    else:
+        model = _load_cached_model(model_id, vocoder_id, cuda)
+        output = model.infer(
+            text, speaker, pace,
+            denoise,
+            volume=volume,
+            vowelizer=vowelizer,
+            pitch_mul=pitch_mul,
+            pitch_add=pitch_add,
+            return_mel=return_mel,
+            vocoder_chunk_size=vocoder_chunk_size,
+        )
+    wave_out = output[0] if isinstance(output, tuple) else output
+    if play:
+        play_wave(wave_out, blocking=blocking, sr=sr)
+    if save_to is not None:
+        save_wave(wave_out, save_to, sample_rate=sr,
+                  bits_per_sample=bits_per_sample)
+
+    return output
+
+
+def tts_batch(texts: List[str],
+              speakers: Union[int, Sequence[int]] = 0,
+              paces: Union[float, Sequence[float]] = 1.,
+              denoise: float = 0.005,
+              volume: float = 0.9,
+              vowelizer: Optional[_VOWELIZER] = None,
+              pitch_muls: Union[float, Sequence[float]] = 1.,
+              pitch_adds: Union[float, Sequence[float]] = 0.,
+              cuda: Optional[int] = None,
+              model_id: _MODEL_ID = 'fastpitch',
+              vocoder_id: _VOCODER_ID = 'hifigan',
+              batch_size: int = 16,
+              save_to: Optional[Sequence[str]] = None,
+              bits_per_sample: Literal[8, 16, 24, 32] = 32,
+              return_mel: bool = False,
+              ) -> List[np.ndarray]:
+    """
+    Synthesize speech for many texts with batched model calls.
+
+    Batched counterpart of `tts`: token ids are padded so that the Text→Mel
+    model and the vocoder run once per batch of `batch_size` utterances,
+    and each waveform is trimmed back to the length of its own mel
+    spectrogram. Shares the model cache with `tts`.
+
+    Parameters
+    ----------
+    texts : list of str
+        Input texts (diacritized Arabic, undiacritized Arabic or Buckwalter).
+
+    speakers : int or sequence of int, default=0
+        Speaker ID, either shared by all texts or one per text.
+
+    paces : float or sequence of float, default=1.0
+        Speaking rate multiplier, shared or one per text.
+
+    denoise, volume, vowelizer, cuda, model_id, vocoder_id, bits_per_sample
+        See `tts`.
+
+    pitch_muls : float or sequence of float, default=1.0
+        Pitch multiplier, shared or one per text. See `pitch_mul` in `tts`.
+
+    pitch_adds : float or sequence of float, default=0.0
+        Pitch offset, shared or one per text. See `pitch_add` in `tts`.
+
+    batch_size : int, default=16
+        Maximum number of utterances per model call.
+
+    save_to : Optional[sequence of str], default=None
+        If provided, one WAV file path per text.
+
+    return_mel : bool, default=False
+        If True, return a tuple (waveforms, mels).
+
+    Returns
+    -------
+    list of numpy.ndarray or tuple
+        Waveforms in input order, or (waveforms, mels) if `return_mel=True`.
+
+    Examples
+    --------
+    >>> from tts_arabic import tts_batch
+    >>> texts = ["اَلسَّلامُ عَلَيكُم.", ">als~alAmu Ealaykum."]
+    >>> waves = tts_batch(texts, speakers=[0, 2])
+    """
+    if save_to is not None and len(save_to) != len(texts):
+        raise ValueError(f"save_to has {len(save_to)} paths for "
+                         f"{len(texts)} texts")
+
+    model = _load_cached_model(model_id, vocoder_id, cuda)
+    sr = _vocoder_id_to_sr.get(vocoder_id, 22050)
+
+    output = model.infer_batch(
+        texts,
+        speakers=speakers,
+        paces=paces,
+        denoise=denoise,
         volume=volume,
         vowelizer=vowelizer,
-        pitch_mul=pitch_mul,
-        pitch_add=pitch_add,
+        pitch_muls=pitch_muls,
+        pitch_adds=pitch_adds,
+        batch_size=batch_size,
         return_mel=return_mel,
     )
-    wave_out = output[0] if isinstance(output, tuple) else output
-    if play:
-        play_wave(wave_out, blocking=blocking, sr=tts.sr)
+    waves_out = output[0] if isinstance(output, tuple) else output
     if save_to is not None:
-        save_wave(wave_out, save_to, sample_rate=tts.sr,
-                  bits_per_sample=bits_per_sample)
+        for wave_out, path in zip(waves_out, save_to):
+            save_wave(wave_out, path, sample_rate=sr,
+                      bits_per_sample=bits_per_sample)
 
     return output
+
+
+def tts_stream(text: str,
+               speaker: int = 0,
+               pace: float = 1.,
+               denoise: float = 0.005,
+               volume: float = 0.9,
+               vowelizer: Optional[_VOWELIZER] = None,
+               pitch_mul: float = 1.,
+               pitch_add: float = 0.,
+               cuda: Optional[int] = None,
+               model_id: _MODEL_ID = 'fastpitch',
+               vocoder_id: _VOCODER_ID = 'hifigan',
+               vocoder_chunk_size: Optional[int] = None,
+               stats: Optional[dict] = None,
+               ) -> Iterator[np.ndarray]:
+    """
+    Synthesize speech sentence by sentence as a generator.
+
+    The input is split after sentence-final punctuation (. ? ! ؟ ؛ ;) and
+    at line breaks. Each sentence is vowelized, synthesized and vocoded on
+    its own, and its waveform is yielded as soon as it is ready, so playback
+    can start while later sentences are still being synthesized. Chunks are
+    normalized with the running peak of all chunks produced so far instead
+    of the peak of the full utterance.
+
+    Parameters
+    ----------
+    text : str
+        Input text. See `tts`.
+
+    speaker, pace, denoise, volume, vowelizer, pitch_mul, pitch_add, cuda,
+    model_id, vocoder_id
+        See `tts`.
+
+    vocoder_chunk_size : Optional[int], default=None
+        If provided, long sentences are additionally vocoded and yielded
+        in chunks of this many mel frames.
+
+    stats : Optional[dict], default=None
+        If provided, filled with timing information while the generator
+        runs: `time_to_first_chunk` (s), `total_time` (s),
+        `audio_duration` (s), `rtf` (total_time / audio_duration) and
+        `n_chunks`.
+
+    Yields
+    ------
+    numpy.ndarray
+        Waveform chunk of shape (n_samples,) sampled at the vocoder’s
+        native sample rate.
+
+    Examples
+    --------
+    >>> from tts_arabic import tts_stream
+    >>> text = "اَلسَّلامُ عَلَيكُم. كَيفَ حالُك؟"
+    >>> stats = {}
+    >>> for chunk in tts_stream(text, speaker=1, stats=stats):
+    ...     play_wave(chunk, blocking=True)
+    >>> print(stats['time_to_first_chunk'], stats['rtf'])
+    """
+    model = _load_cached_model(model_id, vocoder_id, cuda)
+    sr = _vocoder_id_to_sr.get(vocoder_id, 22050)
+    if stats is None:
+        stats = {}
+    stats.update(time_to_first_chunk=None, total_time=0.,
+                 audio_duration=0., rtf=None, n_chunks=0)
+
+    synth_time = 0.
+    time_start = time.perf_counter()
+    for wave_out in model.infer_stream(
+            text, speaker, pace,
+            denoise,
+            volume=volume,
+            vowelizer=vowelizer,
+            pitch_mul=pitch_mul,
+            pitch_add=pitch_add,
+            vocoder_chunk_size=vocoder_chunk_size):
+        # time spent by the consumer between chunks is not counted
+        synth_time += time.perf_counter() - time_start
+        if stats['time_to_first_chunk'] is None:
+            stats['time_to_first_chunk'] = synth_time
+        stats['n_chunks'] += 1
+        stats['audio_duration'] += len(wave_out) / sr
+        stats['total_time'] = synth_time
+        stats['rtf'] = synth_time / stats['audio_duration']
+        yield wave_out
+        time_start = time.perf_counter()
@@ -0,0 +1,181 @@
+import queue
+import threading
+import time
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from . import _VOWELIZER
+from .tts_models import FastPitch2Wave
+
+_END = object()
+
+
+class _Failure:
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+class PipelinedSynthesizer:
+    """
+    Run the stages of `FastPitch2Wave.infer` in separate threads.
+
+    The stages are connected by bounded queues, so that utterance N+1 goes
+    through the text frontend (vowelization and G2P) while utterance N is in
+    the Text->Mel model and utterance N-1 is vocoded. ONNX Runtime releases
+    the GIL while a session runs, so the pure-Python frontend and the model
+    stages overlap. Outputs are yielded in input order.
+
+    Stages:
+        frontend: vowelization and text -> token ids
+        text2mel: Text->Mel model
+        vocoder: vocoder, denoiser and volume normalization
+
+    Args:
+        model (FastPitch2Wave): Loaded TTS pipeline, see `get_model`
+        queue_size (int): Max number of items waiting between two stages
+
+    Examples:
+        >>> from tts_arabic import get_model
+        >>> from tts_arabic.models.pipeline import PipelinedSynthesizer
+        >>> synth = PipelinedSynthesizer(get_model('fastpitch', 'hifigan'))
+        >>> for wave in synth.run(texts, speaker=1):
+        ...     pass
+        >>> print(synth.stats())
+    """
+
+    stage_names = ('frontend', 'text2mel', 'vocoder')
+
+    def __init__(self,
+                 model: FastPitch2Wave,
+                 queue_size: int = 4,
+                 ) -> None:
+        self.model = model
+        self.queue_size = queue_size
+        self._stats = None
+        self._time_start = None
+        self._time_end = None
+
+    def run(self,
+            texts: Iterable[Union[str, dict]],
+            speaker: int = 0,
+            pace: float = 1.,
+            denoise: float = 0.005,
+            volume: float = 0.9,
+            vowelizer: _VOWELIZER = None,
+            pitch_mul: float = 1.,
+            pitch_add: float = 0.,
+            ) -> Iterator[np.ndarray]:
+        """
+        Parameters:
+            texts (iterable[str|dict]): Texts, or dicts with a `text` key and
+                optional per-item `speaker`, `pace`, `pitch_mul`, `pitch_add`
+                entries overriding the shared arguments
+            (other parameters as in `FastPitch2Wave.infer`)
+
+        Yields:
+            (ndarray): Waveform of each text, in input order
+        """
+        defaults = dict(speaker=speaker, pace=pace,
+                        pitch_mul=pitch_mul, pitch_add=pitch_add)
+        ttmel_model = self.model.ttmel_model
+        mel2wave_model = self.model.mel2wave_model
+
+        def frontend(item):
+            params = dict(defaults)
+            if isinstance(item, dict):
+                params.update((k, item[k]) for k in defaults if k in item)
+                item = item['text']
+            text = ttmel_model._vowelize(item, vowelizer=vowelizer)
+            return ttmel_model._text_to_ids(text), params
+
+        def text2mel(item):
+            token_ids, params = item
+            return ttmel_model.infer_ids(token_ids, **params)
+
+        def vocoder(mel_spec):
+            wave_out = mel2wave_model.infer(mel_spec, denoise=denoise)
+            return volume*(wave_out / (np.max(np.abs(wave_out))+1e-5))
+
+        stages = (frontend, text2mel, vocoder)
+        self._stats = {name: {'busy_time': 0., 'items': 0}
+                       for name in self.stage_names}
+        stop = threading.Event()
+        queues = [queue.Queue(self.queue_size) for _ in stages]
+        queues.append(queue.Queue(self.queue_size))
+
+        def put(q, item):
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        def feed():
+            try:
+                for item in texts:
+                    if stop.is_set():
+                        return
+                    put(queues[0], item)
+            except BaseException as exc:
+                put(queues[0], _Failure(exc))
+            put(queues[0], _END)
+
+        def work(fn, name, q_in, q_out):
+            stats = self._stats[name]
+            while not stop.is_set():
+                try:
+                    item = q_in.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is not _END and not isinstance(item, _Failure):
+                    time_start = time.perf_counter()
+                    try:
+                        item = fn(item)
+                    except BaseException as exc:
+                        item = _Failure(exc)
+                    stats['busy_time'] += time.perf_counter() - time_start
+                    stats['items'] += 1
+                put(q_out, item)
+                if item is _END:
+                    return
+
+        threads = [threading.Thread(target=feed, daemon=True)]
+        threads += [threading.Thread(target=work, daemon=True,
+                                     args=(fn, name, queues[i], queues[i+1]))
+                    for i, (fn, name)
+                    in enumerate(zip(stages, self.stage_names))]
+        self._time_start, self._time_end = time.perf_counter(), None
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is _END:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.exc
+                yield item
+        finally:
+            stop.set()
+            self._time_end = time.perf_counter()
+
+    def stats(self) -> Optional[dict]:
+        """
+        Returns:
+            (dict): Per stage `busy_time` (s), `items` and `utilization`
+                (busy time / wall time) of the current or last run, and its
+                `wall_time`
+        """
+        if self._stats is None:
+            return None
+        stats = {name: dict(self._stats[name])
+                 for name in self.stage_names}
+        time_end = self._time_end or time.perf_counter()
+        wall_time = time_end - self._time_start
+        for stage_stats in stats.values():
+            stage_stats['utilization'] = \
+                stage_stats['busy_time'] / wall_time if wall_time else 0.
+        stats['wall_time'] = wall_time
+        return stats
@@ -0,0 +1,184 @@
+"""
+Dynamic INT8 quantization of the Text->Mel and vocoder models.
+
+The quantized variants are registered in `files_dict` with a `source`
+entry (e.g. `fastpitch-int8` from `fastpitch`) and are selectable as
+`model_id`/`vocoder_id`. `get_model_path` builds a missing variant on first
+use; `quantize_models` builds them ahead of time and `quantization_report`
+compares them with the fp32 models.
+"""
+import os
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from ..urls import files_dict
+
+# ONNX ops with dynamically quantized (integer) CPU kernels
+DEFAULT_OP_TYPES = ('MatMul', 'Attention', 'LSTM', 'Conv')
+
+REPORT_SENTENCES = [
+    "اَلسَّلامُ عَلَيكُم يَا صَدِيقِي.",
+    "اَلْقَهْوَةُ مَشْرُوبٌ يُعَدُّ مِنْ بُذُورِ اَلْبُنِّ اَلْمُحَمَّصَةِ.",
+    "ka*alika >ajaAba Ealaa >asy}ilati Alt~alaAmiy*i fiy Alfasli.",
+    "hal tusaAEidunaA fiy fahmi ha*ihi Almas>alati?",
+]
+
+
+def quantized_ids() -> List[str]:
+    """Model ids of all quantized variants in `files_dict`."""
+    return [name for name, entry in files_dict.items() if 'source' in entry]
+
+
+def quantize_model(source_path: str,
+                   output_path: str,
+                   op_types: Sequence[str] = DEFAULT_OP_TYPES,
+                   per_channel: bool = False,
+                   ) -> str:
+    """
+    Create a dynamically quantized (INT8 weights, activations quantized at
+    run time) copy of an ONNX model.
+
+    Parameters:
+        source_path (str): fp32 ONNX model
+        output_path (str): Path of the quantized model
+        op_types (list[str]): ONNX op types to quantize
+        per_channel (bool): Quantize weights per output channel
+
+    Returns:
+        (str): `output_path`
+    """
+    try:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+    except ImportError as exc:
+        raise ImportError(
+            "quantization requires the `onnx` package: "
+            "pip install onnx") from exc
+
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+    quantize_dynamic(source_path, tmp_path,
+                     op_types_to_quantize=list(op_types),
+                     per_channel=per_channel,
+                     weight_type=QuantType.QInt8)
+    os.replace(tmp_path, output_path)
+    return output_path.as_posix()
+
+
+def quantize_models(names: Optional[Sequence[str]] = None,
+                    op_types: Sequence[str] = DEFAULT_OP_TYPES,
+                    per_channel: bool = False,
+                    overwrite: bool = False,
+                    ) -> dict:
+    """
+    Build quantized variants, by default all of them.
+
+    Returns:
+        (dict): Path of each quantized model
+    """
+    from .core import get_model_path
+
+    paths = {}
+    for name in names or quantized_ids():
+        source_path = get_model_path(name=files_dict[name]['source'])
+        output_path = Path(source_path).with_name(
+            Path(files_dict[name]['file']).name)
+        if overwrite or not output_path.exists():
+            quantize_model(source_path, output_path,
+                           op_types=op_types, per_channel=per_channel)
+        paths[name] = output_path.as_posix()
+    return paths
+
+
+def _timed(fn, *args, **kwargs):
+    time_start = time.perf_counter()
+    output = fn(*args, **kwargs)
+    return output, time.perf_counter() - time_start
+
+
+def _distance(a: np.ndarray, b: np.ndarray) -> dict:
+    n = min(a.shape[-1], b.shape[-1])
+    a, b = a[..., :n], b[..., :n]
+    noise = np.sum((a - b)**2)
+    return {
+        'mae': float(np.mean(np.abs(a - b))),
+        'snr_db': float(10*np.log10(np.sum(a**2) / noise)) if noise > 0
+        else float('inf'),
+    }
+
+
+def quantization_report(names: Optional[Sequence[str]] = None,
+                        sentences: Sequence[str] = REPORT_SENTENCES,
+                        cuda: Optional[int] = None,
+                        ) -> dict:
+    """
+    Compare quantized models with their fp32 sources.
+
+    Text->Mel variants are compared on the mel spectrograms of `sentences`
+    (frame count difference, MAE and SNR over the common frames); vocoder
+    variants are compared on the waveforms generated from the same fp32
+    FastPitch mels (MAE and SNR). For both, the report lists the model file
+    sizes and the RTF (synthesis time / audio duration) of fp32 and INT8.
+
+    Returns:
+        (dict): Report entry per quantized model id
+    """
+    from .core import get_model_path, _vocoder_id_to_sr
+    from .tts_models import FastPitch2Mel, HifiGanVocoder, VocosVocoder
+
+    quantize_models(names)
+    reference_mel_model = FastPitch2Mel(get_model_path(name='fastpitch'),
+                                        cuda=cuda)
+    reference_mels = [reference_mel_model.infer(text) for text in sentences]
+
+    report = {}
+    for name in names or quantized_ids():
+        source = files_dict[name]['source']
+        paths = {'fp32': get_model_path(name=source),
+                 'int8': get_model_path(name=name)}
+        entry = {
+            'source': source,
+            'size_mb': {k: os.path.getsize(p) / 2**20
+                        for k, p in paths.items()},
+        }
+        sr = _vocoder_id_to_sr.get(source, 22050)
+
+        if source in ('fastpitch', 'mixer128', 'mixer80'):
+            models = {k: FastPitch2Mel(p, cuda=cuda)
+                      for k, p in paths.items()}
+            for model in models.values():
+                model.infer(sentences[0])  # warm-up
+            outputs = {k: [_timed(m.infer, text) for text in sentences]
+                       for k, m in models.items()}
+            # durations are predicted, so count frames as audio length
+            n_frames = sum(mel.shape[-1] for mel, _ in outputs['fp32'])
+            audio_time = n_frames*256 / 22050
+        else:
+            denoiser_path = get_model_path(name='denoiser')
+            models = {k: HifiGanVocoder(p, denoiser_path, cuda=cuda)
+                      if source == 'hifigan' else VocosVocoder(p, cuda=cuda)
+                      for k, p in paths.items()}
+            for model in models.values():
+                model.infer(reference_mels[0])  # warm-up
+            outputs = {k: [_timed(m.infer, mel) for mel in reference_mels]
+                       for k, m in models.items()}
+            audio_time = sum(len(wave) for wave, _ in outputs['fp32']) / sr
+
+        distances = []
+        for (ref, _), (out, _) in zip(outputs['fp32'], outputs['int8']):
+            distance = _distance(ref, out)
+            distance['length_diff'] = int(out.shape[-1] - ref.shape[-1])
+            distances.append(distance)
+        entry['rtf'] = {k: sum(t for _, t in v) / audio_time
+                        for k, v in outputs.items()}
+        entry['speedup'] = entry['rtf']['fp32'] / entry['rtf']['int8']
+        entry['distance'] = {
+            'mae': float(np.mean([d['mae'] for d in distances])),
+            'snr_db': float(np.mean([d['snr_db'] for d in distances])),
+            'max_length_diff': max(abs(d['length_diff'])
+                                   for d in distances),
+        }
+        report[name] = entry
+    return report
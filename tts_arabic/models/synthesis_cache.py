@@ -0,0 +1,237 @@
+"""
+Content-addressed cache of synthesized mel spectrograms and waveforms.
+
+`tts` looks up a waveform by a hash of everything that determines it: the
+whitespace-normalized text, speaker, pace, pitch_mul, pitch_add, vowelizer,
+denoise, vocoder chunking, the Text->Mel, vocoder (and denoiser) ids
+with their `files_dict` timestamps (or synthetic preset), and the
+pronunciation lexicons and overrides in use (`text.lexicon.fingerprint`).
+Mel spectrograms are stored under a key without the vocoder fields, so
+that a change of vocoder or denoise strength only re-runs the vocoder.
+Waveforms are stored normalized to a peak of 1, and `volume` is applied on
+the way out.
+
+Entries live in an in-memory LRU and, optionally, in a size-capped sqlite
+file shared by concurrent processes (least recently used entries are
+evicted first). The environment variable `TTS_ARABIC_SYNTHESIS_CACHE`
+enables both tiers in every process.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, Literal, Optional, Tuple, Union
+
+import numpy as np
+
+from ..utils.cache import DiskCache, LRUCache
+from ..utils.model_store import model_version
+
+_STORE = Literal['wave', 'mel', 'both']
+
+
+def _timestamp(name: Optional[str]) -> Optional[Union[float, str]]:
+    return model_version(name)
+
+
+def normalize_text(text: str) -> str:
+    return ' '.join(text.split())
+
+
+class SynthesisCache:
+    """
+    Two-tier store of mel spectrograms and waveforms.
+
+    Args:
+        path (str): Optional; sqlite file of the on-disk tier
+        maxsize (int): Optional; Max number of in-memory entries
+        max_bytes (int): Optional; Size limit of the on-disk tier
+        store [wave|mel|both]: Optional; What to keep
+        mel_dtype (str): Optional; dtype mels are stored in, e.g. `float16`
+            to halve their size (lossy)
+    """
+
+    def __init__(self,
+                 path: Optional[Union[str, Path]] = None,
+                 maxsize: Optional[int] = 256,
+                 max_bytes: Optional[int] = 2*2**30,
+                 store: _STORE = 'both',
+                 mel_dtype: str = 'float32',
+                 ) -> None:
+        if store not in ('wave', 'mel', 'both'):
+            raise ValueError(f"store must be 'wave', 'mel' or 'both', "
+                             f"got {store!r}")
+        self.store = store
+        self.mel_dtype = np.dtype(mel_dtype)
+        self.memory = LRUCache(maxsize=maxsize)
+        self.disk = DiskCache(path, max_bytes=max_bytes) \
+            if path is not None else None
+
+    @staticmethod
+    def mel_key(text: str,
+                speaker: int,
+                pace: float,
+                pitch_mul: float,
+                pitch_add: float,
+                vowelizer: Optional[str],
+                model_id: str,
+                ) -> str:
+        from ..text.lexicon import fingerprint
+        fields = ['mel', normalize_text(text), int(speaker), float(pace),
+                  float(pitch_mul), float(pitch_add), vowelizer,
+                  _timestamp(vowelizer), model_id, _timestamp(model_id),
+                  fingerprint()]
+        return hashlib.sha256(json.dumps(fields).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def wave_key(mel_key: str,
+                 vocoder_id: str,
+                 denoise: float,
+                 vocoder_chunk_size: Optional[int],
+                 denoiser_id: Optional[str],
+                 ) -> str:
+        fields = ['wave', mel_key, vocoder_id, _timestamp(vocoder_id),
+                  float(denoise), vocoder_chunk_size, denoiser_id,
+                  _timestamp(denoiser_id)]
+        return hashlib.sha256(json.dumps(fields).encode('utf-8')).hexdigest()
+
+    def get_mel(self, key: str) -> Optional[np.ndarray]:
+        if self.store == 'wave':
+            return None
+        mel_spec = self._get(key)
+        return mel_spec.astype(np.float32) if mel_spec is not None else None
+
+    def put_mel(self, key: str, mel_spec: np.ndarray) -> None:
+        if self.store != 'wave':
+            self._put(key, mel_spec.astype(self.mel_dtype))
+
+    def get_wave(self, key: str) -> Optional[np.ndarray]:
+        return self._get(key) if self.store != 'mel' else None
+
+    def put_wave(self, key: str, wave: np.ndarray) -> None:
+        if self.store != 'mel':
+            self._put(key, wave)
+
+    def clear(self, disk: bool = False) -> None:
+        self.memory.clear()
+        if disk and self.disk is not None:
+            self.disk.clear()
+
+    def info(self) -> dict:
+        return {'memory': self.memory.info(),
+                'disk': self.disk.info() if self.disk is not None else None}
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+
+    def _get(self, key):
+        array = self.memory.get(key)
+        if array is None and self.disk is not None:
+            data = self.disk.get(key)
+            if data is not None:
+                array = np.load(io.BytesIO(data), allow_pickle=False)
+                self.memory.put(key, array)
+        return array
+
+    def _put(self, key, array):
+        self.memory.put(key, array)
+        if self.disk is not None:
+            buffer = io.BytesIO()
+            np.save(buffer, array, allow_pickle=False)
+            self.disk.put(key, buffer.getvalue())
+
+
+_lock = threading.Lock()
+_cache = None
+_env_loaded = False
+
+
+def set_synthesis_cache(path: Optional[Union[str, Path]] = None,
+                        maxsize: Optional[int] = 256,
+                        max_bytes: Optional[int] = 2*2**30,
+                        store: _STORE = 'both',
+                        mel_dtype: str = 'float32',
+                        ) -> SynthesisCache:
+    """
+    Enable the synthesis cache used by `tts` (see `SynthesisCache` for the
+    parameters).
+    """
+    global _cache, _env_loaded
+    cache = SynthesisCache(path, maxsize=maxsize, max_bytes=max_bytes,
+                           store=store, mel_dtype=mel_dtype)
+    with _lock:
+        _env_loaded = True
+        if _cache is not None:
+            _cache.close()
+        _cache = cache
+    return cache
+
+
+def disable_synthesis_cache() -> None:
+    global _cache, _env_loaded
+    with _lock:
+        _env_loaded = True
+        if _cache is not None:
+            _cache.close()
+        _cache = None
+
+
+def get_synthesis_cache() -> Optional[SynthesisCache]:
+    global _env_loaded
+    if not _env_loaded:
+        path = os.environ.get('TTS_ARABIC_SYNTHESIS_CACHE')
+        if path:
+            set_synthesis_cache(path)
+        _env_loaded = True
+    return _cache
+
+
+def clear_synthesis_cache(disk: bool = False) -> None:
+    """Empty the in-memory tier, and the on-disk tier if `disk`."""
+    if _cache is not None:
+        _cache.clear(disk=disk)
+
+
+def synthesis_cache_info() -> Optional[dict]:
+    """
+    Returns:
+        (dict): `memory` and `disk` tier counters (hits, misses, hit_rate,
+            size, ...), or None if the cache is disabled
+    """
+    return _cache.info() if _cache is not None else None
+
+
+def read_prompts(path: Union[str, Path]) -> Tuple[str, ...]:
+    """Prompts of a text file, one per line (empty lines are skipped)."""
+    with open(path, encoding='utf-8') as f:
+        return tuple(line.strip() for line in f if line.strip())
+
+
+def warm_synthesis_cache(prompts: Union[str, Path, Iterable[str]],
+                         **tts_kwargs) -> int:
+    """
+    Synthesize prompts ahead of time so that later `tts` calls with the
+    same arguments are served from the cache.
+
+    Parameters:
+        prompts (str|list[str]): Texts, or the path of a prompt file with
+            one text per line
+        tts_kwargs: Arguments passed on to `tts` (speaker, model_id, ...)
+
+    Returns:
+        (int): Number of prompts
+    """
+    from .core import tts
+    if get_synthesis_cache() is None:
+        raise ValueError("the synthesis cache is not enabled "
+                         "(see set_synthesis_cache)")
+    if isinstance(prompts, (str, Path)):
+        prompts = read_prompts(prompts)
+    n = 0
+    for prompt in prompts:
+        tts(prompt, **tts_kwargs)
+        n += 1
+    return n
@@ -0,0 +1,346 @@
+"""
+Synthetic stand-in models: small random-weight ONNX graphs with the input
+and output names, dtypes and shapes that the model classes expect, so that
+the whole pipeline (batching, streaming, the server, benchmarks) can run
+without the released models, e.g. on air-gapped CI machines.
+
+Graphs per `files_dict` entry:
+
+    fastpitch, mixer128, mixer80   token_ids [B, T] int64, pace [B] float,
+        speaker [B] int32, pitch_mul [B] float, pitch_add [B] float
+        -> mel_spec [B, 80, T*frames_per_token] (padded tokens give
+        constant frames, like the real models)
+    hifigan    input [B, 80, F] -> [B, 1, F*256]
+    vocos, vocos44    mel_spec [B, 80, F], denoise [1] float
+        -> [B, F*hop] (hop 256 and 512)
+    denoiser   audio [B, N] float, strength [1] double -> [B, N]
+    shakkelha, shakkala    input [B, T] int64 -> [B, T, n_classes]
+    catt_eo    in_token_ids [B, T] int64 -> [B, T, n_classes]
+
+The vowelizers predict (nearly) always fatha, so their outputs are valid
+input for the phonetiser. The cost of each graph is set by presets: `tiny`
+runs in milliseconds; `realistic` roughly follows the released models in
+layer types and sizes (an FFN stack for FastPitch/MixerTTS and CATT, a
+transposed-convolution upsampler for HiFi-GAN, a frame-rate stack with a
+linear output for Vocos, bidirectional LSTMs for Shakkala/Shakkelha). They
+approximate the released models; they do not replace measuring them.
+
+Requires the `onnx` package. With `model_store.set_synthetic('tiny')` or
+`TTS_ARABIC_SYNTHETIC=tiny`, the model store generates these graphs instead
+of downloading models (see `utils.model_store`).
+"""
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from ..urls import files_dict
+
+N_MELS = 80
+
+PRESETS = {
+    'tiny': {
+        'fastpitch': dict(dim=32, ff=64, enc_layers=1, dec_layers=1),
+        'mixer128': dict(dim=32, ff=64, enc_layers=1, dec_layers=1),
+        'mixer80': dict(dim=32, ff=64, enc_layers=1, dec_layers=1),
+        'hifigan': dict(channels=32, upsample_rates=(16, 16), res_layers=0),
+        'vocos': dict(channels=32, layers=1, hop=256),
+        'vocos44': dict(channels=32, layers=1, hop=512),
+        'denoiser': dict(channels=2, kernel=15),
+        'shakkelha': dict(dim=16, layers=1, lstm=True),
+        'shakkala': dict(dim=16, layers=1, lstm=True),
+        'catt_eo': dict(dim=16, ff=32, layers=1),
+    },
+    'realistic': {
+        'fastpitch': dict(dim=384, ff=1536, enc_layers=6, dec_layers=6),
+        'mixer128': dict(dim=128, ff=512, enc_layers=6, dec_layers=6),
+        'mixer80': dict(dim=80, ff=320, enc_layers=6, dec_layers=6),
+        'hifigan': dict(channels=512, upsample_rates=(8, 8, 2, 2),
+                        res_layers=6),
+        'vocos': dict(channels=512, layers=8, hop=256),
+        'vocos44': dict(channels=512, layers=8, hop=512),
+        'denoiser': dict(channels=4, kernel=31),
+        'shakkelha': dict(dim=64, layers=3, lstm=True),
+        'shakkala': dict(dim=64, layers=3, lstm=True),
+        'catt_eo': dict(dim=512, ff=2048, layers=6),
+    },
+}
+
+
+class _GraphBuilder:
+    """Collects nodes and random initializers of one ONNX graph."""
+
+    def __init__(self, seed: int = 0) -> None:
+        from onnx import helper
+        self.helper = helper
+        self.rng = np.random.default_rng(seed)
+        self.nodes, self.initializers = [], []
+        self._n = 0
+
+    def name(self, prefix: str) -> str:
+        self._n += 1
+        return f"{prefix}_{self._n}"
+
+    def const(self, array: np.ndarray, prefix: str = 'c') -> str:
+        from onnx import numpy_helper
+        name = self.name(prefix)
+        self.initializers.append(numpy_helper.from_array(array, name))
+        return name
+
+    def weight(self, *shape: int, fan_in: Optional[int] = None) -> str:
+        fan_in = fan_in or shape[0]
+        return self.const((self.rng.normal(size=shape) / np.sqrt(fan_in)
+                           ).astype(np.float32), 'w')
+
+    def op(self, op_type: str, *inputs: str, **attrs) -> str:
+        output = self.name(op_type.lower())
+        self.nodes.append(self.helper.make_node(op_type, list(inputs),
+                                                [output], **attrs))
+        return output
+
+    def ffn(self, x: str, dim: int, ff: int, layers: int) -> str:
+        """Residual MLP blocks on the last axis."""
+        for _ in range(layers):
+            h = self.op('Relu', self.op('MatMul', x, self.weight(dim, ff)))
+            h = self.op('MatMul', h, self.weight(ff, dim))
+            x = self.op('Add', x, self.op('Mul', h, self.const(
+                np.array(.5, np.float32))))
+        return x
+
+    def conv(self, x: str, c_in: int, c_out: int, kernel: int) -> str:
+        return self.op('Conv', x,
+                       self.weight(c_out, c_in, kernel, fan_in=c_in*kernel),
+                       kernel_shape=[kernel], pads=[kernel//2, kernel//2])
+
+    def model(self, inputs, outputs):
+        from onnx import TensorProto
+        helper = self.helper
+
+        def value_info(name, dtype, shape):
+            return helper.make_tensor_value_info(
+                name, getattr(TensorProto, dtype), shape)
+
+        graph = helper.make_graph(
+            self.nodes, 'synthetic',
+            [value_info(*spec) for spec in inputs],
+            [value_info(*spec) for spec in outputs],
+            self.initializers)
+        model = helper.make_model(
+            graph, opset_imports=[helper.make_opsetid('', 17)],
+            producer_name='tts_arabic.synthetic')
+        model.ir_version = 8
+        return model
+
+
+def _text_to_mel(g, n_symbols, dim, ff, enc_layers, dec_layers,
+                 frames_per_token=5, n_speakers=4):
+    # token encoder
+    x = g.op('Gather', g.weight(n_symbols, dim, fan_in=1), 'token_ids')
+    speaker_emb = g.op('Gather', g.weight(n_speakers, dim, fan_in=1),
+                       'speaker')
+    x = g.op('Add', x, g.op('Unsqueeze', speaker_emb,
+                            g.const(np.array([1], np.int64))))
+    x = g.ffn(x, dim, ff, enc_layers)
+    mask = g.op('Cast', g.op('Not', g.op('Equal', 'token_ids',
+                                         g.const(np.array(0, np.int64)))),
+                to=1)
+
+    # fixed-length upsampling ([B, T, C] -> [B, T*frames_per_token, C])
+    def upsample(t, channels):
+        t = g.op('Unsqueeze', t, g.const(np.array([2], np.int64)))
+        t = g.op('Tile', t, g.const(np.array([1, 1, frames_per_token, 1],
+                                             np.int64)))
+        return g.op('Reshape', t, g.const(np.array([0, -1, channels],
+                                                   np.int64)))
+
+    frames = upsample(x, dim)
+    frame_mask = upsample(g.op('Unsqueeze', mask,
+                               g.const(np.array([2], np.int64))), 1)
+    # frame position, so that consecutive frames differ
+    position = g.op('CumSum', frame_mask, g.const(np.array(1, np.int64)))
+    frames = g.op('Add', frames, g.op('Mul', position,
+                                      g.const(np.array(.01, np.float32))))
+
+    # frame decoder
+    frames = g.ffn(frames, dim, ff, dec_layers)
+    mel = g.op('MatMul', frames, g.weight(dim, N_MELS))
+    mel = g.op('Add', mel, g.const(np.array(-5., np.float32)))
+    mel = g.op('Mul', mel, g.op('Reshape', 'pitch_mul',
+                                g.const(np.array([-1, 1, 1], np.int64))))
+    # padded tokens give constant frames (`pitch_add`)
+    mel = g.op('Add', g.op('Mul', mel, frame_mask),
+               g.op('Reshape', 'pitch_add',
+                    g.const(np.array([-1, 1, 1], np.int64))))
+    g.nodes.append(g.helper.make_node('Transpose', [mel], ['mel_spec'],
+                                      perm=[0, 2, 1]))
+    return g.model(
+        [('token_ids', 'INT64', ['batch', 'tokens']),
+         ('pace', 'FLOAT', ['batch']),
+         ('speaker', 'INT32', ['batch']),
+         ('pitch_mul', 'FLOAT', ['batch']),
+         ('pitch_add', 'FLOAT', ['batch'])],
+        [('mel_spec', 'FLOAT', ['batch', N_MELS, 'frames'])])
+
+
+def _hifigan(g, channels, upsample_rates, res_layers):
+    x = g.conv('input', N_MELS, channels, 7)
+    for rate in upsample_rates:
+        c_out = max(channels // 2, 1)
+        x = g.op('LeakyRelu', x, alpha=.1)
+        x = g.op('ConvTranspose', x,
+                 g.weight(channels, c_out, rate, fan_in=channels),
+                 kernel_shape=[rate], strides=[rate])
+        channels = c_out
+        for _ in range(res_layers):
+            h = g.conv(g.op('LeakyRelu', x, alpha=.1), channels, channels, 7)
+            x = g.op('Add', x, h)
+    x = g.conv(g.op('LeakyRelu', x, alpha=.1), channels, 1, 7)
+    g.nodes.append(g.helper.make_node('Tanh', [x], ['output']))
+    return g.model([('input', 'FLOAT', ['batch', N_MELS, 'frames'])],
+                   [('output', 'FLOAT', ['batch', 1, 'samples'])])
+
+
+def _vocos(g, channels, layers, hop):
+    x = g.conv('mel_spec', N_MELS, channels, 7)
+    for _ in range(layers):
+        h = g.conv(g.op('Relu', x), channels, channels, 7)
+        x = g.op('Add', x, h)
+    # linear "inverse STFT": one frame of `hop` samples per mel frame
+    x = g.op('Transpose', x, perm=[0, 2, 1])
+    wave = g.op('Tanh', g.op('MatMul', x, g.weight(channels, hop)))
+    wave = g.op('Reshape', wave, g.const(np.array([0, -1], np.int64)))
+    g.nodes.append(g.helper.make_node(
+        'Mul', [wave, g.op('Sub', g.const(np.array([1.], np.float32)),
+                           'denoise')], ['wave']))
+    return g.model([('mel_spec', 'FLOAT', ['batch', N_MELS, 'frames']),
+                    ('denoise', 'FLOAT', [1])],
+                   [('wave', 'FLOAT', ['batch', 'samples'])])
+
+
+def _denoiser(g, channels, kernel):
+    x = g.op('Unsqueeze', 'audio', g.const(np.array([1], np.int64)))
+    noise = g.conv(g.op('Relu', g.conv(x, 1, channels, kernel)),
+                   channels, 1, kernel)
+    noise = g.op('Squeeze', noise, g.const(np.array([1], np.int64)))
+    strength = g.op('Cast', 'strength', to=1)
+    g.nodes.append(g.helper.make_node(
+        'Sub', ['audio', g.op('Mul', noise, strength)], ['audio_out']))
+    return g.model([('audio', 'FLOAT', ['batch', 'samples']),
+                    ('strength', 'DOUBLE', [1])],
+                   [('audio_out', 'FLOAT', ['batch', 'samples'])])
+
+
+def _tagger(g, input_name, n_symbols, n_classes, target_class, dim,
+            layers, ff=None, lstm=False):
+    x = g.op('Gather', g.weight(n_symbols, dim, fan_in=1), input_name)
+    if lstm:
+        for _ in range(layers):
+            # [B, T, C] -> [T, B, C] -> BiLSTM -> [B, T, 2*dim] -> [B, T, dim]
+            seq = g.op('Transpose', x, perm=[1, 0, 2])
+            y = g.op('LSTM', seq, g.weight(2, 4*dim, dim, fan_in=dim),
+                     g.weight(2, 4*dim, dim, fan_in=dim),
+                     direction='bidirectional', hidden_size=dim)
+            y = g.op('Reshape', g.op('Transpose', y, perm=[2, 0, 1, 3]),
+                     g.const(np.array([0, 0, -1], np.int64)))
+            x = g.op('MatMul', y, g.weight(2*dim, dim))
+    else:
+        x = g.ffn(x, dim, ff or 2*dim, layers)
+    logits = g.op('Mul', g.op('MatMul', x, g.weight(dim, n_classes)),
+                  g.const(np.array(.01, np.float32)))
+    bias = np.zeros(n_classes, np.float32)
+    bias[target_class] = 10.
+    g.nodes.append(g.helper.make_node(
+        'Softmax', [g.op('Add', logits, g.const(bias))], ['probs'],
+        axis=-1))
+    return g.model([(input_name, 'INT64', ['batch', 'length'])],
+                   [('probs', 'FLOAT', ['batch', 'length', n_classes])])
+
+
+def build_model(name: str,
+                preset: str = 'tiny',
+                seed: int = 0,
+                **overrides):
+    """
+    Build the synthetic graph of a `files_dict` entry.
+
+    Parameters:
+        name (str): `files_dict` name, e.g. `fastpitch` or `hifigan`
+        preset [tiny|realistic]: Cost preset, see `PRESETS`
+        seed (int): Seed of the random weights
+        overrides: Preset parameters to change, e.g. `dim=256`
+
+    Returns:
+        (onnx.ModelProto): Model
+    """
+    try:
+        import onnx  # noqa: F401
+    except ImportError as exc:
+        raise ImportError(
+            "synthetic models require the `onnx` package: "
+            "pip install onnx") from exc
+    if name not in PRESETS[preset]:
+        raise ValueError(f"no synthetic graph for {name!r}")
+    params = dict(PRESETS[preset][name], **overrides)
+    g = _GraphBuilder(seed)
+
+    if name in ('fastpitch', 'mixer128', 'mixer80'):
+        from ..text import symbols
+        params.setdefault('n_speakers', files_dict[name]['n_speakers'])
+        return _text_to_mel(g, len(symbols), **params)
+    if name == 'hifigan':
+        return _hifigan(g, **params)
+    if name in ('vocos', 'vocos44'):
+        return _vocos(g, **params)
+    if name == 'denoiser':
+        return _denoiser(g, **params)
+    if name == 'shakkelha':
+        from ..vocalizer.models.shakkelha import CHARACTERS_MAPPING
+        return _tagger(g, 'input', max(CHARACTERS_MAPPING.values()) + 1,
+                       19, target_class=1, **params)
+    if name == 'shakkala':
+        from ..vocalizer.models.shakkala.symbols import (
+            input_vocab_to_int, output_int_to_vocab)
+        return _tagger(g, 'input', max(input_vocab_to_int.values()) + 1,
+                       len(output_int_to_vocab), target_class=5, **params)
+    if name == 'catt_eo':
+        from ..vocalizer.models.catt.tashkeel_tokenizer_mod import (
+            TashkeelTokenizer)
+        tokenizer = TashkeelTokenizer()
+        return _tagger(g, 'in_token_ids',
+                       max(tokenizer.letters_map.values()) + 1,
+                       len(tokenizer.tashkeel_map),
+                       target_class=tokenizer.tashkeel_map['a'], **params)
+
+
+def write_model(name: str,
+                path: Union[str, Path],
+                preset: str = 'tiny',
+                **overrides) -> str:
+    """Write the synthetic graph of `name` (see `build_model`) to `path`."""
+    import onnx
+    model = build_model(name, preset=preset, **overrides)
+    onnx.checker.check_model(model)
+    onnx.save(model, Path(path).as_posix())
+    return Path(path).as_posix()
+
+
+def write_models(root: Union[str, Path],
+                 names: Optional[Sequence[str]] = None,
+                 preset: str = 'tiny',
+                 ) -> Dict[str, str]:
+    """
+    Write synthetic graphs to their `files_dict` paths under `root`, by
+    default for all models that are not derived from another one.
+
+    Returns:
+        (dict): Path per name
+    """
+    if names is None:
+        names = [name for name, entry in files_dict.items()
+                 if 'source' not in entry]
+    paths = {}
+    for name in names:
+        path = Path(root).joinpath(files_dict[name]['file'])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        paths[name] = write_model(name, path, preset=preset)
+    return paths
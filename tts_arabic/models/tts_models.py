@@ -1,14 +1,151 @@
 import numpy as np
-import onnxruntime as ort
+from typing import Callable, Iterator, List, Optional, Sequence, Union
 
-from . import text as text_utils, _VOWELIZER
+from .. import text as text_utils
+from . import _VOWELIZER
 from ..vocalizer.models.core import vocalize
+from ..utils.sessions import WarmupMixin, create_session
+
+# log(1e-5): value of a silent frame in the HiFi-GAN mel representation
+MEL_PAD_VALUE = -11.5129
+# max. absolute difference between chunked and one-shot vocoder output
+# (for peak normalized waveforms) with the default chunking parameters
+CHUNKED_VOCODER_ATOL = 1e-3
+# token and mel frame counts run by `warmup`: a short phrase, a typical
+# sentence and a long sentence
+WARMUP_TOKEN_LENGTHS = (16, 64, 160)
+WARMUP_MEL_LENGTHS = (64, 256, 640)
+_WARMUP_TEXT = "اَلسَّلامُ عَلَيكُم يَا صَدِيقِي، كَيفَ حَالُكَ اَليَوم؟"
+
+
+def _broadcast(value: Union[float, Sequence[float]],
+               n: int,
+               dtype: type
+               ) -> np.ndarray:
+    """Expand a per-batch scalar or a per-item sequence to shape [n]."""
+    if np.ndim(value) == 0:
+        return np.full((n,), value, dtype=dtype)
+    value = np.asarray(value, dtype=dtype)
+    if value.shape != (n,):
+        raise ValueError(f"expected {n} values, got {value.shape}")
+    return value
+
+
+def _pad_batch(seqs: List[np.ndarray], pad_value: float = 0) -> np.ndarray:
+    """Right-pad arrays along their last axis and stack them."""
+    max_len = max(seq.shape[-1] for seq in seqs)
+    batch = np.full((len(seqs),) + seqs[0].shape[:-1] + (max_len,),
+                    pad_value, dtype=seqs[0].dtype)
+    for i, seq in enumerate(seqs):
+        batch[i, ..., :seq.shape[-1]] = seq
+    return batch
+
+
+def _hop_length(n_samples: int, n_frames: int) -> int:
+    """Vocoder hop length (a power of two) from input and output sizes."""
+    return 2**int(round(np.log2(n_samples / n_frames)))
+
+
+def _vocode_chunked(vocode: Callable[[np.ndarray], np.ndarray],
+                    mel_spec: np.ndarray,
+                    chunk_size: int = 256,
+                    context: int = 32,
+                    crossfade: int = 4,
+                    ) -> Iterator[np.ndarray]:
+    """
+    Vocode a mel spectrogram in fixed-size windows and yield the waveform
+    chunk by chunk.
+
+    Each chunk of `chunk_size` frames is vocoded together with `context`
+    frames on both sides, so that the vocoder sees (close to) the same
+    receptive field as in a one-shot call; the context is cut off again and
+    consecutive chunks are joined with a linear crossfade over `crossfade`
+    frames (`crossfade*hop_length` samples). Peak memory depends on
+    `chunk_size + 2*context + crossfade` instead of the utterance length.
+
+    With `context` covering the receptive field of the vocoder, the
+    concatenated chunks match the one-shot output to within
+    `CHUNKED_VOCODER_ATOL`; benchmarks/bench_chunked_vocoder.py checks this
+    for the available vocoders.
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    if context < 0 or crossfade < 0:
+        raise ValueError("context and crossfade must not be negative")
+    # validated above, on the call, rather than on the first chunk
+    return _iter_chunks(vocode, mel_spec, chunk_size, context, crossfade)
+
+
+def _iter_chunks(vocode, mel_spec, chunk_size, context, crossfade):
+    n_frames = mel_spec.shape[-1]
+    tail = None
+    for start in range(0, n_frames, chunk_size):
+        end = min(start + chunk_size, n_frames)
+        out_end = min(end + crossfade, n_frames)
+        win_start = max(0, start - context)
+        win_end = min(n_frames, out_end + context)
+
+        wave = vocode(mel_spec[:, win_start:win_end])
+        hop_length = _hop_length(len(wave), win_end - win_start)
+        wave = wave[(start - win_start)*hop_length:
+                    (out_end - win_start)*hop_length]
+
+        if tail is not None:
+            fade_in = np.linspace(0, 1, len(tail) + 2)[1:-1]
+            wave[:len(tail)] = tail*(1 - fade_in) + wave[:len(tail)]*fade_in
+        if out_end > end:
+            # the overlap with the next chunk is emitted after crossfading
+            tail = wave[(end - start)*hop_length:]
+            wave = wave[:(end - start)*hop_length]
+        yield wave
+
+
+def _warmup_mels(ort_sess, n_frames: int, batch_size: int
+                 ) -> List[np.ndarray]:
+    n_mels = ort_sess.get_inputs()[0].shape[1]
+    if not isinstance(n_mels, int):
+        n_mels = 80
+    rng = np.random.default_rng(0)
+    return [rng.normal(-6., 2., (n_mels, n_frames)).astype(np.float32)
+            for _ in range(batch_size)]
+
+
+def _mel_lengths(mel_batch: np.ndarray) -> List[int]:
+    """
+    Recover the number of valid frames of each mel in a padded batch.
+
+    The exported Text->Mel graphs return neither durations nor mel lengths,
+    so the lengths are inferred from the output: frames generated for
+    padding come from masked (all-zero) decoder states and are therefore
+    bit-identical, and a trailing run of more than one identical frame is
+    treated as padding. Consequences:
+
+    - an item with exactly one padding frame keeps it (one frame, ~11ms at
+      22.05kHz);
+    - trailing real frames that happen to be bit-identical (unlikely for
+      decoder outputs, even in silence) would be trimmed as padding;
+    - a graph whose padding frames are not constant is not trimmed.
+
+    Items of a batch of one are not padded and bypass this.
+    """
+    n_frames = mel_batch.shape[-1]
+    lengths = []
+    for mel in mel_batch:
+        differs = np.flatnonzero(np.any(mel != mel[:, -1:], axis=0))
+        run = n_frames - (differs[-1] + 1) if len(differs) else 1
+        lengths.append(n_frames if run <= 1 else int(n_frames - run))
+    return lengths
+
+class FastPitch2Mel(WarmupMixin):
+    # utterance lengths, in tokens
+    warmup_sizes = WARMUP_TOKEN_LENGTHS
 
-class FastPitch2Mel:
     def __init__(self, 
                  sd_path: str = "data/fp_ms.onnx",
                  arabic_in: bool = True,
-                 cuda: int = None) -> None:
+                 cuda: int = None,
+                 optimize: Optional[bool] = None,
+                 n_speakers: Optional[int] = None) -> None:
         providers = ['CPUExecutionProvider']
         if cuda is not None:           
             if not isinstance(cuda, int): cuda = 0
@@ -16,9 +153,11 @@ class FastPitch2Mel:
                 'device_id': cuda,
                 # "cudnn_conv_algo_search": "DEFAULT",
             }))
-        self.ort_sess = ort.InferenceSession(
-            sd_path, providers=providers)
+        self.ort_sess = create_session(
+            sd_path, providers, optimize=optimize)
         self.arabic_in = arabic_in
+        # number of speaker ids, None if unknown (see `files_dict`)
+        self.n_speakers = n_speakers
         
     def _vowelize(self,
                   utterance: str, 
@@ -40,8 +179,93 @@ class FastPitch2Mel:
         return text_utils.tokens_to_ids(tokens)
     
     def _text_to_ids(self, text):
-        tokens = self._tokenize(text)
-        return self._tokens_to_ids(tokens)        
+        if self.arabic_in:
+            return text_utils.arabic_to_ids(text)
+        return text_utils.buckwalter_to_ids(text)
+
+    def _supports_batching(self) -> bool:
+        batch_dim = self.ort_sess.get_inputs()[0].shape[0]
+        return not (isinstance(batch_dim, int) and batch_dim == 1)
+
+    def _warmup_step(self, n_tokens, batch_size):
+        ids = text_utils.arabic_to_ids(_WARMUP_TEXT)
+        self.infer_ids_batch([np.resize(ids, n_tokens)]*batch_size)
+
+    def infer_ids_batch(self,
+                        ids_list: List[List[int]],
+                        paces: Union[float, Sequence[float]] = 1.,
+                        speakers: Union[int, Sequence[int]] = 0,
+                        pitch_muls: Union[float, Sequence[float]] = 1.,
+                        pitch_adds: Union[float, Sequence[float]] = 0.,
+                        ) -> List[np.ndarray]:
+        """
+        Parameters:
+            ids_list (list[ndarray|list[int]]): Token ids of each utterance
+            paces (float|list[float]): Speaker pace, shared or per utterance
+            speakers (int|list[int]): Speaker id, shared or per utterance
+            pitch_muls (float|list[float]): Pitch multiplier
+            pitch_adds (float|list[float]): Pitch offset
+
+        Returns:
+            (list[ndarray]): Mel spectrograms, shape: [mel_bands, n_frames]
+        """
+        n = len(ids_list)
+        paces = _broadcast(paces, n, np.float32)
+        speakers = _broadcast(speakers, n, np.int32)
+        pitch_muls = _broadcast(pitch_muls, n, np.float32)
+        pitch_adds = _broadcast(pitch_adds, n, np.float32)
+
+        if not self._supports_batching():
+            # graph was exported with a fixed batch size of 1
+            return [self._run(np.asarray(ids, dtype=np.int64)[None],
+                              paces[i:i+1], speakers[i:i+1],
+                              pitch_muls[i:i+1], pitch_adds[i:i+1])[0]
+                    for i, ids in enumerate(ids_list)]
+
+        ids_batch = _pad_batch([np.asarray(ids, dtype=np.int64)
+                                for ids in ids_list])
+        mel_batch = self._run(ids_batch, paces, speakers,
+                              pitch_muls, pitch_adds)
+        if n == 1:
+            return [mel_batch[0]]
+        return [mel[:, :length] for mel, length
+                in zip(mel_batch, _mel_lengths(mel_batch))]
+
+    def infer_batch(self,
+                    texts: List[str],
+                    paces: Union[float, Sequence[float]] = 1.,
+                    speakers: Union[int, Sequence[int]] = 0,
+                    vowelizer: _VOWELIZER = None,
+                    pitch_muls: Union[float, Sequence[float]] = 1.,
+                    pitch_adds: Union[float, Sequence[float]] = 0.,
+                    ) -> List[np.ndarray]:
+        """
+        Parameters:
+            texts (list[str]): Texts, synthesized in a single ONNX call
+            paces (float|list[float]): Speaker pace, shared or per text
+            speakers (int|list[int]): Speaker id, shared or per text
+            vowelizer [catt_eo|shakkala|shakkelha]: Optional; Vowelizer model
+            pitch_muls (float|list[float]): Pitch multiplier
+            pitch_adds (float|list[float]): Pitch offset
+
+        Returns:
+            (list[ndarray]): Mel spectrograms, shape: [mel_bands, n_frames]
+        """
+        ids_list = [self._text_to_ids(self._vowelize(text, vowelizer))
+                    for text in texts]
+        return self.infer_ids_batch(ids_list, paces=paces, speakers=speakers,
+                                    pitch_muls=pitch_muls,
+                                    pitch_adds=pitch_adds)
+
+    def _run(self, ids_batch, paces, speakers, pitch_muls, pitch_adds):
+        return self.ort_sess.run(
+            None, {
+                "token_ids": ids_batch,
+                "pace": paces,
+                "speaker": speakers,
+                "pitch_mul": pitch_muls,
+                "pitch_add": pitch_adds,
+            },)[0].astype(np.float32)
 
     def infer(self, 
               text: str, 
@@ -77,27 +301,52 @@ class FastPitch2Mel:
         text = self._vowelize(text, vowelizer=vowelizer)        
         token_ids = self._text_to_ids(text)
         
-        ids_batch = np.array(token_ids, dtype=np.int64)[None]
-        mel_spec = self.ort_sess.run(
-            None, {
-                "token_ids": ids_batch, 
-                "pace": np.array([pace], dtype=np.float32),
-                "speaker": np.array([speaker], dtype=np.int32),
-                "pitch_mul": np.array([pitch_mul], dtype=np.float32),
-                "pitch_add": np.array([pitch_add], dtype=np.float32),
-            },)[0].astype(np.float32)
+        return self.infer_ids(token_ids,
+                              pace=pace,
+                              speaker=speaker,
+                              pitch_mul=pitch_mul,
+                              pitch_add=pitch_add)
+
+    def infer_ids(self,
+                  token_ids: List[int],
+                  pace: float = 1.,
+                  speaker: int = 0,
+                  pitch_mul: float = 1.,
+                  pitch_add: float = 0.,
+                  ) -> np.ndarray:
+        """
+        Parameters:
+            token_ids (ndarray|list[int]): Token ids, see `_text_to_ids`
+            pace (float): Speaker pace
+            speaker (int): Speaker id
+
+        Returns:
+            (ndarray): Mel spectrogram, shape: [mel_bands, n_frames]
+        """
+        ids_batch = np.asarray(token_ids, dtype=np.int64)[None]
+        mel_spec = self._run(
+            ids_batch,
+            np.array([pace], dtype=np.float32),
+            np.array([speaker], dtype=np.int32),
+            np.array([pitch_mul], dtype=np.float32),
+            np.array([pitch_add], dtype=np.float32),
+            )
         
         return mel_spec[0]
 
 
-class HifiGanDenoiser:
+class HifiGanDenoiser(WarmupMixin):
+    # waveform lengths of the warm-up mel lengths (hop length 256)
+    warmup_sizes = tuple(256*n for n in WARMUP_MEL_LENGTHS)
+
     def __init__(self,
                 sd_path: str = "data/denoiser.onnx",
-                cuda: bool = False) -> None:
+                cuda: bool = False,
+                optimize: Optional[bool] = None) -> None:
         providers = ['CPUExecutionProvider']
         if cuda: providers.insert(0, 'CUDAExecutionProvider')
-        self.ort_sess = ort.InferenceSession(
-            sd_path, providers=providers)
+        self.ort_sess = create_session(
+            sd_path, providers, optimize=optimize)
         
     def infer(self, wave, denoise: float = 0.005) -> np.ndarray:
         """
@@ -113,24 +362,46 @@ class HifiGanDenoiser:
             'strength': np.array([denoise], dtype=np.float64)})[0]
         return wave_out[0]
 
+    def infer_batch(self, waves, denoise: float = 0.005) -> np.ndarray:
+        """
+        Parameters:
+            waves (ndarray): Padded waveforms, shape: [batch_size, n_samples]
+            denoise (float): Denoising strength
+
+        Returns:
+            (ndarray): Denoised waveforms, shape: [batch_size, n_samples]
+        """
+        return self.ort_sess.run(None, {
+            'audio': waves.astype(np.float32),
+            'strength': np.array([denoise], dtype=np.float64)})[0]
+
+    def _warmup_step(self, n_samples, batch_size):
+        rng = np.random.default_rng(0)
+        self.infer_batch(rng.uniform(-.5, .5, (batch_size, n_samples)))
+
+
+class HifiGanVocoder(WarmupMixin):
+    # mel spectrogram lengths, in frames
+    warmup_sizes = WARMUP_MEL_LENGTHS
 
-class HifiGanVocoder:
     def __init__(self, 
                  sd_path: str = "data/hifigan.onnx",
                  denoiser_path: str = "data/denoiser.onnx",
-                 cuda: bool = False) -> None:
+                 cuda: bool = False,
+                 optimize: Optional[bool] = None) -> None:
         providers = ['CPUExecutionProvider']
         if cuda is not None:           
             if not isinstance(cuda, int): cuda = 0
             providers.insert(0, ('CUDAExecutionProvider', {
                 'device_id': cuda
             }))
-        self.ort_sess = ort.InferenceSession(
-            sd_path, providers=providers)
+        self.ort_sess = create_session(
+            sd_path, providers, optimize=optimize)
         
         self.denoiser = None
         if denoiser_path is not None:
-            self.denoiser = HifiGanDenoiser(denoiser_path, cuda=None)
+            self.denoiser = HifiGanDenoiser(denoiser_path, cuda=None,
+                                            optimize=optimize)
     
     def infer(self, 
               mel_spec: np.ndarray,
@@ -156,12 +427,70 @@ class HifiGanVocoder:
         
         return wave_out[0, 0]
 
+    def infer_batch(self,
+                    mel_specs: List[np.ndarray],
+                    denoise: float = 0.005,
+                    ) -> List[np.ndarray]:
+        """
+        Parameters:
+            mel_specs (list[ndarray]): Mel spectrograms,
+                shape: [mel_bands, n_frames]
+            denoise (float): Denoiser strength
+
+        Returns:
+            (list[ndarray]): Waveforms, shape: [n_samples]
+        """
+        mel_batch = _pad_batch(mel_specs, pad_value=MEL_PAD_VALUE)
+        wave_batch = self.ort_sess.run(
+            None,
+            {"input": mel_batch},
+        )[0][:, 0]
+
+        if denoise > 0 and self.denoiser is not None:
+            wave_batch = self.denoiser.infer_batch(wave_batch,
+                                                   denoise=denoise)
+
+        hop_length = _hop_length(wave_batch.shape[-1], mel_batch.shape[-1])
+        return [wave[:mel.shape[-1]*hop_length].astype(float)
+                for wave, mel in zip(wave_batch, mel_specs)]
+
+    def infer_chunked(self,
+                      mel_spec: np.ndarray,
+                      denoise: float = 0.005,
+                      chunk_size: int = 256,
+                      context: int = 32,
+                      crossfade: int = 4,
+                      ) -> Iterator[np.ndarray]:
+        """
+        Parameters:
+            mel_spec (ndarray): Mel spectrogram, shape: [mel_bands, n_frames]
+            denoise (float): Denoiser strength
+            chunk_size (int): Number of mel frames vocoded per call
+            context (int): Number of extra frames on each side of a chunk
+            crossfade (int): Number of frames crossfaded between chunks
+
+        Yields:
+            (ndarray): Waveform chunk, shape: [n_samples]
+        """
+        return _vocode_chunked(lambda mel: self.infer(mel, denoise=denoise),
+                               mel_spec,
+                               chunk_size=chunk_size,
+                               context=context,
+                               crossfade=crossfade)
+
+    def _warmup_step(self, n_frames, batch_size):
+        # with the default strength, the denoiser runs on the same lengths
+        self.infer_batch(_warmup_mels(self.ort_sess, n_frames, batch_size))
+
 
+class VocosVocoder(WarmupMixin):
+    # mel spectrogram lengths, in frames
+    warmup_sizes = WARMUP_MEL_LENGTHS
 
-class VocosVocoder:
     def __init__(self, 
                  sd_path: str = "data/hifigan.onnx",
-                 cuda: int = None) -> None:
+                 cuda: int = None,
+                 optimize: Optional[bool] = None) -> None:
         providers = ['CPUExecutionProvider']
         if cuda is not None:           
             if not isinstance(cuda, int): cuda = 0
@@ -169,8 +498,8 @@ class VocosVocoder:
                 'device_id': cuda,
                 # "cudnn_conv_algo_search": "DEFAULT",               
             }))
-        self.ort_sess = ort.InferenceSession(
-            sd_path, providers=providers)
+        self.ort_sess = create_session(
+            sd_path, providers, optimize=optimize)
     
     def infer(self, 
               mel_spec: np.ndarray,
@@ -195,27 +524,130 @@ class VocosVocoder:
         
         return wave_out[0]
 
+    def infer_batch(self,
+                    mel_specs: List[np.ndarray],
+                    denoise: float = 0.005,
+                    ) -> List[np.ndarray]:
+        """
+        Parameters:
+            mel_specs (list[ndarray]): Mel spectrograms,
+                shape: [mel_bands, n_frames]
+            denoise (float): Denoiser strength
+
+        Returns:
+            (list[ndarray]): Waveforms, shape: [n_samples]
+        """
+        mel_batch = _pad_batch(mel_specs, pad_value=MEL_PAD_VALUE)
+        wave_batch = self.ort_sess.run(
+            None,
+            {
+                "mel_spec": mel_batch,
+                "denoise": np.array([denoise], dtype=np.float32),
+             },)[0]
+
+        hop_length = _hop_length(wave_batch.shape[-1], mel_batch.shape[-1])
+        return [wave[:mel.shape[-1]*hop_length].astype(float)
+                for wave, mel in zip(wave_batch, mel_specs)]
+
+    def infer_chunked(self,
+                      mel_spec: np.ndarray,
+                      denoise: float = 0.005,
+                      chunk_size: int = 256,
+                      context: int = 32,
+                      crossfade: int = 4,
+                      ) -> Iterator[np.ndarray]:
+        """
+        Parameters:
+            mel_spec (ndarray): Mel spectrogram, shape: [mel_bands, n_frames]
+            denoise (float): Denoiser strength
+            chunk_size (int): Number of mel frames vocoded per call
+            context (int): Number of extra frames on each side of a chunk
+            crossfade (int): Number of frames crossfaded between chunks
+
+        Yields:
+            (ndarray): Waveform chunk, shape: [n_samples]
+        """
+        return _vocode_chunked(lambda mel: self.infer(mel, denoise=denoise),
+                               mel_spec,
+                               chunk_size=chunk_size,
+                               context=context,
+                               crossfade=crossfade)
+
+    def _warmup_step(self, n_frames, batch_size):
+        self.infer_batch(_warmup_mels(self.ort_sess, n_frames, batch_size))
+
+
+class FastPitch2Wave(WarmupMixin):
+    # `warmup` runs those of its models, and `ready` follows theirs
 
-class FastPitch2Wave:
     def __init__(self,
                  sd_path_ttmel: str = "data/fp_ms.onnx",
                  sd_path_mel2wave: str = "data/hifigan.onnx",
                  sd_path_denoiser: str = "data/denoiser.onnx",
                  vocoder_id: str = 'hifigan',                 
-                 cuda: int = None
+                 cuda: int = None,
+                 optimize: Optional[bool] = None,
+                 n_speakers: Optional[int] = None,
                  ) -> None:
         
-        self.ttmel_model = FastPitch2Mel(sd_path_ttmel, cuda=cuda)
+        self.ttmel_model = FastPitch2Mel(sd_path_ttmel, cuda=cuda,
+                                         optimize=optimize,
+                                         n_speakers=n_speakers)
         
         if vocoder_id == 'hifigan':
             self.mel2wave_model = HifiGanVocoder(sd_path_mel2wave,
                                                  sd_path_denoiser,
-                                                 cuda=cuda)
+                                                 cuda=cuda,
+                                                 optimize=optimize)
         else:
             self.mel2wave_model = VocosVocoder(sd_path_mel2wave,                                          
-                                               cuda=None)
+                                               cuda=None,
+                                               optimize=optimize)
         
         # self.hifigan_denoiser = HifiGanDenoiser(sd_path_denoiser, cuda=False)
+
+    @property
+    def ready(self) -> bool:
+        """True once the Text->Mel model and the vocoder are warmed up."""
+        return self.ttmel_model.ready and self.mel2wave_model.ready
+
+    @property
+    def n_speakers(self) -> Optional[int]:
+        """Number of speaker ids of the Text->Mel model, None if unknown."""
+        return self.ttmel_model.n_speakers
+
+    def warmup(self,
+               token_lengths: Sequence[int] = WARMUP_TOKEN_LENGTHS,
+               mel_lengths: Sequence[int] = WARMUP_MEL_LENGTHS,
+               batch_size: int = 1,
+               vowelizer: _VOWELIZER = None,
+               ) -> float:
+        """
+        Warm up the Text->Mel model, the vocoder and the denoiser (and
+        optionally a vowelizer) on representative input lengths. The first
+        calls after loading are much slower than the steady state, because
+        ONNX Runtime allocates its memory arenas and selects kernels lazily;
+        a server can warm up at start and gate on `ready`.
+
+        Parameters:
+            token_lengths (list[int]): Utterance lengths, in tokens
+            mel_lengths (list[int]): Mel spectrogram lengths, in frames
+            batch_size (int): Number of utterances per call (the largest
+                batch the caller will run)
+            vowelizer [catt_eo|shakkala|shakkelha]: Optional; Also load and
+                warm up this vowelizer
+
+        Returns:
+            (float): Warm-up time in seconds
+        """
+        warmup_time = self.ttmel_model.warmup(token_lengths, batch_size)
+        warmup_time += self.mel2wave_model.warmup(mel_lengths, batch_size)
+        if vowelizer is not None:
+            from ..vocalizer.models.core import _get_vocalizer
+            warmup_time += _get_vocalizer(vowelizer).warmup(
+                batch_size=batch_size)
+        self.warmup_time = warmup_time
+        return warmup_time
     
     def infer(self, 
               text: str, 
@@ -227,6 +659,7 @@ class FastPitch2Wave:
               pitch_mul: float = 1.,
               pitch_add: float = 0.,
               return_mel: bool = False,
+              vocoder_chunk_size: Optional[int] = None,
               ) -> np.ndarray:
         """
         Parameters:
@@ -238,6 +671,8 @@ class FastPitch2Wave:
             vowelizer [shakkala|shakkelha]: Optional; Vowelizer model
             pitch_mul (float): Pitch multiplier
             pitch_add (float): Pitch offset
+            vocoder_chunk_size (int): Optional; Vocode in chunks of this
+                many mel frames to bound the vocoder memory
             
         Returns:
             (ndarray): Waveform sampled at 22050Hz, shape: [n_samples]
@@ -249,10 +684,142 @@ class FastPitch2Wave:
                                           pitch_mul=pitch_mul,
                                           pitch_add=pitch_add,
                                           )
-        wave_out = self.mel2wave_model.infer(mel_spec, 
-                                             denoise=denoise)
-        wave_out = volume*(wave_out / (np.max(np.abs(wave_out))+1e-5))
+        wave_out = self.vocode(mel_spec, denoise=denoise,
+                               vocoder_chunk_size=vocoder_chunk_size)
+        wave_out = volume*wave_out
         
         if return_mel:
             return wave_out, mel_spec
-        return wave_out
\ No newline at end of file
+        return wave_out
+
+    def vocode(self,
+               mel_spec: np.ndarray,
+               denoise: float = 0.005,
+               vocoder_chunk_size: Optional[int] = None,
+               ) -> np.ndarray:
+        """
+        Parameters:
+            mel_spec (ndarray): Mel spectrogram
+            denoise (float): Denoiser strength
+            vocoder_chunk_size (int): Optional; Vocode in chunks of this
+                many mel frames
+
+        Returns:
+            (ndarray): Waveform normalized to a peak of 1, shape: [n_samples]
+        """
+        if vocoder_chunk_size is None:
+            wave_out = self.mel2wave_model.infer(mel_spec, 
+                                                 denoise=denoise)
+        else:
+            wave_out = np.concatenate(list(self.mel2wave_model.infer_chunked(
+                mel_spec, denoise=denoise, chunk_size=vocoder_chunk_size)))
+        return wave_out / (np.max(np.abs(wave_out))+1e-5)
+
+    def infer_stream(self,
+                     text: str,
+                     speaker: int = 0,
+                     pace: float = 1.,
+                     denoise: float = 0.005,
+                     volume: float = 0.9,
+                     vowelizer: _VOWELIZER = None,
+                     pitch_mul: float = 1.,
+                     pitch_add: float = 0.,
+                     vocoder_chunk_size: Optional[int] = None,
+                     ) -> Iterator[np.ndarray]:
+        """
+        Synthesize text sentence by sentence, yielding each waveform chunk
+        as soon as it is ready. Volume is normalized with the running peak
+        of the chunks produced so far, so the level of a chunk never depends
+        on sentences that have not been synthesized yet.
+
+        Parameters:
+            text (str): Text, split at sentence-final punctuation
+            vocoder_chunk_size (int): Optional; Also split the vocoding of
+                each sentence into chunks of this many mel frames
+            (other parameters as in `infer`)
+
+        Yields:
+            (ndarray): Waveform chunk sampled at 22050Hz, shape: [n_samples]
+        """
+        peak = 0.
+        for sentence in text_utils.split_sentences(text):
+            mel_spec = self.ttmel_model.infer(sentence,
+                                              pace=pace,
+                                              speaker=speaker,
+                                              vowelizer=vowelizer,
+                                              pitch_mul=pitch_mul,
+                                              pitch_add=pitch_add,
+                                              )
+            if vocoder_chunk_size is None:
+                wave_chunks = [self.mel2wave_model.infer(mel_spec,
+                                                         denoise=denoise)]
+            else:
+                wave_chunks = self.mel2wave_model.infer_chunked(
+                    mel_spec, denoise=denoise, chunk_size=vocoder_chunk_size)
+            for wave_out in wave_chunks:
+                peak = max(peak, np.max(np.abs(wave_out)))
+                yield volume*(wave_out / (peak+1e-5))
+
+    def infer_batch(self,
+                    texts: List[str],
+                    speakers: Union[int, Sequence[int]] = 0,
+                    paces: Union[float, Sequence[float]] = 1.,
+                    denoise: float = 0.005,
+                    volume: float = 0.9,
+                    vowelizer: _VOWELIZER = None,
+                    pitch_muls: Union[float, Sequence[float]] = 1.,
+                    pitch_adds: Union[float, Sequence[float]] = 0.,
+                    batch_size: int = 16,
+                    return_mel: bool = False,
+                    ) -> List[np.ndarray]:
+        """
+        Synthesize several utterances with one Text->Mel and one vocoder
+        call per batch. Texts are sorted by token count before batching to
+        keep padding small; the outputs are returned in input order.
+
+        Parameters:
+            texts (list[str]): Texts
+            speakers (int|list[int]): Speaker ID, shared or per text
+            paces (float|list[float]): Speaker pace, shared or per text
+            denoise (float): Denoiser strength
+            volume (float): Max amplitude (between 0 and 1)
+            vowelizer [catt_eo|shakkala|shakkelha]: Optional; Vowelizer model
+            pitch_muls (float|list[float]): Pitch multiplier
+            pitch_adds (float|list[float]): Pitch offset
+            batch_size (int): Max number of utterances per ONNX call
+            return_mel (bool): Also return the mel spectrograms
+
+        Returns:
+            (list[ndarray]): Waveforms sampled at 22050Hz, shape: [n_samples]
+        """
+        n = len(texts)
+        speakers = _broadcast(speakers, n, np.int32)
+        paces = _broadcast(paces, n, np.float32)
+        pitch_muls = _broadcast(pitch_muls, n, np.float32)
+        pitch_adds = _broadcast(pitch_adds, n, np.float32)
+
+        ids_list = [
+            self.ttmel_model._text_to_ids(
+                self.ttmel_model._vowelize(text, vowelizer=vowelizer))
+            for text in texts]
+        order = sorted(range(n), key=lambda i: len(ids_list[i]))
+
+        waves_out, mels_out = [None]*n, [None]*n
+        for start in range(0, n, batch_size):
+            idx = order[start:start+batch_size]
+            mel_specs = self.ttmel_model.infer_ids_batch(
+                [ids_list[i] for i in idx],
+                paces=paces[idx],
+                speakers=speakers[idx],
+                pitch_muls=pitch_muls[idx],
+                pitch_adds=pitch_adds[idx],
+                )
+            waves = self.mel2wave_model.infer_batch(mel_specs,
+                                                    denoise=denoise)
+            for i, wave_out, mel_spec in zip(idx, waves, mel_specs):
+                waves_out[i] = volume*(wave_out / (np.max(np.abs(wave_out))+1e-5))
+                mels_out[i] = mel_spec
+
+        if return_mel:
+            return waves_out, mels_out
+        return waves_out
\ No newline at end of file
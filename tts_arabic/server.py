@@ -0,0 +1,559 @@
+"""
+Local HTTP synthesis server with dynamic micro-batching.
+
+Requests are queued and collected into micro-batches: a batch is closed
+when it holds `max_batch` requests or `max_wait` seconds after its first
+request arrived, whichever comes first. Each batch runs through
+`FastPitch2Wave.infer_batch` in a thread pool (ONNX Runtime releases the
+GIL), while the event loop keeps accepting and batching requests.
+
+Endpoints:
+    POST /tts      JSON body, or GET /tts?text=...: `text` and optionally
+                   `speaker`, `pace`, `pitch_mul`, `pitch_add`, `volume`,
+                   `denoise`, `vowelizer`, `format` (wav|pcm),
+                   `bits_per_sample` (8|16|24|32) and `stream` (true|false).
+                   Streamed responses are sent sentence by sentence with
+                   chunked transfer encoding; they bypass the batching but
+                   take a worker and count against `max_queue`.
+    GET /metrics   Queue depth, batch sizes and latency percentiles (JSON)
+    GET /health    `{"status": "ok"}` once the models are loaded and warmed
+                   up, status 503 with `loading` or `warming_up` before
+
+Usage:
+    tts-arabic serve --port 8000 --max-batch 8 --max-wait-ms 10
+"""
+import asyncio
+import json
+import logging
+import math
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+from .utils.audio import to_pcm, to_wav, wav_header
+
+_REQUEST_PARAMS = {'speaker': int, 'pace': float, 'pitch_mul': float,
+                   'pitch_add': float, 'volume': float, 'denoise': float,
+                   'bits_per_sample': int}
+_STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error', 503: 'Service Unavailable'}
+MAX_BODY_BYTES = 1 << 20
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class _Request:
+    def __init__(self, params: dict) -> None:
+        self.params = params
+        self.future = asyncio.get_running_loop().create_future()
+        self.time_queued = time.perf_counter()
+        self.time_started = None
+
+
+def _parse_params(params: dict,
+                  defaults: dict,
+                  n_speakers: Optional[int] = None,
+                  ) -> dict:
+    text = params.get('text')
+    if not isinstance(text, str) or not text.strip():
+        raise HTTPError(400, "'text' is required")
+    parsed = dict(defaults, text=text)
+    for key, cast in _REQUEST_PARAMS.items():
+        if params.get(key) not in (None, ''):
+            try:
+                parsed[key] = cast(params[key])
+            except (TypeError, ValueError):
+                raise HTTPError(400, f"invalid {key!r}") from None
+    if params.get('vowelizer'):
+        parsed['vowelizer'] = params['vowelizer']
+    if params.get('format'):
+        parsed['format'] = params['format']
+    stream = params.get('stream', False)
+    parsed['stream'] = stream if isinstance(stream, bool) \
+        else str(stream).lower() in ('1', 'true', 'yes')
+
+    if parsed['format'] not in ('wav', 'pcm'):
+        raise HTTPError(400, "'format' must be 'wav' or 'pcm'")
+    if parsed['bits_per_sample'] not in (8, 16, 24, 32):
+        raise HTTPError(400, "'bits_per_sample' must be 8, 16, 24 or 32")
+    if parsed['vowelizer'] not in (None, 'catt_eo', 'shakkala', 'shakkelha'):
+        raise HTTPError(400, "unknown vowelizer")
+    # rejected here, a bad value would fail the whole micro-batch
+    if parsed['speaker'] < 0:
+        raise HTTPError(400, "'speaker' must not be negative")
+    if n_speakers is not None and parsed['speaker'] >= n_speakers:
+        raise HTTPError(400, f"'speaker' must be in 0..{n_speakers - 1}")
+    for key in ('pace', 'pitch_mul', 'pitch_add', 'volume', 'denoise'):
+        if not math.isfinite(parsed[key]):
+            raise HTTPError(400, f"invalid {key!r}")
+    if parsed['pace'] <= 0:
+        raise HTTPError(400, "'pace' must be positive")
+    if not 0 <= parsed['volume'] <= 1:
+        raise HTTPError(400, "'volume' must be in [0, 1]")
+    if parsed['denoise'] < 0:
+        raise HTTPError(400, "'denoise' must not be negative")
+    return parsed
+
+
+def _percentiles(values) -> dict:
+    if not values:
+        return {'p50': None, 'p90': None, 'p99': None, 'max': None}
+    p50, p90, p99 = np.percentile(np.asarray(values), [50, 90, 99])
+    return {'p50': float(p50), 'p90': float(p90), 'p99': float(p99),
+            'max': float(max(values))}
+
+
+class SynthesisServer:
+    """
+    asyncio HTTP server batching concurrent synthesis requests.
+
+    Args:
+        model_id (str): Text->Mel model
+        vocoder_id (str): Vocoder model
+        cuda (int): Optional; CUDA device index
+        max_batch (int): Max number of requests per model call
+        max_wait (float): Max seconds a batch waits for more requests
+        workers (int): Number of batches run at the same time
+        max_queue (int): Requests waiting beyond this number are rejected
+            with status 503
+        vowelizer (str): Optional; Default vowelizer of the requests
+        bits_per_sample (int): Default bit depth of the responses
+        window (int): Number of recent requests the latency percentiles are
+            computed over
+        warmup (bool): Run representative input lengths through the models
+            (see `FastPitch2Wave.warmup`) after loading. Requests are queued
+            and `/health` reports `warming_up` until it is done
+    """
+
+    def __init__(self,
+                 model_id: str = 'fastpitch',
+                 vocoder_id: str = 'hifigan',
+                 cuda: Optional[int] = None,
+                 max_batch: int = 8,
+                 max_wait: float = 0.01,
+                 workers: int = 1,
+                 max_queue: int = 256,
+                 vowelizer: Optional[str] = None,
+                 bits_per_sample: int = 16,
+                 window: int = 10000,
+                 warmup: bool = True,
+                 ) -> None:
+        from .models.core import _vocoder_id_to_sr
+        self.model_id = model_id
+        self.vocoder_id = vocoder_id
+        self.cuda = cuda
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.workers = workers
+        self.max_queue = max_queue
+        self.sample_rate = _vocoder_id_to_sr.get(vocoder_id, 22050)
+        self.defaults = {'speaker': 0, 'pace': 1., 'pitch_mul': 1.,
+                         'pitch_add': 0., 'volume': 0.9, 'denoise': 0.005,
+                         'vowelizer': vowelizer, 'format': 'wav',
+                         'bits_per_sample': bits_per_sample}
+        self.warmup = warmup
+        self.model = None
+        self._warmup_future = None
+        self._warmup_error = None
+        self._queue = None
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix='tts-batch')
+        self._slots = None
+        self._running = 0
+        self._streams = 0
+        self._time_start = time.time()
+        self._counts = Counter()
+        self._batch_sizes = Counter()
+        self._latency = deque(maxlen=window)
+        self._queue_wait = deque(maxlen=window)
+
+    def load(self) -> None:
+        from .models.core import _load_cached_model
+        self.model = _load_cached_model(self.model_id, self.vocoder_id,
+                                        self.cuda)
+
+    def _warmup(self) -> None:
+        try:
+            warmup_time = self.model.warmup(
+                batch_size=self.max_batch,
+                vowelizer=self.defaults['vowelizer'])
+        except Exception as exc:
+            # requests are still served, /health keeps reporting the error
+            self._warmup_error = f"{type(exc).__name__}: {exc}"
+            logger.error("tts-arabic warm-up failed: %s", self._warmup_error)
+        else:
+            logger.info("tts-arabic warm-up done in %.2fs", warmup_time)
+
+    def status(self) -> str:
+        """`loading`, `warming_up`, `warmup_failed` or `ok`."""
+        if self.model is None:
+            return 'loading'
+        if self.warmup and not self.model.ready:
+            return 'warmup_failed' if self._warmup_error else 'warming_up'
+        return 'ok'
+
+    async def start(self,
+                    host: str = '127.0.0.1',
+                    port: int = 8000,
+                    ) -> asyncio.AbstractServer:
+        loop = asyncio.get_running_loop()
+        if self.model is None:
+            await loop.run_in_executor(self._executor, self.load)
+        if self.warmup and not self.model.ready:
+            # accept connections meanwhile; batches start once it is done
+            self._warmup_future = loop.run_in_executor(self._executor,
+                                                       self._warmup)
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._batcher = asyncio.ensure_future(self._batch_loop())
+        return await asyncio.start_server(self._handle_connection,
+                                          host, port)
+
+    async def serve_forever(self,
+                            host: str = '127.0.0.1',
+                            port: int = 8000,
+                            ) -> None:
+        server = await self.start(host, port)
+        address = server.sockets[0].getsockname()
+        logger.info("tts-arabic serving %s/%s on http://%s:%s "
+                    "(max_batch=%d, max_wait=%gms)",
+                    self.model_id, self.vocoder_id, address[0], address[1],
+                    self.max_batch, self.max_wait*1000)
+        async with server:
+            await server.serve_forever()
+
+    def metrics(self) -> dict:
+        n_batches = sum(self._batch_sizes.values())
+        n_batched = sum(size*count
+                        for size, count in self._batch_sizes.items())
+        return {
+            'status': self.status(),
+            'warmup_time': self.model.warmup_time if self.model else None,
+            'uptime': time.time() - self._time_start,
+            'queue_depth': self._queue.qsize() if self._queue else 0,
+            'running_batches': self._running,
+            'streams': self._streams,
+            'requests': dict(self._counts),
+            'batches': n_batches,
+            'mean_batch_size': n_batched / n_batches if n_batches else 0.,
+            'batch_sizes': {str(size): count for size, count
+                            in sorted(self._batch_sizes.items())},
+            'latency': _percentiles(list(self._latency)),
+            'queue_wait': _percentiles(list(self._queue_wait)),
+            'config': {'max_batch': self.max_batch,
+                       'max_wait': self.max_wait, 'workers': self.workers,
+                       'model_id': self.model_id,
+                       'vocoder_id': self.vocoder_id},
+        }
+
+    # batching
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._warmup_future is not None:
+            await self._warmup_future
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(),
+                                                        timeout))
+                except asyncio.TimeoutError:
+                    break
+            # infer_batch shares vowelizer and denoise within a call
+            groups = {}
+            for request in batch:
+                key = (request.params['vowelizer'], request.params['denoise'])
+                groups.setdefault(key, []).append(request)
+            for group in groups.values():
+                # wait for a free worker; requests keep queuing meanwhile
+                await self._slots.acquire()
+                asyncio.ensure_future(self._run_batch(group))
+
+    async def _run_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        self._running += 1
+        self._batch_sizes[len(batch)] += 1
+        time_started = time.perf_counter()
+        for request in batch:
+            request.time_started = time_started
+        try:
+            try:
+                waves = await loop.run_in_executor(
+                    self._executor, self._infer_batch,
+                    [request.params for request in batch])
+            except Exception as exc:
+                if len(batch) == 1:
+                    if not batch[0].future.done():
+                        batch[0].future.set_exception(exc)
+                    return
+                # retry one by one, so that only the failing request fails
+                waves = []
+                for request in batch:
+                    try:
+                        waves.extend(await loop.run_in_executor(
+                            self._executor, self._infer_batch,
+                            [request.params]))
+                    except Exception as exc:
+                        waves.append(exc)
+            for request, wave in zip(batch, waves):
+                if request.future.done():
+                    continue
+                if isinstance(wave, Exception):
+                    request.future.set_exception(wave)
+                else:
+                    request.future.set_result(wave)
+        finally:
+            self._running -= 1
+            self._slots.release()
+
+    def _infer_batch(self, params_list):
+        params = params_list[0]
+        waves = self.model.infer_batch(
+            [p['text'] for p in params_list],
+            speakers=[p['speaker'] for p in params_list],
+            paces=[p['pace'] for p in params_list],
+            pitch_muls=[p['pitch_mul'] for p in params_list],
+            pitch_adds=[p['pitch_add'] for p in params_list],
+            denoise=params['denoise'],
+            volume=1.,
+            vowelizer=params['vowelizer'],
+            batch_size=len(params_list),
+        )
+        return [p['volume']*wave for p, wave in zip(params_list, waves)]
+
+    # HTTP
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                except (ConnectionError, asyncio.LimitOverrunError):
+                    break
+                if not request_line.strip():
+                    break
+                keep_alive = await self._handle_request(request_line,
+                                                        reader, writer)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, request_line, reader, writer):
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            method, target, version = \
+                request_line.decode('latin-1').split()
+        except ValueError:
+            await self._send_error(writer, HTTPError(400, "bad request"),
+                                   False)
+            return False
+        keep_alive = headers.get('connection', '').lower() != 'close' \
+            and version == 'HTTP/1.1'
+
+        # with a bad or unread body, the rest of the stream is not a request
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            length = -1
+        try:
+            if length < 0:
+                raise HTTPError(400, "invalid Content-Length")
+            if length > MAX_BODY_BYTES:
+                raise HTTPError(413, "request body too large")
+            try:
+                body = await reader.readexactly(length) if length else b''
+            except asyncio.IncompleteReadError:
+                raise HTTPError(400, "incomplete request body") from None
+        except HTTPError as exc:
+            self._counts[f'status_{exc.status}'] += 1
+            await self._send_error(writer, exc, False)
+            return False
+
+        try:
+            url = urlsplit(target)
+            if url.path == '/health':
+                status = self.status()
+                await self._send_json(writer, {'status': status},
+                                      keep_alive,
+                                      status=200 if status == 'ok' else 503)
+            elif url.path == '/metrics':
+                await self._send_json(writer, self.metrics(), keep_alive)
+            elif url.path == '/tts':
+                params = dict(parse_qsl(url.query))
+                if method == 'POST' and body:
+                    try:
+                        body = json.loads(body)
+                    except ValueError:
+                        raise HTTPError(400, "body is not JSON") from None
+                    if not isinstance(body, dict):
+                        raise HTTPError(400, "body must be a JSON object")
+                    params.update(body)
+                elif method not in ('GET', 'POST'):
+                    raise HTTPError(405, "use GET or POST")
+                await self._synthesize(writer, params, keep_alive)
+            else:
+                raise HTTPError(404, f"no route {url.path}")
+        except HTTPError as exc:
+            self._counts[f'status_{exc.status}'] += 1
+            await self._send_error(writer, exc, keep_alive)
+        return keep_alive
+
+    async def _synthesize(self, writer, params, keep_alive):
+        params = _parse_params(params, self.defaults,
+                               self.model.n_speakers)
+        if self._queue.qsize() + self._streams >= self.max_queue:
+            raise HTTPError(503, "queue is full")
+        if params['stream']:
+            self._counts['stream'] += 1
+            await self._stream(writer, params, keep_alive)
+            return
+
+        request = _Request(params)
+        self._counts['queued'] += 1
+        await self._queue.put(request)
+        try:
+            wave = await request.future
+        except Exception as exc:
+            self._counts['failed'] += 1
+            raise HTTPError(500, f"synthesis failed: {exc}") from None
+        time_done = time.perf_counter()
+        self._latency.append(time_done - request.time_queued)
+        self._queue_wait.append(request.time_started - request.time_queued)
+        self._counts['done'] += 1
+
+        await self._send(writer, 200, self._encode(wave, params),
+                         self._content_type(params), keep_alive)
+
+    async def _stream(self, writer, params, keep_alive):
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue()
+        end = object()
+        cancelled = threading.Event()
+        time_start = time.perf_counter()
+
+        def produce():
+            try:
+                for wave in self.model.infer_stream(
+                        params['text'], speaker=params['speaker'],
+                        pace=params['pace'], denoise=params['denoise'],
+                        volume=params['volume'],
+                        vowelizer=params['vowelizer'],
+                        pitch_mul=params['pitch_mul'],
+                        pitch_add=params['pitch_add']):
+                    if cancelled.is_set():
+                        return
+                    loop.call_soon_threadsafe(chunks.put_nowait, wave)
+            except Exception as exc:
+                loop.call_soon_threadsafe(chunks.put_nowait, exc)
+            loop.call_soon_threadsafe(chunks.put_nowait, end)
+
+        def release(_):
+            self._streams -= 1
+            self._slots.release()
+
+        # a stream takes a worker like a batch, until its producer is done
+        self._streams += 1
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            self._streams -= 1
+            raise
+        loop.run_in_executor(self._executor, produce).add_done_callback(
+            release)
+        try:
+            await self._write_stream(writer, params, keep_alive, chunks, end)
+        finally:
+            # e.g. the client disconnected: stop after the current sentence
+            cancelled.set()
+        self._latency.append(time.perf_counter() - time_start)
+        self._counts['done'] += 1
+
+    async def _write_stream(self, writer, params, keep_alive, chunks, end):
+        head = (f"HTTP/1.1 200 OK\r\n"
+                f"Content-Type: {self._content_type(params)}\r\n"
+                f"Transfer-Encoding: chunked\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"
+                "\r\n\r\n")
+        writer.write(head.encode('latin-1'))
+        if params['format'] == 'wav':
+            self._write_chunk(writer, wav_header(
+                self.sample_rate, params['bits_per_sample']))
+        while True:
+            wave = await chunks.get()
+            if wave is end:
+                break
+            if isinstance(wave, Exception):
+                # the status line is sent already; end the stream early
+                self._counts['failed'] += 1
+                break
+            self._write_chunk(writer, to_pcm(wave, params['bits_per_sample']))
+            await writer.drain()
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    @staticmethod
+    def _write_chunk(writer, data):
+        writer.write(f"{len(data):x}\r\n".encode('latin-1') + data + b'\r\n')
+
+    def _encode(self, wave, params):
+        if params['format'] == 'pcm':
+            return to_pcm(wave, params['bits_per_sample'])
+        return to_wav(wave, self.sample_rate, params['bits_per_sample'])
+
+    def _content_type(self, params):
+        if params['format'] == 'pcm':
+            return (f"audio/L{params['bits_per_sample']};"
+                    f"rate={self.sample_rate};channels=1")
+        return 'audio/wav'
+
+    async def _send(self, writer, status, body, content_type, keep_alive):
+        head = (f"HTTP/1.1 {status} {_STATUS[status]}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"
+                "\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def _send_json(self, writer, data, keep_alive, status=200):
+        await self._send(writer, status, json.dumps(data).encode('utf-8'),
+                         'application/json', keep_alive)
+
+    async def _send_error(self, writer, exc, keep_alive):
+        await self._send_json(writer, {'error': str(exc)}, keep_alive,
+                              status=exc.status)
+
+
+def serve(host: str = '127.0.0.1', port: int = 8000, **kwargs) -> None:
+    """Run a `SynthesisServer` (see its arguments) until interrupted."""
+    server = SynthesisServer(**kwargs)
+    try:
+        asyncio.run(server.serve_forever(host, port))
+    except KeyboardInterrupt:
+        pass
@@ -1,8 +1,25 @@
+import json
+import re
+
+import numpy as np
+
 from .symbols import symbols, DOUBLING_TOKEN, EOS_TOKEN, SEPARATOR_TOKEN
+from .transliterate import arabic_to_buckwalter, buckwalter_to_arabic
 from .phonetise_buckwalter import (
-    arabic_to_buckwalter,
-    buckwalter_to_arabic,
-    process_utterance
+    preprocess_utterance,
+    process_utterance,
+    process_word_cached,
+    utterance_to_phonemes,
+    word_cache
+)
+from .lexicon import (
+    compile_lexicon,
+    load_lexicon,
+    unload_lexicons,
+    set_override,
+    remove_override,
+    clear_overrides,
+    load_overrides
 )
 
 vowels = ['aa', 'AA', 'uu0', 'uu1', 'UU0', 'UU1', 'ii0', 'ii1',
@@ -19,6 +36,12 @@ vowel_map = {
 }
 
 phon_to_id = {phon: i for i, phon in enumerate(symbols)}
+_separator_id = phon_to_id[SEPARATOR_TOKEN]
+_eos_id = phon_to_id[EOS_TOKEN]
+
+# sentence-final punctuation (Latin and Arabic) followed by whitespace,
+# or line breaks
+_sentence_end_re = re.compile(u'(?<=[.?!\u061f\u061b;])\\s+|\\s*\\n+\\s*')
 
 
 def tokens_to_ids(phonemes):
@@ -70,6 +93,101 @@ def arabic_to_tokens(arabic, append_space=True):
     return tokens
 
 
+_phon_ids = {}  # phoneme -> token ids, filled on first use
+
+
+def _phoneme_ids(phon):
+    # ids `phonemes_to_tokens` and `tokens_to_ids` give a single phoneme;
+    # the mapping of a phoneme does not depend on its neighbours
+    ids = _phon_ids.get(phon)
+    if ids is None:
+        tokens = phonemes_to_tokens(phon, append_space=False)[:-1]
+        ids = _phon_ids[phon] = tuple(tokens_to_ids(tokens))
+    return ids
+
+
+def buckwalter_to_ids(buckw, append_space=True):
+    """
+    Token ids of a Buckwalter utterance, as an int64 array.
+
+    Same ids as `tokens_to_ids(buckwalter_to_tokens(buckw))`, compiled from
+    the phoneme lists of the words without building intermediate strings.
+    """
+    ids = []
+    for i, phones in enumerate(utterance_to_phonemes(buckw)):
+        if i > 0:
+            ids.append(_separator_id)
+        for phon in phones:
+            ids.extend(_phoneme_ids(phon))
+    if append_space:
+        ids.append(_separator_id)
+    ids.append(_eos_id)
+    return np.array(ids, dtype=np.int64)
+
+
+def arabic_to_ids(arabic, append_space=True):
+    """Token ids of an Arabic (or Buckwalter) utterance, see
+    `buckwalter_to_ids`."""
+    return buckwalter_to_ids(arabic_to_buckwalter(arabic),
+                             append_space=append_space)
+
+
+def split_sentences(text):
+    """Split text after sentence-final punctuation and at line breaks."""
+    return [sentence for sentence in _sentence_end_re.split(text.strip())
+            if sentence]
+
+
+def word_cache_info():
+    """Hits, misses, hit rate and size of the word -> phonemes cache."""
+    return word_cache.info()
+
+
+def clear_word_cache():
+    word_cache.clear()
+
+
+def resize_word_cache(maxsize):
+    """Set the max number of cached words (`None` for unbounded)."""
+    word_cache.resize(maxsize)
+
+
+def warm_word_cache(texts):
+    """
+    Phonetise the words of `texts` (Arabic script or Buckwalter) ahead of
+    time, so that later synthesis of the same words skips the rule engine.
+
+    Returns:
+        (int): Number of cached words
+    """
+    for text in texts:
+        for word in preprocess_utterance(arabic_to_buckwalter(text)):
+            if word not in ('-', 'sil'):
+                process_word_cached(word)
+    return len(word_cache)
+
+
+def save_word_cache(path):
+    """Write the cached word -> phonemes entries to a JSON file."""
+    entries = {word: list(phones) for word, phones in word_cache.items()}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, ensure_ascii=False)
+
+
+def load_word_cache(path):
+    """
+    Add the entries of a file written by `save_word_cache` to the cache.
+
+    Returns:
+        (int): Number of loaded entries
+    """
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    word_cache.update((word, tuple(phones))
+                      for word, phones in entries.items())
+    return len(entries)
+
+
 def simplify_phonemes(phonemes):
     for k, v in vowel_map.items():
         phonemes = phonemes.replace(k, v)
@@ -0,0 +1,312 @@
+"""
+Pronunciation lexicon consulted by `process_utterance` before the rule
+engine.
+
+A lexicon maps normalized Buckwalter words (the words `process_word`
+receives, see `preprocess_utterance`) to phoneme strings such as
+`k a * aa l i0 k a`. Lexicons are stored as sqlite files that are opened
+read-only and memory-mapped, so that worker processes share their pages
+through the OS page cache instead of each holding a copy.
+
+Lookup order: user overrides, then loaded lexicons (the most recently
+loaded first), then the rule engine. Lexicons listed in the
+`TTS_ARABIC_LEXICON` environment variable (separated by `os.pathsep`) are
+loaded on first use, which also covers spawned worker processes.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from .transliterate import arabic_to_buckwalter
+
+_SCHEMA = """
+CREATE TABLE lexicon (word TEXT PRIMARY KEY, phonemes TEXT NOT NULL)
+    WITHOUT ROWID;
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+LEXICON_VERSION = '1'
+
+
+class Lexicon:
+    """
+    Read-only view of a lexicon file written by `write_lexicon` or
+    `compile_lexicon`.
+
+    Args:
+        path (str): Path of the sqlite lexicon
+        mmap_size (int): Optional; Max bytes of the file to memory-map
+    """
+
+    def __init__(self,
+                 path: Union[str, Path],
+                 mmap_size: int = 256*2**20,
+                 ) -> None:
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"lexicon {self.path} does not exist")
+        self._conn = sqlite3.connect(f"file:{self.path.as_posix()}?mode=ro",
+                                     uri=True, check_same_thread=False)
+        self._conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        self._lock = threading.Lock()
+        version = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if version is None or version[0] != LEXICON_VERSION:
+            raise ValueError(f"{self.path}: unsupported lexicon version")
+
+    def get(self, word: str) -> Optional[List[str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT phonemes FROM lexicon WHERE word = ?",
+                (word,)).fetchone()
+        return row[0].split(' ') if row is not None else None
+
+    def __contains__(self, word: str) -> bool:
+        return self.get(word) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM lexicon").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_lock = threading.Lock()
+_lexicons = []
+_overrides = {}
+_env_loaded = False
+_fingerprint = None
+
+
+def _invalidate():
+    # cached words may have been phonetised by a different source; cached
+    # audio is keyed by `fingerprint()` and needs no clearing
+    global _fingerprint
+    from .phonetise_buckwalter import word_cache
+    _fingerprint = None
+    word_cache.clear()
+
+
+def _load_env_lexicons():
+    global _env_loaded
+    with _lock:
+        if _env_loaded:
+            return
+        _env_loaded = True
+        paths = os.environ.get('TTS_ARABIC_LEXICON', '')
+        for path in filter(None, paths.split(os.pathsep)):
+            _lexicons.insert(0, Lexicon(path))
+
+
+def lookup(word: str) -> Optional[List[str]]:
+    """Phonemes of a normalized Buckwalter word from the overrides or the
+    loaded lexicons, or None."""
+    if not _env_loaded:
+        _load_env_lexicons()
+    phonemes = _overrides.get(word)
+    if phonemes is not None:
+        return list(phonemes)
+    for lexicon in tuple(_lexicons):
+        phonemes = lexicon.get(word)
+        if phonemes is not None:
+            return phonemes
+    return None
+
+
+def load_lexicon(path: Union[str, Path]) -> Lexicon:
+    """Consult the lexicon at `path` before the ones loaded earlier."""
+    _load_env_lexicons()
+    lexicon = Lexicon(path)
+    with _lock:
+        _lexicons.insert(0, lexicon)
+    _invalidate()
+    return lexicon
+
+
+def unload_lexicons() -> None:
+    """Close all loaded lexicons (the overrides are kept)."""
+    _load_env_lexicons()
+    with _lock:
+        for lexicon in _lexicons:
+            lexicon.close()
+        _lexicons.clear()
+    _invalidate()
+
+
+def loaded_lexicons() -> List[Path]:
+    return [lexicon.path for lexicon in _lexicons]
+
+
+def fingerprint() -> str:
+    """
+    Hash of the pronunciation sources in use (path, size and mtime of the
+    loaded lexicons, and the overrides), for cache keys of phonetised text.
+    """
+    global _fingerprint
+    _load_env_lexicons()
+    with _lock:
+        if _fingerprint is None:
+            sources = []
+            for lexicon in _lexicons:
+                stat = lexicon.path.stat()
+                sources.append([lexicon.path.resolve().as_posix(),
+                                stat.st_size, stat.st_mtime_ns])
+            data = json.dumps([sources, sorted(_overrides.items())])
+            _fingerprint = hashlib.sha256(data.encode('utf-8')).hexdigest()
+        return _fingerprint
+
+
+def normalize_word(word: str) -> List[str]:
+    """
+    Lexicon keys of a word in Arabic script or Buckwalter: the word as
+    `preprocess_utterance` normalizes it at the start and in the middle of
+    an utterance (e.g. a leading hamzat wasl is dropped mid-utterance).
+    """
+    from .phonetise_buckwalter import preprocess_utterance
+    word = arabic_to_buckwalter(word.strip())
+    keys = []
+    for tokens in (preprocess_utterance(word),
+                   preprocess_utterance(' ' + word)[1:]):
+        if len(tokens) != 1 or not tokens[0]:
+            raise ValueError(f"{word!r} is not a single word")
+        if tokens[0] not in keys:
+            keys.append(tokens[0])
+    return keys
+
+
+def _check_phonemes(phonemes: str) -> str:
+    from . import vowels
+    from .symbols import symbols
+    for phon in phonemes.split():
+        if phon in vowels or phon in symbols:
+            continue
+        if len(phon) == 2 and phon[0] == phon[1] and phon[0] in symbols:
+            continue  # geminated consonant
+        raise ValueError(f"unknown phoneme {phon!r} in {phonemes!r}")
+    return ' '.join(phonemes.split())
+
+
+def set_override(word: str, phonemes: str) -> None:
+    """
+    Pronounce `word` (Arabic script or Buckwalter, diacritized) as
+    `phonemes`, a space separated phoneme string in the format of
+    `process_word` (e.g. `'l aa k i0 nn a'`), regardless of the lexicons and
+    rules.
+    """
+    phonemes = _check_phonemes(phonemes)
+    with _lock:
+        for key in normalize_word(word):
+            _overrides[key] = tuple(phonemes.split(' '))
+    _invalidate()
+
+
+def remove_override(word: str) -> None:
+    with _lock:
+        for key in normalize_word(word):
+            _overrides.pop(key, None)
+    _invalidate()
+
+
+def clear_overrides() -> None:
+    with _lock:
+        _overrides.clear()
+    _invalidate()
+
+
+def read_overrides(path: Union[str, Path]) -> Dict[str, str]:
+    """Read a `word<TAB>phonemes` file (`#` starts a comment line)."""
+    overrides = {}
+    with open(path, encoding='utf-8') as f:
+        for i, line in enumerate(f):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                word, phonemes = line.split('\t')
+            except ValueError:
+                raise ValueError(f"{path}: line {i+1} is not "
+                                 "'word<TAB>phonemes'") from None
+            overrides[word] = phonemes
+    return overrides
+
+
+def load_overrides(path: Union[str, Path]) -> int:
+    """Add the entries of an overrides file. Returns their number."""
+    overrides = read_overrides(path)
+    for word, phonemes in overrides.items():
+        set_override(word, phonemes)
+    return len(overrides)
+
+
+def write_lexicon(entries: Dict[str, str], path: Union[str, Path]) -> int:
+    """
+    Write a lexicon file from normalized word -> phoneme string entries.
+
+    Returns:
+        (int): Number of entries
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    conn = sqlite3.connect(tmp_path.as_posix())
+    try:
+        conn.executescript(_SCHEMA)
+        conn.execute("INSERT INTO meta VALUES ('version', ?)",
+                     (LEXICON_VERSION,))
+        conn.executemany("INSERT INTO lexicon VALUES (?, ?)",
+                         sorted(entries.items()))
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return len(entries)
+
+
+def compile_lexicon(texts: Iterable[str],
+                    path: Union[str, Path],
+                    min_count: int = 1,
+                    overrides: Optional[Dict[str, str]] = None,
+                    ) -> dict:
+    """
+    Phonetise the words of a corpus once and store them as a lexicon.
+
+    Parameters:
+        texts (iterable[str]): Diacritized utterances in Arabic script or
+            Buckwalter
+        path (str): Output lexicon file
+        min_count (int): Only keep words occurring at least this often
+        overrides (dict): Optional; word -> phoneme string entries that
+            replace the rule engine output (see `read_overrides`)
+
+    Returns:
+        (dict): Numbers of `utterances`, distinct `words`, written
+            `entries` and `overrides`
+    """
+    from .phonetise_buckwalter import preprocess_utterance, process_word
+    from .phonetise_buckwalter import punctuation
+
+    counts = Counter()
+    n_utterances = 0
+    for text in texts:
+        n_utterances += 1
+        for word in preprocess_utterance(arabic_to_buckwalter(text.strip())):
+            if word and word not in ('-', 'sil') and word not in punctuation:
+                counts[word] += 1
+
+    entries = {word: ' '.join(process_word(word))
+               for word, count in counts.items() if count >= min_count}
+    for word, phonemes in (overrides or {}).items():
+        phonemes = _check_phonemes(phonemes)
+        for key in normalize_word(word):
+            entries[key] = phonemes
+    write_lexicon(entries, path)
+    return {'utterances': n_utterances, 'words': len(counts),
+            'entries': len(entries), 'overrides': len(overrides or {})}
@@ -7,54 +7,14 @@
 
 import re
 
-arabic_to_buckw_dict = {  # mapping from Arabic script to Buckwalter
-    u'\u0628': u'b', u'\u0630': u'*', u'\u0637': u'T', u'\u0645': u'm',
-    u'\u062a': u't', u'\u0631': u'r', u'\u0638': u'Z', u'\u0646': u'n',
-    u'\u062b': u'^', u'\u0632': u'z', u'\u0639': u'E', u'\u0647': u'h',
-    u'\u062c': u'j', u'\u0633': u's', u'\u063a': u'g', u'\u062d': u'H',
-    u'\u0642': u'q', u'\u0641': u'f', u'\u062e': u'x', u'\u0635': u'S',
-    u'\u0634': u'$', u'\u062f': u'd', u'\u0636': u'D', u'\u0643': u'k',
-    u'\u0623': u'>', u'\u0621': u'\'', u'\u0626': u'}', u'\u0624': u'&',
-    u'\u0625': u'<', u'\u0622': u'|', u'\u0627': u'A', u'\u0649': u'Y',
-    u'\u0629': u'p', u'\u064a': u'y', u'\u0644': u'l', u'\u0648': u'w',
-    u'\u064b': u'F', u'\u064c': u'N', u'\u064d': u'K', u'\u064e': u'a',
-    u'\u064f': u'u', u'\u0650': u'i', u'\u0651': u'~', u'\u0652': u'o'
-}
-
-buckw_to_arabic_dict = {  # mapping from Buckwalter to Arabic script
-    u'b': u'\u0628', u'*': u'\u0630', u'T': u'\u0637', u'm': u'\u0645',
-    u't': u'\u062a', u'r': u'\u0631', u'Z': u'\u0638', u'n': u'\u0646',
-    u'^': u'\u062b', u'z': u'\u0632', u'E': u'\u0639', u'h': u'\u0647',
-    u'j': u'\u062c', u's': u'\u0633', u'g': u'\u063a', u'H': u'\u062d',
-    u'q': u'\u0642', u'f': u'\u0641', u'x': u'\u062e', u'S': u'\u0635',
-    u'$': u'\u0634', u'd': u'\u062f', u'D': u'\u0636', u'k': u'\u0643',
-    u'>': u'\u0623', u'\'': u'\u0621', u'}': u'\u0626', u'&': u'\u0624',
-    u'<': u'\u0625', u'|': u'\u0622', u'A': u'\u0627', u'Y': u'\u0649',
-    u'p': u'\u0629', u'y': u'\u064a', u'l': u'\u0644', u'w': u'\u0648',
-    u'F': u'\u064b', u'N': u'\u064c', u'K': u'\u064d', u'a': u'\u064e',
-    u'u': u'\u064f', u'i': u'\u0650', u'~': u'\u0651', u'o': u'\u0652'
-}
-
-
-def arabic_to_buckwalter(word):  # Convert input string to Buckwalter
-    res = ''
-    for letter in word:
-        if(letter in arabic_to_buckw_dict):
-            res += arabic_to_buckw_dict[letter]
-        else:
-            res += letter
-    return res
-
-
-def buckwalter_to_arabic(word):  # Convert input string to Arabic
-    res = ''
-    for letter in word:
-        if(letter in buckw_to_arabic_dict):
-            res += buckw_to_arabic_dict[letter]
-        else:
-            res += letter
-    return res
-
+from ..utils.cache import LRUCache
+from . import lexicon
+from .transliterate import (  # noqa: F401
+    arabic_to_buckw_dict,
+    buckw_to_arabic_dict,
+    arabic_to_buckwalter,
+    buckwalter_to_arabic
+)
 
 # ----------------------------------------------------------------------------
 # Grapheme to Phoneme mappings------------------------------------------------
@@ -161,7 +121,7 @@ def isFixedWord(word, results, orthography, pronunciations):
     return results
 
 
-def preprocess_utterance(utterance):
+def preprocess_utterance_reference(utterance):
     # Do some normalisation work and split utterance to words
     utterance = utterance.replace(u'AF', u'F')
     utterance = utterance.replace(u'\u0640', u'')
@@ -194,7 +154,55 @@ def preprocess_utterance(utterance):
     return utterance
 
 
-def process_word(word):
+# Compiled form of `preprocess_utterance_reference`, with the same output on
+# every input. The literal rewrites stay `str.replace` calls (a C-level scan
+# each, faster than any Python-level single pass or regex alternation), the
+# regex rules are precompiled, and passes whose trigger characters are
+# absent from the utterance are skipped.
+_hamza_a_start_re = re.compile(u'^>([^auAw])')
+_hamza_a_word_re = re.compile(u' >([^auAw ])')
+_hamza_i_re = re.compile(u'<([^i])')
+_punct_re = re.compile(u'(\\S)([.?,!])')
+_punct_chars = frozenset(u'.?,!')
+
+
+def preprocess_utterance(utterance):
+    # Do some normalisation work and split utterance to words
+    utterance = utterance.replace(u'AF', u'F') \
+        .replace(u'\u0640', u'') \
+        .replace(u'o', u'') \
+        .replace(u'aA', u'A') \
+        .replace(u'aY', u'Y') \
+        .replace(u' A', u' ') \
+        .replace(u'F', u'an') \
+        .replace(u'N', u'un') \
+        .replace(u'K', u'in') \
+        .replace(u'|', u'>A')
+
+    if u'~' in utterance:
+        utterance = utterance.replace('i~', '~i') \
+            .replace('a~', '~a') \
+            .replace('u~', '~u')
+
+    if u'A' in utterance:
+        utterance = utterance.replace(u'Ai', u'<i') \
+            .replace(u'Aa', u'>a') \
+            .replace(u'Au', u'>u')
+    if u'>' in utterance:
+        if utterance[0] == u'>':
+            utterance = _hamza_a_start_re.sub(u'>a\\1', utterance)
+        if u' >' in utterance:
+            utterance = _hamza_a_word_re.sub(u' >a\\1', utterance)
+    if u'<' in utterance:
+        utterance = _hamza_i_re.sub(u'<i\\1', utterance)
+
+    if not _punct_chars.isdisjoint(utterance):
+        utterance = _punct_re.sub(u'\\1 \\2', utterance)
+
+    return utterance.split(u' ')
+
+
+def process_word_reference(word):
 
     if word in punctuation:
         return word
@@ -378,9 +386,208 @@ def process_word(word):
     return pronunciations[0]
 
 
-def process_utterance(utterance):
+# ------------------------------------------------------------------------------------
+# Compiled rule engine-----------------------------------------------------------------
+# ------------------------------------------------------------------------------------
+# Same rules as `process_word_reference`, with the character classes built once
+# as frozensets, and only the first pronunciation variant generated (the only
+# one that is returned). An alternative (list) phone contributes its first
+# entry; shadda doubles the previous phone only if that phone is not an
+# alternative, since doubling the list leaves its first entry unchanged.
+# Note: in the reference, `emphatics + [u'r'""", u'l'"""]` is a single string
+# literal, so Ra and Lam do not keep the emphatic context.
+_consonants_wy = frozenset(consonants + [u'w', u'y'])
+_emphatics = frozenset(emphatics)
+_backward_emphatics = frozenset(emphatics) - frozenset(forwardEmphatics)
+_diacritics = frozenset(diacritics)
+_diacritics_or_vowels = frozenset(diacritics) | frozenset(vowelMap)
+_diacritics_no_shadda = frozenset(diacriticsWithoutShadda)
+_diacritics_no_shadda_ay = _diacritics_no_shadda | {u'A', u'Y'}
+_diacritics_awy = _diacritics | {u'A', u'w', u'y'}
+_consonants_e = frozenset(consonants + [u'e'])
+_consonants_ui = frozenset(consonants + [u'u', u'i'])
+_mild_before = frozenset(unambiguousConsonantMap) | {u'l'}
+_long_vowels = frozenset([u'aa', u'uu0', u'ii0', u'AA', u'UU0', u'II0'])
+_non_fixed_re = re.compile(u'[^h*Ahn\'>wl}kmyTtfd]')
+
+
+def _fixed_pronunciation(word):
+    # first pronunciation `isFixedWord` would add, or None
+    lastLetter = ''
+    if(len(word) > 0):
+        lastLetter = word[-1]
+    if(lastLetter == u'a'):
+        lastLetter = [u'a', u'A']
+    elif(lastLetter == u'A'):
+        lastLetter = [u'aa']
+    elif(lastLetter == u'u'):
+        lastLetter = [u'u0']
+    elif(lastLetter == u'i'):
+        lastLetter = [u'i0']
+    elif(lastLetter in unambiguousConsonantMap):
+        lastLetter = [unambiguousConsonantMap[lastLetter]]
+    fixed = fixedWords.get(_non_fixed_re.sub('', word))
+    if fixed is None:
+        return None
+    if not isinstance(fixed, list):
+        return fixed.split(' ')
+    for pronunciation in fixed:
+        pronunciation = pronunciation.split(' ')
+        if pronunciation[-1] in lastLetter:
+            return pronunciation
+    return None
+
+
+def _merge_duplicates(pronunciation):
+    # house keeping of the reference: merge duplicate vowels, y and w
+    prevLetter = ''
+    toDelete = []
+    for i in range(0, len(pronunciation)):
+        letter = pronunciation[i]
+        if(letter in _long_vowels and prevLetter.lower() == letter[1:].lower()):
+            toDelete.append(i - 1)
+            pronunciation[i] = pronunciation[i - 1][0] + pronunciation[i - 1]
+        if((letter == u'u0' or letter == u'i0') and prevLetter.lower() == letter.lower()):
+            toDelete.append(i - 1)
+            pronunciation[i] = pronunciation[i - 1]
+        if((letter == u'y' or letter == u'w') and prevLetter == letter):
+            pronunciation[i - 1] += pronunciation[i - 1]
+            toDelete.append(i)
+        prevLetter = letter
+    for i in reversed(toDelete):
+        del pronunciation[i]
+    return pronunciation
+
+
+def process_word(word):
+
+    if word in punctuation:
+        return word
+
+    fixed = _fixed_pronunciation(word)
+    if fixed is not None:
+        return _merge_duplicates(fixed)
+
+    emphaticContext = False
+    word = u'bb' + word + u'ee'
+    long_word = len(word) > 7
+
+    phones = []  # first variant of each phone
+    last_alternative = False  # whether phones[-1] came from a list of variants
 
-    utterance = preprocess_utterance(utterance)
+    for index in range(2, len(word) - 2):
+        letter = word[index]
+        letter1 = word[index + 1]
+        letter2 = word[index + 2]
+        letter_1 = word[index - 1]
+        letter_2 = word[index - 2]
+
+        if(letter in _consonants_wy and letter not in _emphatics):
+            emphaticContext = False
+        if(letter in _emphatics):
+            emphaticContext = True
+        if(letter1 in _backward_emphatics):
+            emphaticContext = True
+        variant = 1 if emphaticContext else 0
+
+        if(letter in unambiguousConsonantMap):
+            phones.append(unambiguousConsonantMap[letter])
+            last_alternative = False
+            continue
+
+        if(letter == u'l'):
+            if(letter1 not in _diacritics_or_vowels and letter2 == u'~'):
+                phones.append(u'')  # omit (sun letter)
+            else:
+                phones.append(u'l')
+            last_alternative = False
+        elif(letter == u'~'):
+            if(letter_1 != u'w' and letter_1 != u'y' and phones
+                    and not last_alternative):
+                phones[-1] += phones[-1]
+        elif(letter == u'|'):
+            phones.append(maddaMap[u'|'][variant][0])
+            last_alternative = True
+        elif(letter == u'p'):
+            phones.append(u't' if letter1 in _diacritics else u'')
+            last_alternative = False
+        elif(letter == u'w' or letter == u'y'):
+            last_alternative = False
+            if(letter1 in _diacritics_no_shadda_ay
+                    or (letter1 in (u'w', u'y') and letter2 not in _diacritics_awy)
+                    or (letter_1 in _diacritics_no_shadda and letter1 in _consonants_e)):
+                if((letter == u'w' and letter_1 == u'u' and letter1 not in (u'a', u'i', u'A', u'Y'))
+                        or (letter == u'y' and letter_1 == u'i' and letter1 not in (u'a', u'u', u'A', u'Y'))):
+                    phones.append(vowelMap[letter][variant][0])
+                else:
+                    phones.append(letter)
+                    last_alternative = (letter1 == u'A' and letter == u'w'
+                                        and letter2 == u'e')
+            elif(letter1 == u'~'):
+                if(letter_1 == u'a' or (letter == u'w' and letter_1 in (u'i', u'y'))
+                        or (letter == u'y' and letter_1 in (u'w', u'u'))):
+                    phones.append(letter)
+                else:
+                    phones.append(vowelMap[letter][0][0])
+                phones.append(letter)
+            else:
+                phones.append(vowelMap[letter][variant][0])
+                last_alternative = (letter_1 in _consonants_ui
+                                    and letter1 == u'e')
+        elif(letter == u'u' or letter == u'i'):
+            if(letter1 in _mild_before and letter2 == u'e' and long_word):
+                phones.append(vowelMap[letter][variant][1])
+            else:
+                phones.append(vowelMap[letter][variant][0])
+            last_alternative = False
+        elif(letter == u'a' or letter == u'A' or letter == u'Y'):
+            if(letter == u'A' and letter_1 in (u'w', u'k') and letter_2 == u'b'):
+                phones.append(u'a')
+                last_alternative = True
+            elif(letter == u'A' and letter_1 in (u'u', u'i')):
+                pass
+            elif(letter == u'A' and letter_1 == u'w' and letter1 == u'e'):
+                phones.append(vowelMap[letter][0][0])
+                last_alternative = True
+            elif(letter != u'a' and letter1 == u'e'):
+                phones.append(vowelMap[letter][variant][0])
+                last_alternative = True
+            else:
+                phones.append(vowelMap[letter][variant][0])
+                last_alternative = False
+
+    return _merge_duplicates([phone for phone in phones if phone != u''])
+
+# word -> phonemes of the lexicons or `process_word`; running text repeats
+# words constantly
+word_cache = LRUCache(maxsize=100000)
+
+
+def process_word_cached(word):
+    if word in punctuation:
+        return word
+    phones = word_cache.get(word)
+    if phones is None:
+        phones = lexicon.lookup(word)
+        if phones is None:
+            phones = process_word(word)
+        phones = tuple(phones)
+        word_cache.put(word, phones)
+    # callers extend the returned list, so never hand out the cached entry
+    return list(phones)
+
+
+def utterance_to_phonemes(utterance, reference=False):
+    # phonemes of each word (a list, or a punctuation string for an
+    # utterance starting with punctuation);
+    # reference=True runs the original normaliser and rule engine, uncached
+
+    if reference:
+        utterance = preprocess_utterance_reference(utterance)
+        word_to_phonemes = process_word_reference
+    else:
+        utterance = preprocess_utterance(utterance)
+        word_to_phonemes = process_word_cached
     phonemes = []
 
     for word in utterance:
@@ -388,12 +595,18 @@ def process_utterance(utterance):
             phonemes.append(['sil'])
             continue
 
-        phonemes_word = process_word(word)
+        phonemes_word = word_to_phonemes(word)
         if phonemes_word in punctuation and phonemes:
             phonemes[-1] += phonemes_word
         else:
             phonemes.append(phonemes_word)
 
+    return phonemes
+
+
+def process_utterance(utterance, reference=False):
+
+    phonemes = utterance_to_phonemes(utterance, reference=reference)
     final_sequence = ' + '.join(' '.join(phon for phon in phones)
                                 for phones in phonemes)
 
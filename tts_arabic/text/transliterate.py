@@ -0,0 +1,125 @@
+"""
+Table-driven conversion between Arabic script and Buckwalter
+transliteration.
+
+Two schemes are used in the package:
+    'phonetiser': Scheme of the Buckwalter phonetiser (TTS frontend); thaa'
+        is written `^`
+    'standard': Standard Buckwalter scheme used by the CATT vowelizer; thaa'
+        is written `v`, and it covers tatweel, dagger 'alif, waSla and the
+        lam-alif ligatures
+"""
+
+# Phonetiser scheme ------------------------------------------------------------
+
+arabic_to_buckw_dict = {  # mapping from Arabic script to Buckwalter
+    u'\u0628': u'b', u'\u0630': u'*', u'\u0637': u'T', u'\u0645': u'm',
+    u'\u062a': u't', u'\u0631': u'r', u'\u0638': u'Z', u'\u0646': u'n',
+    u'\u062b': u'^', u'\u0632': u'z', u'\u0639': u'E', u'\u0647': u'h',
+    u'\u062c': u'j', u'\u0633': u's', u'\u063a': u'g', u'\u062d': u'H',
+    u'\u0642': u'q', u'\u0641': u'f', u'\u062e': u'x', u'\u0635': u'S',
+    u'\u0634': u'$', u'\u062f': u'd', u'\u0636': u'D', u'\u0643': u'k',
+    u'\u0623': u'>', u'\u0621': u'\'', u'\u0626': u'}', u'\u0624': u'&',
+    u'\u0625': u'<', u'\u0622': u'|', u'\u0627': u'A', u'\u0649': u'Y',
+    u'\u0629': u'p', u'\u064a': u'y', u'\u0644': u'l', u'\u0648': u'w',
+    u'\u064b': u'F', u'\u064c': u'N', u'\u064d': u'K', u'\u064e': u'a',
+    u'\u064f': u'u', u'\u0650': u'i', u'\u0651': u'~', u'\u0652': u'o'
+}
+
+buckw_to_arabic_dict = {  # mapping from Buckwalter to Arabic script
+    u'b': u'\u0628', u'*': u'\u0630', u'T': u'\u0637', u'm': u'\u0645',
+    u't': u'\u062a', u'r': u'\u0631', u'Z': u'\u0638', u'n': u'\u0646',
+    u'^': u'\u062b', u'z': u'\u0632', u'E': u'\u0639', u'h': u'\u0647',
+    u'j': u'\u062c', u's': u'\u0633', u'g': u'\u063a', u'H': u'\u062d',
+    u'q': u'\u0642', u'f': u'\u0641', u'x': u'\u062e', u'S': u'\u0635',
+    u'$': u'\u0634', u'd': u'\u062f', u'D': u'\u0636', u'k': u'\u0643',
+    u'>': u'\u0623', u'\'': u'\u0621', u'}': u'\u0626', u'&': u'\u0624',
+    u'<': u'\u0625', u'|': u'\u0622', u'A': u'\u0627', u'Y': u'\u0649',
+    u'p': u'\u0629', u'y': u'\u064a', u'l': u'\u0644', u'w': u'\u0648',
+    u'F': u'\u064b', u'N': u'\u064c', u'K': u'\u064d', u'a': u'\u064e',
+    u'u': u'\u064f', u'i': u'\u0650', u'~': u'\u0651', u'o': u'\u0652'
+}
+
+# Standard scheme --------------------------------------------------------------
+
+buck2uni = {
+            "'": u"\u0621", # hamza-on-the-line
+            "|": u"\u0622", # madda
+            ">": u"\u0623", # hamza-on-'alif
+            "&": u"\u0624", # hamza-on-waaw
+            "<": u"\u0625", # hamza-under-'alif
+            "}": u"\u0626", # hamza-on-yaa'
+            "A": u"\u0627", # bare 'alif
+            "b": u"\u0628", # baa'
+            "p": u"\u0629", # taa' marbuuTa
+            "t": u"\u062A", # taa'
+            "v": u"\u062B", # thaa'
+            "j": u"\u062C", # jiim
+            "H": u"\u062D", # Haa'
+            "x": u"\u062E", # khaa'
+            "d": u"\u062F", # daal
+            "*": u"\u0630", # dhaal
+            "r": u"\u0631", # raa'
+            "z": u"\u0632", # zaay
+            "s": u"\u0633", # siin
+            "$": u"\u0634", # shiin
+            "S": u"\u0635", # Saad
+            "D": u"\u0636", # Daad
+            "T": u"\u0637", # Taa'
+            "Z": u"\u0638", # Zaa' (DHaa')
+            "E": u"\u0639", # cayn
+            "g": u"\u063A", # ghayn
+            "_": u"\u0640", # taTwiil
+            "f": u"\u0641", # faa'
+            "q": u"\u0642", # qaaf
+            "k": u"\u0643", # kaaf
+            "l": u"\u0644", # laam
+            "m": u"\u0645", # miim
+            "n": u"\u0646", # nuun
+            "h": u"\u0647", # haa'
+            "w": u"\u0648", # waaw
+            "Y": u"\u0649", # 'alif maqSuura
+            "y": u"\u064A", # yaa'
+            "F": u"\u064B", # fatHatayn
+            "N": u"\u064C", # Dammatayn
+            "K": u"\u064D", # kasratayn
+            "a": u"\u064E", # fatHa
+            "u": u"\u064F", # Damma
+            "i": u"\u0650", # kasra
+            "~": u"\u0651", # shaddah
+            "o": u"\u0652", # sukuun
+            "`": u"\u0670", # dagger 'alif
+            "{": u"\u0671", # waSla
+}
+
+# reverse transliteration (Unicode -> Buckwalter)
+uni2buck = {value: key for key, value in buck2uni.items()}
+
+# add special characters
+uni2buck[u"\ufefb"] = "lA"
+uni2buck[u"\ufef7"] = "l>"
+uni2buck[u"\ufef5"] = "l|"
+uni2buck[u"\ufef9"] = "l<"
+_tables = {
+    'phonetiser': (str.maketrans(arabic_to_buckw_dict),
+                   str.maketrans(buckw_to_arabic_dict)),
+    'standard': (str.maketrans(uni2buck), str.maketrans(buck2uni)),
+}
+
+
+def _scheme_tables(scheme):
+    try:
+        return _tables[scheme]
+    except KeyError:
+        raise ValueError(f"unknown transliteration scheme {scheme!r}, "
+                         f"expected one of {list(_tables)}") from None
+
+
+def arabic_to_buckwalter(text: str, scheme: str = 'phonetiser') -> str:
+    """Transliterate Arabic script to Buckwalter; other characters are kept."""
+    return text.translate(_scheme_tables(scheme)[0])
+
+
+def buckwalter_to_arabic(text: str, scheme: str = 'phonetiser') -> str:
+    """Transliterate Buckwalter to Arabic script; other characters are kept."""
+    return text.translate(_scheme_tables(scheme)[1])
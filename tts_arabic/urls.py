@@ -1,23 +1,27 @@
 
 files_dict = {
     # TEXT->MEL MODELS
+    # 'n_speakers': number of speaker ids the model accepts
     # FASTPITCH
     'fastpitch': {
         'file': 'data/fp_ms.onnx',
         # 'url': 'https://drive.google.com/file/d/10zcWAgtINnIdmbfMdSm990-7l5znvARN/view?usp=sharing'
         'url': 'https://drive.google.com/file/d/1pD210QTN1IL3CTA1D65ldKB7ooZ2hANl/view?usp=sharing',
         'timestamp': 1716497335.55365,
+        'n_speakers': 4,
     },
     # MIXER-TTS
     'mixer128': {
         'file': 'data/mixer128.onnx',       
         'url': 'https://drive.google.com/file/d/1Aki7_E5KRzWTWG8721xl7-SZQ2bE5U19/view?usp=sharing',
         'timestamp': 1726860021.220658,
+        'n_speakers': 4,
     },    
     'mixer80': {
         'file': 'data/mixer80.onnx',       
         'url': 'https://drive.google.com/file/d/1C95RVIjhVttC8pdFAp1TOiEee9Cq50c8/view?usp=sharing',
         'timestamp': 1726860053.0813353,
+        'n_speakers': 4,
     },
     
     # VOCODER MODELS
@@ -60,5 +64,31 @@ files_dict = {
         'url': 'https://drive.google.com/file/d/15fUlilIt6hp_glYAOpSGlb4zWurErUjn/view?usp=sharing',
         'timestamp': 1713987119.2601905,
     },
- 
+
+    # DYNAMICALLY QUANTIZED (INT8) VARIANTS
+    # built locally from 'source' on first use, see models/quantize.py
+    'fastpitch-int8': {
+        'file': 'data/fp_ms.int8.onnx',
+        'source': 'fastpitch',
+    },
+    'mixer128-int8': {
+        'file': 'data/mixer128.int8.onnx',
+        'source': 'mixer128',
+    },
+    'mixer80-int8': {
+        'file': 'data/mixer80.int8.onnx',
+        'source': 'mixer80',
+    },
+    'hifigan-int8': {
+        'file': 'data/hifigan.int8.onnx',
+        'source': 'hifigan',
+    },
+    'vocos-int8': {
+        'file': 'data/vocos22.int8.onnx',
+        'source': 'vocos',
+    },
+    'vocos44-int8': {
+        'file': 'data/vocos44.int8.onnx',
+        'source': 'vocos44',
+    },
 }
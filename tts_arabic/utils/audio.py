@@ -1,7 +1,8 @@
+import struct
 import wave
 import numpy as np
 
-from typing import Literal
+from typing import Literal, Optional
 
 
 def save_wave(audio_data: np.ndarray,
@@ -19,28 +20,18 @@ def save_wave(audio_data: np.ndarray,
         normalize (bool):    
 
     """
-    assert bits_per_sample in (8, 16, 24, 32)
     assert audio_data.ndim == 1
 
     # Define the parameters of the audio file
     channels = 1  # Mono audio
 
     sample_width = bits_per_sample // 8
-    int_value_max = (256**sample_width) // 2 - 1
 
     audio_abs_max = np.abs(audio_data).max()
     if audio_abs_max > 1 or normalize:
         audio_data /= audio_abs_max
 
-    # Normalize the audio data to fit within the range of the chosen bit depth
-    audio_data = audio_data * int_value_max
-
-    if bits_per_sample == 24:
-        audio_data = audio_data.astype(np.int32)
-        audio_bytes = audio_data.astype("<i4").view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
-    else:
-        audio_type = {1: np.int8, 2: np.int16, 4: np.int32}[sample_width]
-        audio_bytes = audio_data.astype(audio_type).tobytes()
+    audio_bytes = to_pcm(audio_data, bits_per_sample)
 
     # Create a new wave file
     with wave.open(audio_path, 'wb') as wav_file:
@@ -48,3 +39,60 @@ def save_wave(audio_data: np.ndarray,
         wav_file.setsampwidth(sample_width)
         wav_file.setframerate(sample_rate)
         wav_file.writeframes(audio_bytes)
+
+
+def to_pcm(audio_data: np.ndarray,
+           bits_per_sample: Literal[8, 16, 24, 32] = 16,
+           ) -> bytes:
+    """
+    Args:
+        audio_data (ndarray): Samples in [-1, 1], shape [n_samples]; samples
+            outside are clipped
+        bits_per_sample (int): 8, 16, 24 or 32 bits per sample
+
+    Returns:
+        (bytes): Little-endian signed integer PCM
+    """
+    assert bits_per_sample in (8, 16, 24, 32)
+    sample_width = bits_per_sample // 8
+    int_value_max = (256**sample_width) // 2 - 1
+
+    # Normalize the audio data to fit within the range of the chosen bit
+    # depth; clipped first, out-of-range samples would wrap around
+    audio_data = np.clip(audio_data, -1., 1.) * int_value_max
+
+    if bits_per_sample == 24:
+        audio_data = audio_data.astype(np.int32)
+        return audio_data.astype("<i4").view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    audio_type = {1: np.int8, 2: np.int16, 4: np.int32}[sample_width]
+    return audio_data.astype(audio_type).tobytes()
+
+
+def wav_header(sample_rate: int = 22050,
+               bits_per_sample: Literal[8, 16, 24, 32] = 16,
+               n_bytes: Optional[int] = None,
+               ) -> bytes:
+    """
+    Header of a mono PCM WAV file with `n_bytes` bytes of samples. Without
+    `n_bytes` (streaming), the sizes are set to their maximum value, which
+    most players read as "until the end of the stream".
+    """
+    block_align = bits_per_sample // 8
+    data_size = 0xFFFFFFFF - 36 if n_bytes is None else n_bytes
+    return b''.join((
+        b'RIFF', struct.pack('<I', 36 + data_size), b'WAVE',
+        b'fmt ', struct.pack('<IHHIIHH', 16, 1, 1, sample_rate,
+                             sample_rate*block_align, block_align,
+                             bits_per_sample),
+        b'data', struct.pack('<I', data_size)))
+
+
+def to_wav(audio_data: np.ndarray,
+           sample_rate: int = 22050,
+           bits_per_sample: Literal[8, 16, 24, 32] = 16,
+           ) -> bytes:
+    """In-memory counterpart of `save_wave` (samples beyond [-1, 1] are
+    clipped instead of normalized)."""
+    audio_bytes = to_pcm(audio_data, bits_per_sample)
+    return wav_header(sample_rate, bits_per_sample,
+                      len(audio_bytes)) + audio_bytes
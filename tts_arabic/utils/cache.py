@@ -0,0 +1,213 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Hashable, Iterable, Optional, Tuple, Union
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded mapping with least-recently-used eviction and
+    hit/miss counters.
+
+    Args:
+        maxsize (int): Optional; Max number of entries, `None` for unbounded
+    """
+
+    def __init__(self, maxsize: Optional[int] = 1024) -> None:
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            self._trim()
+
+    def update(self, items: Iterable[Tuple[Hashable, Any]]) -> None:
+        """Insert `(key, value)` pairs without touching the counters."""
+        with self._lock:
+            for key, value in items:
+                self._data[key] = value
+                self._data.move_to_end(key)
+            self._trim()
+
+    def items(self) -> list:
+        """Entries from least to most recently used."""
+        with self._lock:
+            return list(self._data.items())
+
+    def resize(self, maxsize: Optional[int]) -> None:
+        with self._lock:
+            self.maxsize = maxsize
+            self._trim()
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self._hits = self._misses = 0
+
+    def info(self) -> dict:
+        """
+        Returns:
+            (dict): `hits`, `misses`, `hit_rate`, `size` and `maxsize`
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {'hits': self._hits,
+                    'misses': self._misses,
+                    'hit_rate': self._hits / lookups if lookups else 0.,
+                    'size': len(self._data),
+                    'maxsize': self.maxsize}
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def _trim(self):
+        if self.maxsize is None:
+            return
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+_DISK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    atime REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_atime ON cache (atime);
+"""
+
+
+class DiskCache:
+    """
+    Key -> bytes store in a sqlite file that several processes can read and
+    write at the same time (write-ahead logging, waiting up to `timeout`
+    seconds for a lock). With `max_bytes`, the least recently used entries
+    are deleted when the stored values exceed that size. Once closed, lookups
+    miss and stores are dropped, so that a caller still holding a replaced
+    cache does not fail.
+
+    Args:
+        path (str): Path of the sqlite file (created if missing)
+        max_bytes (int): Optional; Max total size of the values
+        timeout (float): Optional; Seconds to wait for a locked database
+    """
+
+    def __init__(self,
+                 path: Union[str, Path],
+                 max_bytes: Optional[int] = None,
+                 timeout: float = 30.,
+                 ) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path.as_posix(), timeout=timeout,
+                                     check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_DISK_SCHEMA)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            if self.max_bytes is not None:
+                self._conn.execute(
+                    "UPDATE cache SET atime = ? WHERE key = ?",
+                    (time.time(), key))
+            return row[0]
+
+    def put(self, key: str, value: bytes) -> None:
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()))
+            if self.max_bytes is not None:
+                self._trim()
+
+    def clear(self) -> None:
+        """Delete all entries and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._hits = self._misses = 0
+
+    def info(self) -> dict:
+        """
+        Returns:
+            (dict): `hits`, `misses`, `hit_rate` (of this process), `size`,
+                `nbytes` and `max_bytes`
+        """
+        with self._lock:
+            size, nbytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+                ).fetchone()
+            lookups = self._hits + self._misses
+            return {'hits': self._hits,
+                    'misses': self._misses,
+                    'hit_rate': self._hits / lookups if lookups else 0.,
+                    'size': size,
+                    'nbytes': nbytes,
+                    'max_bytes': self.max_bytes}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _trim(self):
+        nbytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if nbytes <= self.max_bytes:
+            return
+        # drop the oldest entries until the values fit again
+        excess = nbytes - self.max_bytes
+        keys = []
+        for key, size in self._conn.execute(
+                "SELECT key, size FROM cache ORDER BY atime"):
+            keys.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", keys)
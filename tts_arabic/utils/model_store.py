@@ -0,0 +1,356 @@
+"""
+Model store: resolves `files_dict` names to local files and fetches missing
+ones safely.
+
+Files live under a root directory (by default the package folder, so that
+the paths `data/*.onnx` of `files_dict` are unchanged), which can be moved
+with `set_store_dir` or the `TTS_ARABIC_HOME` environment variable.
+
+A missing file is fetched by one process at a time: the fetch holds an
+exclusive lock on `<file>.lock`, writes to a temporary file in the same
+folder, verifies it and renames it into place, so that concurrent workers
+either wait for the download or find the complete file, never a partial
+one. Files are verified against the `sha256` entry of `files_dict` when
+there is one; otherwise the hash of the first download is recorded in
+`<file>.sha256` and later checked by `verify_models`.
+
+Sources, in order: a derived model (`source` entry, e.g. INT8 variants) is
+built from its source model; with a mirror (`set_mirror` or
+`TTS_ARABIC_MIRROR`, a `file://` or `http(s)://` base URL), the file name
+is fetched from the mirror; otherwise the `url` of `files_dict` is used
+(Google Drive links through gdown). In offline mode (`set_offline` or
+`TTS_ARABIC_OFFLINE=1`) nothing is fetched and a missing file raises
+`FileNotFoundError`.
+
+In synthetic mode (`set_synthetic` or `TTS_ARABIC_SYNTHETIC=tiny|realistic`),
+missing files are generated by `models.synthetic` (random-weight graphs
+with the I/O signatures of the real models) in a separate root,
+`<store dir, TTS_ARABIC_HOME or ~/.cache/tts_arabic>/synthetic/<preset>`
+(never the package folder), so that the pipeline runs without network
+access and never mixes stand-ins with real models; checksums are not
+recorded for them.
+"""
+import hashlib
+import os
+import shutil
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+from urllib.parse import unquote, urlsplit
+
+from ..urls import files_dict
+
+# seconds a mirror/URL fetch may stall (per socket operation) before it
+# fails, so that a dead connection does not hold the file lock forever
+FETCH_TIMEOUT = 60
+
+_store_dir = None
+_mirror = None
+_offline = None
+_synthetic = None
+
+
+class FileLock:
+    """
+    Exclusive inter-process lock on a lock file (fcntl on POSIX, msvcrt on
+    Windows), usable as a context manager.
+
+    Args:
+        path (str): Lock file (created if missing)
+        timeout (float): Optional; Seconds to wait before raising
+            `TimeoutError`, `None` to wait forever
+    """
+
+    def __init__(self,
+                 path: Union[str, Path],
+                 timeout: Optional[float] = None,
+                 ) -> None:
+        self.path = Path(path)
+        self.timeout = timeout
+        self._file = None
+
+    def acquire(self) -> None:
+        time_end = None if self.timeout is None \
+            else time.monotonic() + self.timeout
+        self._file = open(self.path, 'a+b')
+        while True:
+            try:
+                self._lock()
+                return
+            except OSError:
+                if time_end is not None and time.monotonic() > time_end:
+                    self._file.close()
+                    self._file = None
+                    raise TimeoutError(f"could not lock {self.path}")
+                time.sleep(0.05)
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        try:
+            self._unlock()
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+    if os.name == 'nt':
+        def _lock(self):
+            import msvcrt
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+
+        def _unlock(self):
+            import msvcrt
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        def _lock(self):
+            import fcntl
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        def _unlock(self):
+            import fcntl
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+
+def store_dir() -> Path:
+    """Root folder the `files_dict` paths are relative to."""
+    preset = synthetic_preset()
+    if preset is not None:
+        # stand-ins always live under `synthetic/`, apart from real models
+        home = _store_dir or os.environ.get('TTS_ARABIC_HOME') \
+            or '~/.cache/tts_arabic'
+        return Path(home).expanduser().joinpath('synthetic', preset)
+    if _store_dir is not None:
+        return _store_dir
+    if os.environ.get('TTS_ARABIC_HOME'):
+        return Path(os.environ['TTS_ARABIC_HOME']).expanduser()
+    return Path(__file__).parent.parent
+
+
+def set_store_dir(path: Optional[Union[str, Path]]) -> None:
+    """Move the store root (`None` restores the default)."""
+    global _store_dir
+    _store_dir = Path(path).expanduser() if path is not None else None
+
+
+def set_mirror(url: Optional[str]) -> None:
+    """Fetch files from `<url>/<file name>` (`None` restores `files_dict`)."""
+    global _mirror
+    _mirror = url
+
+
+def set_offline(offline: Optional[bool] = True) -> None:
+    """Never fetch files (`None` restores the environment setting)."""
+    global _offline
+    _offline = offline
+
+
+def is_offline() -> bool:
+    if _offline is not None:
+        return _offline
+    return os.environ.get('TTS_ARABIC_OFFLINE', '0') not in ('', '0')
+
+
+def set_synthetic(preset: Optional[str] = 'tiny') -> None:
+    """
+    Use synthetic stand-in models (`tiny` or `realistic`, see
+    `models.synthetic.PRESETS`); `None` restores the environment setting.
+    """
+    global _synthetic
+    _synthetic = preset
+
+
+def synthetic_preset() -> Optional[str]:
+    """Preset of the synthetic models in use, `None` for the real models."""
+    preset = _synthetic if _synthetic is not None \
+        else os.environ.get('TTS_ARABIC_SYNTHETIC')
+    if preset in (None, '', '0', 'false'):
+        return None
+    if preset not in ('tiny', 'realistic'):
+        raise ValueError(f"unknown synthetic preset {preset!r}")
+    return preset
+
+
+def model_version(name: Optional[str]) -> Optional[Union[float, str]]:
+    """
+    Version of the weights of a `files_dict` entry for cache keys: its
+    (source's) timestamp, or the synthetic preset.
+    """
+    if name is None:
+        return None
+    preset = synthetic_preset()
+    if preset is not None:
+        return f"synthetic-{preset}"
+    entry = files_dict[name]
+    return files_dict[entry.get('source', name)].get('timestamp')
+
+
+def model_path(name: str, root: Optional[Union[str, Path]] = None) -> Path:
+    """Local path of a `files_dict` entry, whether it exists or not."""
+    root = store_dir() if root is None else Path(root)
+    return root.joinpath(files_dict[name]['file'])
+
+
+def file_sha256(path: Union[str, Path], block_size: int = 2**20) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def _expected_sha256(name: str, path: Path) -> Optional[str]:
+    expected = files_dict[name].get('sha256')
+    if expected is None:
+        recorded = path.with_name(path.name + '.sha256')
+        if recorded.exists():
+            expected = recorded.read_text().split()[0]
+    return expected
+
+
+def _fetch_url(url: str, output_path: Path) -> None:
+    scheme = urlsplit(url).scheme
+    if scheme == 'file':
+        shutil.copyfile(unquote(urlsplit(url).path), output_path)
+    elif 'drive.google.com' in url:
+        import gdown
+        from packaging.version import Version
+        if Version(gdown.__version__) < Version("6"):
+            gdown.download(url, output=output_path.as_posix(), fuzzy=True)
+        else:
+            gdown.download(url, output=output_path.as_posix())
+        if not output_path.exists():
+            raise OSError(f"download of {url} failed")
+    elif scheme in ('http', 'https'):
+        with urllib.request.urlopen(url, timeout=FETCH_TIMEOUT) as response, \
+                open(output_path, 'wb') as f:
+            shutil.copyfileobj(response, f, 2**20)
+    else:
+        raise ValueError(f"unsupported url {url!r}")
+
+
+def _fetch(name: str, path: Path, root: Optional[Path]) -> None:
+    entry = files_dict[name]
+    tmp_path = path.with_name(
+        f"{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    synthetic = synthetic_preset()
+    try:
+        if 'source' in entry:
+            # derived (quantized) variant, built from the source model
+            from ..models.quantize import quantize_model
+            quantize_model(get_model_path(entry['source'], root=root),
+                           tmp_path)
+        elif synthetic is not None:
+            from ..models.synthetic import write_model
+            write_model(name, tmp_path, preset=synthetic)
+        else:
+            mirror = _mirror or os.environ.get('TTS_ARABIC_MIRROR')
+            url = entry['url'] if not mirror else \
+                f"{mirror.rstrip('/')}/{Path(entry['file']).name}"
+            _fetch_url(url, tmp_path)
+
+        sha256 = file_sha256(tmp_path)
+        expected = entry.get('sha256') if synthetic is None else None
+        if expected is not None and sha256 != expected:
+            raise OSError(f"{name}: checksum mismatch ({sha256}, "
+                          f"expected {expected})")
+        os.replace(tmp_path, path)
+        if expected is None and 'source' not in entry \
+                and synthetic is None:
+            # trust on first use; checked by verify_models
+            path.with_name(path.name + '.sha256').write_text(
+                f"{sha256}  {path.name}\n")
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def get_model_path(name: str,
+                   root: Optional[Union[str, Path]] = None,
+                   lock_timeout: Optional[float] = None,
+                   ) -> str:
+    """
+    Local path of a `files_dict` entry, fetching the file first if needed.
+
+    Parameters:
+        name (str): `files_dict` name, e.g. `fastpitch` or `hifigan-int8`
+        root (str): Optional; Store root, by default `store_dir()`
+        lock_timeout (float): Optional; Max seconds to wait for another
+            process fetching the same file
+
+    Returns:
+        (str): Path of the complete file
+    """
+    path = model_path(name, root)
+    if path.exists():
+        return path.as_posix()
+    if is_offline() and synthetic_preset() is None:
+        raise FileNotFoundError(
+            f"{name}: {path} is missing and the model store is offline "
+            "(run `tts-arabic prefetch` while online)")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with FileLock(path.with_name(path.name + '.lock'), timeout=lock_timeout):
+        # another process may have fetched the file while we waited
+        if not path.exists():
+            _fetch(name, path, root)
+    return path.as_posix()
+
+
+def verify_models(names: Optional[Sequence[str]] = None) -> Dict[str, str]:
+    """
+    Check present files against their `files_dict` or recorded checksums.
+
+    Returns:
+        (dict): `ok`, `mismatch`, `missing` or `unchecked` per name
+    """
+    status = {}
+    for name in names or files_dict:
+        path = model_path(name)
+        expected = _expected_sha256(name, path)
+        if not path.exists():
+            status[name] = 'missing'
+        elif expected is None:
+            status[name] = 'unchecked'
+        else:
+            status[name] = 'ok' if file_sha256(path) == expected \
+                else 'mismatch'
+    return status
+
+
+def prefetch(names: Optional[Sequence[str]] = None,
+             workers: int = 4,
+             ) -> Dict[str, str]:
+    """
+    Fetch models into the store in parallel, by default all downloadable
+    (non-derived) ones.
+
+    Returns:
+        (dict): Path, or the error message, per name
+    """
+    if names is None:
+        names = [name for name, entry in files_dict.items()
+                 if 'source' not in entry]
+
+    def fetch(name):
+        try:
+            return get_model_path(name)
+        except Exception as exc:
+            return f"error: {exc}"
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(names, executor.map(fetch, names)))
+
+
+def stored_models() -> List[str]:
+    return [name for name in files_dict if model_path(name).exists()]
@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class ModelRegistry:
+    """
+    Process-wide, thread-safe cache of loaded models.
+
+    Models are stored under hashable keys such as
+    `('tts', model_id, vocoder_id, device)` and loaded on first use.
+    Concurrent requests for a key that is being loaded wait for that single
+    load; different keys load in parallel. Entries are evicted in
+    least-recently-used order when more than `max_models` models or more
+    than `max_bytes` bytes are held, and entries that have not been used for
+    `ttl` seconds are dropped on the next access to the registry.
+
+    Args:
+        max_models (int): Optional; Max number of models held at once
+        max_bytes (int): Optional; Memory budget, in bytes, as reported by
+            the `nbytes` function passed to `get`
+        ttl (float): Optional; Idle time in seconds after which a model is
+            evicted
+    """
+
+    def __init__(self,
+                 max_models: Optional[int] = 8,
+                 max_bytes: Optional[int] = None,
+                 ttl: Optional[float] = None,
+                 ) -> None:
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> [model, nbytes, last_used]
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'loads': 0, 'load_time': 0.,
+                       'evictions': 0}
+
+    def configure(self,
+                  max_models: Optional[int] = None,
+                  max_bytes: Optional[int] = None,
+                  ttl: Optional[float] = None,
+                  ) -> None:
+        """Set the eviction limits (`None` means unlimited) and apply them."""
+        with self._lock:
+            self.max_models = max_models
+            self.max_bytes = max_bytes
+            self.ttl = ttl
+            self._evict()
+
+    def get(self,
+            key: Hashable,
+            loader: Callable[[], Any],
+            nbytes: Optional[Callable[[Any], int]] = None,
+            ) -> Any:
+        """
+        Args:
+            key: Registry key of the model
+            loader: Called without arguments to load the model on a miss
+            nbytes: Optional; Called with the loaded model to get its
+                memory footprint in bytes
+
+        Returns:
+            The cached or newly loaded model
+        """
+        with self._lock:
+            model = self._lookup(key)
+            if model is not None:
+                return model
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                # another thread may have loaded it in the meantime
+                model = self._lookup(key)
+                if model is not None:
+                    return model
+
+            time_start = time.perf_counter()
+            model = loader()
+            load_time = time.perf_counter() - time_start
+            size = nbytes(model) if nbytes is not None else 0
+
+            with self._lock:
+                self._entries[key] = [model, size, time.monotonic()]
+                self._key_locks.pop(key, None)
+                self._stats['loads'] += 1
+                self._stats['load_time'] += load_time
+                self._evict(keep=key)
+        return model
+
+    def evict(self, key: Hashable) -> bool:
+        """Remove a model from the registry. Returns False if not present."""
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return False
+            self._stats['evictions'] += 1
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats['evictions'] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            (dict): Counters (`hits`, `loads`, `evictions`, `load_time`),
+                the number of held models, their total `nbytes` and the
+                held `keys` from least to most recently used
+        """
+        with self._lock:
+            self._evict()
+            return dict(self._stats,
+                        models=len(self._entries),
+                        nbytes=sum(e[1] for e in self._entries.values()),
+                        keys=list(self._entries))
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def _lookup(self, key):
+        self._evict()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        entry[2] = time.monotonic()
+        self._entries.move_to_end(key)
+        self._stats['hits'] += 1
+        return entry[0]
+
+    def _evict(self, keep=None):
+        if self.ttl is not None:
+            now = time.monotonic()
+            for key in [k for k, e in self._entries.items()
+                        if now - e[2] > self.ttl and k != keep]:
+                del self._entries[key]
+                self._stats['evictions'] += 1
+
+        def over_budget():
+            if self.max_models is not None \
+                    and len(self._entries) > self.max_models:
+                return True
+            return self.max_bytes is not None \
+                and sum(e[1] for e in self._entries.values()) > self.max_bytes
+
+        for key in list(self._entries):
+            if not over_budget():
+                break
+            if key == keep:
+                continue
+            del self._entries[key]
+            self._stats['evictions'] += 1
+
+
+# shared by tts() and vocalize()
+model_registry = ModelRegistry()
@@ -0,0 +1,274 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence, Union
+
+import onnxruntime as ort
+
+_Providers = List[Union[str, tuple]]
+
+# live sessions by (model file, providers, options); entries disappear when
+# the last model holding a session is garbage collected
+_sessions = weakref.WeakValueDictionary()
+_sessions_lock = threading.Lock()
+# one lock per key being created, so that sessions of different models
+# load in parallel
+_key_locks = {}
+_session_counts = Counter()
+_env_allocator_registered = False
+
+
+def _provider_name(provider: Union[str, tuple]) -> str:
+    return provider[0] if isinstance(provider, tuple) else provider
+
+
+def active_provider(providers: _Providers) -> str:
+    """First requested execution provider that is available."""
+    available = ort.get_available_providers()
+    for provider in providers:
+        if _provider_name(provider) in available:
+            return _provider_name(provider)
+    return 'CPUExecutionProvider'
+
+
+def optimized_model_path(model_path: Union[str, Path],
+                         providers: _Providers
+                         ) -> Path:
+    """
+    Path of the optimized artifact of `model_path` for the given providers.
+
+    The artifact is stored next to the model and keyed by the onnxruntime
+    version, the active execution provider and the size and mtime of the
+    model file (so that an updated model gets a new artifact), e.g.
+    `data/fp_ms.ort-1.17.1-cpu-3f2a9c1e.ort`. CPU artifacts use the ORT
+    format, other providers an optimized ONNX graph.
+    """
+    model_path = Path(model_path)
+    provider = active_provider(providers)
+    tag = provider.replace('ExecutionProvider', '').lower()
+    suffix = '.ort' if provider == 'CPUExecutionProvider' else '.onnx'
+    stat = model_path.stat()
+    source_id = hashlib.sha256(
+        f"{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:8]
+    return model_path.with_name(
+        f"{model_path.stem}.ort-{ort.__version__}-{tag}-{source_id}{suffix}")
+
+
+def build_optimized_model(model_path: Union[str, Path],
+                          providers: _Providers
+                          ) -> Path:
+    """
+    Run graph optimization for `model_path` once and save the result to
+    `optimized_model_path(model_path, providers)`, unless it already exists.
+
+    Artifacts are optimized up to `ORT_ENABLE_EXTENDED`: the layout
+    optimizations of `ORT_ENABLE_ALL` (e.g. NCHWc) depend on the CPU, so
+    they are applied when the artifact is loaded instead of being persisted.
+    """
+    artifact_path = optimized_model_path(model_path, providers)
+    if artifact_path.exists():
+        return artifact_path
+
+    sess_options = ort.SessionOptions()
+    sess_options.graph_optimization_level = \
+        ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    if artifact_path.suffix == '.ort':
+        sess_options.add_session_config_entry(
+            'session.save_model_format', 'ORT')
+    # write to a temporary file first, so that concurrent processes never
+    # load a partially written artifact
+    tmp_path = artifact_path.with_name(
+        f"{artifact_path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}"
+        f".tmp{artifact_path.suffix}")
+    sess_options.optimized_model_filepath = tmp_path.as_posix()
+    try:
+        ort.InferenceSession(Path(model_path).as_posix(), sess_options,
+                             providers=providers)
+        os.replace(tmp_path, artifact_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return artifact_path
+
+
+def _register_env_allocator() -> None:
+    """
+    Register a process-wide CPU arena allocator (once), which sessions
+    created with `session.use_env_allocators` share instead of each growing
+    its own arena.
+    """
+    global _env_allocator_registered
+    if _env_allocator_registered:
+        return
+    mem_info = ort.OrtMemoryInfo('Cpu', ort.OrtAllocatorType.ORT_ARENA_ALLOCATOR,
+                                 0, ort.OrtMemType.DEFAULT)
+    # grow by what is requested: the arena serves many models of
+    # different sizes, power-of-two growth would over-allocate
+    ort.create_and_register_allocator(
+        mem_info, ort.OrtArenaCfg({'arena_extend_strategy': 1}))
+    _env_allocator_registered = True
+
+
+def sharing_enabled() -> bool:
+    """False if the environment variable `TTS_ARABIC_SHARE_SESSIONS=0`."""
+    return os.environ.get('TTS_ARABIC_SHARE_SESSIONS', '1') != '0'
+
+
+def _new_session(sd_path, providers, optimize, share):
+    sess_options = ort.SessionOptions()
+    if share:
+        sess_options.add_session_config_entry('session.use_env_allocators',
+                                              '1')
+    if not optimize:
+        return ort.InferenceSession(Path(sd_path).as_posix(), sess_options,
+                                    providers=providers)
+
+    artifact_path = build_optimized_model(sd_path, providers)
+    # the artifact is already optimized for this provider, except for the
+    # CPU-specific layout optimizations
+    sess_options.graph_optimization_level = \
+        ort.GraphOptimizationLevel.ORT_ENABLE_ALL \
+        if artifact_path.suffix == '.ort' \
+        else ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+    return ort.InferenceSession(artifact_path.as_posix(), sess_options,
+                                providers=providers)
+
+
+def create_session(sd_path: Union[str, Path],
+                   providers: _Providers,
+                   optimize: Optional[bool] = None,
+                   share: Optional[bool] = None,
+                   ) -> ort.InferenceSession:
+    """
+    Create an ONNX Runtime session, or return the live session already
+    created for the same model file, providers and options.
+
+    Pipelines that use the same model (e.g. `fastpitch+hifigan` and
+    `mixer128+hifigan`) thus share one vocoder and one denoiser session,
+    and shared sessions allocate from one process-wide CPU arena.
+    ONNX Runtime sessions are safe to run from several threads.
+
+    Args:
+        sd_path (str): Path of the ONNX model
+        providers (list): Execution providers, in order of preference
+        optimize (bool): Optional; Load a persisted optimized graph built
+            with `build_optimized_model` (and build it on first use) instead
+            of optimizing the raw graph on every start. Defaults to the
+            `TTS_ARABIC_OPTIMIZE` environment variable being set to `1`.
+        share (bool): Optional; Reuse live sessions and the shared
+            allocator. Defaults to `sharing_enabled()`.
+
+    Returns:
+        (InferenceSession): Session
+    """
+    if optimize is None:
+        optimize = os.environ.get('TTS_ARABIC_OPTIMIZE', '0') == '1'
+    if share is None:
+        share = sharing_enabled()
+    if not share:
+        with _sessions_lock:
+            _session_counts['created'] += 1
+        return _new_session(sd_path, providers, optimize, share=False)
+
+    key = (Path(sd_path).resolve().as_posix(),
+           json.dumps(providers, sort_keys=True, default=str),
+           bool(optimize))
+    with _sessions_lock:
+        ort_sess = _sessions.get(key)
+        if ort_sess is not None:
+            _session_counts['reused'] += 1
+            return ort_sess
+        _register_env_allocator()
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    # created outside the global lock; callers of the same key wait here
+    with key_lock:
+        try:
+            with _sessions_lock:
+                ort_sess = _sessions.get(key)
+                if ort_sess is not None:
+                    _session_counts['reused'] += 1
+                    return ort_sess
+            ort_sess = _new_session(sd_path, providers, optimize, share=True)
+            with _sessions_lock:
+                _sessions[key] = ort_sess
+                _session_counts['created'] += 1
+        finally:
+            # later callers find the session; the waiting ones hold the lock
+            with _sessions_lock:
+                if _key_locks.get(key) is key_lock:
+                    del _key_locks[key]
+    return ort_sess
+
+
+def session_info() -> dict:
+    """
+    Returns:
+        (dict): Number of sessions `created` and `reused` by
+            `create_session`, and the model files of the `live` shared ones
+    """
+    with _sessions_lock:
+        live = sorted(Path(path).name for path, _, _ in _sessions.keys())
+    return {'created': _session_counts['created'],
+            'reused': _session_counts['reused'],
+            'live': live}
+
+
+def run_warmup(run: Callable[[int], object], sizes: Iterable[int]) -> float:
+    """
+    Call `run(size)` for each size, largest first, so that the memory arena
+    is grown once and the kernels of every shape are selected before the
+    first real request.
+
+    Returns:
+        (float): Warm-up time in seconds
+    """
+    time_start = time.perf_counter()
+    for size in sorted(sizes, reverse=True):
+        run(size)
+    return time.perf_counter() - time_start
+
+
+class WarmupMixin:
+    """
+    `warmup` and its state for a model class, which provides the input
+    sizes to run (`warmup_sizes`: tokens, frames, samples or characters)
+    and `_warmup_step(size, batch_size)`.
+    """
+    warmup_sizes: Sequence[int] = ()
+    # set by `warmup`
+    ready = False
+    warmup_time = None
+
+    def warmup(self,
+               sizes: Optional[Sequence[int]] = None,
+               batch_size: int = 1,
+               ) -> float:
+        """
+        Run the model once per input size (see `run_warmup`), so that ONNX
+        Runtime allocates its buffers and selects kernels before the first
+        request, then set `ready`.
+
+        Parameters:
+            sizes (list[int]): Optional; Input sizes, by default
+                `warmup_sizes`
+            batch_size (int): Number of inputs per call
+
+        Returns:
+            (float): Warm-up time in seconds
+        """
+        if sizes is None:
+            sizes = self.warmup_sizes
+        self.warmup_time = run_warmup(
+            lambda size: self._warmup_step(size, batch_size), sizes)
+        self.ready = True
+        return self.warmup_time
+
+    def _warmup_step(self, size: int, batch_size: int) -> None:
+        raise NotImplementedError
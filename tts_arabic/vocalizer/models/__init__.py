@@ -1,5 +1,17 @@
-from .shakkelha.network import Shakkelha
-from .shakkala.network import Shakkala
-from .catt.network import CATTModel
-# from ...urls import files_dict
+import importlib
 
+# the networks import onnxruntime; load them on first access (PEP 562)
+_LAZY_ATTRS = {
+    'Shakkelha': '.shakkelha.network',
+    'Shakkala': '.shakkala.network',
+    'CATTModel': '.catt.network',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__),
+                    name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,288 @@
+import re
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ...utils.sessions import WarmupMixin
+
+_word_re = re.compile(r'\S+')
+# character counts vocalized by `warmup` (besides the model's max_length)
+WARMUP_LENGTHS = (32, 128)
+_WARMUP_TEXT = "السلام عليكم يا صديقي كيف حالك اليوم"
+
+
+def supports_batching(ort_sess) -> bool:
+    """False if the graph was exported with a fixed batch size of 1."""
+    batch_dim = ort_sess.get_inputs()[0].shape[0]
+    return not (isinstance(batch_dim, int) and batch_dim == 1)
+
+
+def warmup_texts(length: int, batch_size: int = 1) -> List[str]:
+    """`batch_size` copies of an unvocalized text of `length` characters."""
+    text = ' '.join([_WARMUP_TEXT]*(length // len(_WARMUP_TEXT) + 1))
+    return [text[:length].strip()]*batch_size
+
+
+class VocalizerWarmup(WarmupMixin):
+    """
+    `warmup` of a vocalizer with `_predict_list` and `max_length`: texts of
+    `WARMUP_LENGTHS` and of `max_length` characters.
+    """
+
+    @property
+    def warmup_sizes(self):
+        return WARMUP_LENGTHS + (self.max_length,)
+
+    def _warmup_step(self, length, batch_size):
+        self._predict_list(warmup_texts(length, batch_size),
+                           batch_size=batch_size)
+
+
+def length_buckets(lengths: Sequence[int],
+                   batch_size: int = 64,
+                   tolerance: int = 0,
+                   ) -> List[List[int]]:
+    """
+    Group indices into batches of similar length.
+
+    Indices are sorted by length, and a batch is closed when it holds
+    `batch_size` items or when the next length exceeds the shortest one of
+    the batch by more than `tolerance`. With `tolerance=0`, all rows of a
+    batch have the same length, so that no padding is needed and recurrent
+    models give exactly the same output as for single sentences.
+
+    Returns:
+        (list[list[int]]): Indices of each batch
+    """
+    batches, batch = [], []
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        if batch and (len(batch) >= batch_size
+                      or lengths[i] - lengths[batch[0]] > tolerance):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def pad_ids(seqs: Sequence[Sequence[int]], pad_id: int = 0) -> np.ndarray:
+    """Right-pad token id sequences with `pad_id` to an int64 batch."""
+    batch = np.full((len(seqs), max(len(seq) for seq in seqs)), pad_id,
+                    dtype=np.int64)
+    for i, seq in enumerate(seqs):
+        batch[i, :len(seq)] = seq
+    return batch
+
+
+def word_windows(spans: Sequence[Tuple[int, int]],
+                 max_length: int,
+                 overlap: int,
+                 ) -> List[Tuple[int, int]]:
+    """
+    Cover words with overlapping windows of at most `max_length` characters
+    (a longer single word gets a window of its own).
+
+    Parameters:
+        spans (list[tuple[int, int]]): Start and end offsets of the words
+        max_length (int): Max characters per window
+        overlap (int): Characters shared by consecutive windows
+
+    Returns:
+        (list[tuple[int, int]]): First and past-the-end word of each window
+            (empty without words)
+    """
+    if not spans:
+        return []
+    windows, first = [], 0
+    while True:
+        end = first + 1
+        while end < len(spans) and spans[end][1] - spans[first][0] <= max_length:
+            end += 1
+        windows.append((first, end))
+        if end == len(spans):
+            return windows
+        # the next window starts `overlap` characters before this one ends
+        next_first = first + 1
+        while next_first < end \
+                and spans[next_first][0] < spans[end - 1][1] - overlap:
+            next_first += 1
+        first = next_first
+
+
+def predict_windowed(predict_list: Callable[[List[str]], List[str]],
+                     texts: Sequence[str],
+                     max_length: Optional[int],
+                     overlap: Optional[int] = None,
+                     prepare: Optional[Callable[[str], str]] = None,
+                     ) -> List[str]:
+    """
+    Vocalize texts longer than `max_length` characters as overlapping word
+    windows, all windows of all texts in one `predict_list` call. Each word
+    is taken from the window in which it is most central, i.e. has the most
+    context on its shorter side. Texts up to `max_length` are passed as is.
+
+    Parameters:
+        predict_list (callable): Vocalizes a list of texts; must keep the
+            whitespace-separated words of its input
+        texts (list[str]): Input texts
+        max_length (int): Max characters per window (None or 0: no windows)
+        overlap (int): Characters shared by consecutive windows, by default
+            a quarter of `max_length`
+        prepare (callable): Optional; Normalization the model applies to its
+            input anyway (the windows are cut from the prepared text)
+
+    Returns:
+        (list[str]): Vocalized texts
+    """
+    if overlap is None and max_length:
+        overlap = max_length // 4
+    segments, plans = [], []
+    for text in texts:
+        if prepare is not None:
+            text = prepare(text)
+        if not max_length or len(text) <= max_length:
+            plans.append((text, None, None, len(segments)))
+            segments.append(text)
+            continue
+        spans = [match.span() for match in _word_re.finditer(text)]
+        if not spans:
+            # nothing to cut (e.g. only whitespace)
+            plans.append((text, None, None, len(segments)))
+            segments.append(text)
+            continue
+        windows = word_windows(spans, max_length, overlap)
+        plans.append((text, spans, windows, len(segments)))
+        segments.extend(text[spans[first][0]:spans[end - 1][1]]
+                        for first, end in windows)
+
+    outputs = predict_list(segments) if segments else []
+    results = []
+    for text, spans, windows, offset in plans:
+        if windows is None:
+            results.append(outputs[offset])
+            continue
+        window_words = [outputs[offset + k].split()
+                        for k in range(len(windows))]
+        if any(len(words) != end - first
+               for words, (first, end) in zip(window_words, windows)):
+            # the model merged or dropped words; no safe way to align
+            results.append(predict_list([text])[0])
+            continue
+        best = [(-1., 0)]*len(spans)  # (margin, window) per word
+        for k, (first, end) in enumerate(windows):
+            for w in range(first, end):
+                center = (spans[w][0] + spans[w][1]) / 2
+                margin = min(center - spans[first][0],
+                             spans[end - 1][1] - center)
+                if margin > best[w][0]:
+                    best[w] = (margin, k)
+        pieces, last = [], 0
+        for w, (start, stop) in enumerate(spans):
+            k = best[w][1]
+            pieces.append(text[last:start])
+            pieces.append(window_words[k][w - windows[k][0]])
+            last = stop
+        pieces.append(text[last:])
+        results.append(''.join(pieces))
+    return results
+
+
+class TaggingVocalizer(VocalizerWarmup):
+    """
+    Vocalizer tagging each character of its input (Shakkala, Shakkelha):
+    list input is vocalized in length-bucketed batches (see
+    `length_buckets`), texts longer than `max_length` as word windows (see
+    `predict_windowed`). Subclasses set `ort_sess`, `max_length` and
+    `pad_id` and implement the model-specific `_encode`, `_decode` and
+    `_output_probs`.
+    """
+
+    def _encode(self, text: str) -> Tuple[List[int], object]:
+        """Input ids of `text`, and any state `_decode` needs."""
+        raise NotImplementedError
+
+    def _decode(self, probs: np.ndarray, text: str, state) -> str:
+        """Vocalized `text` from the probabilities, shape [1, n_ids, ...]."""
+        raise NotImplementedError
+
+    def _output_probs(self, probs: np.ndarray) -> np.ndarray:
+        """Probabilities returned with `return_probs`."""
+        raise NotImplementedError
+
+    def infer(self, x):
+        return self.ort_sess.run(
+            None, {"input": x},)[0]
+
+    def _predict_list(self,
+                      input_list: List[str],
+                      return_probs: bool = False,
+                      batch_size: int = 64,
+                      length_tolerance: int = 0):
+        encoded = [self._encode(input_text) for input_text in input_list]
+        probs_list = [None]*len(input_list)
+        if not supports_batching(self.ort_sess):
+            batch_size = 1
+        for batch in length_buckets([len(ids) for ids, _ in encoded],
+                                    batch_size, length_tolerance):
+            probs_batch = self.infer(
+                pad_ids([encoded[i][0] for i in batch], pad_id=self.pad_id))
+            for i, probs in zip(batch, probs_batch):
+                probs_list[i] = probs[None, :len(encoded[i][0])]
+
+        output_list = [self._decode(probs, input_text, state)
+                       for probs, input_text, (_, state)
+                       in zip(probs_list, input_list, encoded)]
+        if return_probs:
+            return output_list, [self._output_probs(probs)
+                                 for probs in probs_list]
+
+        return output_list
+
+    def _predict_single(self, input_text: str, return_probs: bool = False):
+        ids, state = self._encode(input_text)
+        probs = self.infer(np.array(ids, dtype=np.int64)[None])
+        output = self._decode(probs, input_text, state)
+
+        if return_probs:
+            return output, self._output_probs(probs)
+
+        return output
+
+    def predict(self,
+                input: Union[str, List[str]],
+                return_probs: bool = False,
+                batch_size: int = 64,
+                length_tolerance: int = 0,
+                max_length: Optional[int] = None,
+                overlap: Optional[int] = None):
+        """
+        Parameters:
+            input (str|list[str]): Unvocalized text(s)
+            return_probs (bool): Also return the class probabilities
+            batch_size (int): Max number of sentences per model call
+            length_tolerance (int): Max length difference (in characters)
+                of the sentences padded into one batch; with 0, the output
+                is identical to per-sentence prediction
+            max_length (int): Texts longer than this many characters are
+                vocalized as overlapping word windows (see
+                `predict_windowed`); by default `self.max_length`, 0 for
+                whole texts. Not applied with `return_probs`
+            overlap (int): Characters shared by consecutive windows
+        """
+        if max_length is None:
+            max_length = self.max_length
+        if isinstance(input, str):
+            if return_probs or not max_length or len(input) <= max_length:
+                return self._predict_single(input, return_probs=return_probs)
+        elif return_probs:
+            return self._predict_list(input, return_probs=True,
+                                      batch_size=batch_size,
+                                      length_tolerance=length_tolerance)
+
+        output_list = predict_windowed(
+            lambda texts: self._predict_list(
+                texts, batch_size=batch_size,
+                length_tolerance=length_tolerance),
+            [input] if isinstance(input, str) else input, max_length, overlap)
+        return output_list[0] if isinstance(input, str) else output_list
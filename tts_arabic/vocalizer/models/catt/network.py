@@ -1,49 +1,121 @@
 
 import numpy as np
-import onnxruntime as ort
+from typing import List, Optional, Union
 from .tashkeel_tokenizer_mod import TashkeelTokenizer
 from .utils import remove_non_arabic
+from ..batching import (
+    VocalizerWarmup, length_buckets, pad_ids, predict_windowed,
+    supports_batching)
+from ....utils.sessions import create_session
 
 
-class CATTModel:
+class CATTModel(VocalizerWarmup):
     def __init__(self, 
                  sd_path: str = "data/catt_eo.onnx",      
-                 cuda: bool = None) -> None:
+                 cuda: bool = None,
+                 optimize: Optional[bool] = None) -> None:
         providers = ['CPUExecutionProvider']
         if cuda is not None:           
             if not isinstance(cuda, int): cuda = 0
             providers.insert(0, ('CUDAExecutionProvider', {
                 'device_id': cuda
             }))
-        self.ort_sess = ort.InferenceSession(
-            sd_path, providers=providers)
+        self.ort_sess = create_session(
+            sd_path, providers, optimize=optimize)
         
         self.tokenizer = TashkeelTokenizer()
+        # attention cost grows quadratically with the length; longer texts
+        # are vocalized as overlapping word windows
+        self.max_length = 512
 
-    def predict(self, text: str, return_probs: bool=False
-              ) -> np.ndarray:
+    def _encode(self, text: str) -> list:
+        text = remove_non_arabic(text)
+        input_ids, _ = self.tokenizer.encode(text, test_match=False)
+        return input_ids[1:-1]
+
+    def infer(self, input_ids: np.ndarray) -> np.ndarray:
+        return self.ort_sess.run(None, {'in_token_ids': input_ids})[0]
+
+    def _decode(self, input_ids: np.ndarray, y_pred_probs: np.ndarray
+                ) -> List[str]:
+        y_pred = y_pred_probs.argmax(-1)
+        y_pred[self.tokenizer.letters_map[' '] == input_ids] = self.tokenizer.tashkeel_map[self.tokenizer.no_tashkeel_tag]
+        y_pred[self.tokenizer.letters_map['<PAD>'] == input_ids] = self.tokenizer.tashkeel_map['<PAD>']
+        return self.tokenizer.decode(input_ids, y_pred)
+
+    def _predict_list(self,
+                      input_list: List[str],
+                      return_probs: bool=False,
+                      batch_size: int=64,
+                      length_tolerance: int=0):
+        ids_list = [self._encode(text) for text in input_list]
+        output_list = [None]*len(input_list)
+        probs_list = [None]*len(input_list)
+        if not supports_batching(self.ort_sess):
+            batch_size = 1
+        for batch in length_buckets([len(ids) for ids in ids_list],
+                                    batch_size, length_tolerance):
+            input_ids = pad_ids([ids_list[i] for i in batch],
+                                pad_id=self.tokenizer.letters_map['<PAD>'])
+            y_pred_probs = self.infer(input_ids)
+            # decode iterates over the rows and drops the <PAD> positions
+            for i, text in zip(batch, self._decode(input_ids, y_pred_probs)):
+                output_list[i] = text
+            for i, probs in zip(batch, y_pred_probs):
+                probs_list[i] = probs[None, :len(ids_list[i])]
+
+        if return_probs:
+            return output_list, probs_list
+
+        return output_list
+
+    def predict(self,
+                text: Union[str, List[str]],
+                return_probs: bool=False,
+                batch_size: int=64,
+                length_tolerance: int=0,
+                max_length: Optional[int]=None,
+                overlap: Optional[int]=None,
+                ) -> Union[str, List[str]]:
         """
         Parameters:
-            text (str): Text
+            text (str|list[str]): Text(s)
+            return_probs (bool): Also return the class probabilities
+            batch_size (int): Max number of texts per model call (list input)
+            length_tolerance (int): Max length difference (in characters)
+                of the texts padded into one batch; with 0, the output is
+                identical to per-text prediction
+            max_length (int): Texts longer than this many characters (after
+                removing non-Arabic characters) are vocalized as overlapping
+                word windows (see `predict_windowed`); by default
+                `self.max_length`, 0 for whole texts. Not applied with
+                `return_probs`
+            overlap (int): Characters shared by consecutive windows
         
         Returns:
-            (str): Diacritized text
+            (str|list[str]): Diacritized text(s)
         """
-        
-        
-        text = remove_non_arabic(text)
+        if max_length is None:
+            max_length = self.max_length
+        if return_probs and not isinstance(text, str):
+            return self._predict_list(text, return_probs=True,
+                                      batch_size=batch_size,
+                                      length_tolerance=length_tolerance)
+        if not return_probs and (not isinstance(text, str) or max_length
+                                 and len(text) > max_length):
+            output_list = predict_windowed(
+                lambda texts: self._predict_list(
+                    texts, batch_size=batch_size,
+                    length_tolerance=length_tolerance),
+                [text] if isinstance(text, str) else text,
+                max_length, overlap, prepare=remove_non_arabic)
+            return output_list[0] if isinstance(text, str) else output_list
 
-        input_ids, _ = self.tokenizer.encode(text, test_match=False)        
-        input_ids = np.array(input_ids, dtype=np.int64)[None][:, 1:-1]
-        
-        y_pred_probs = self.ort_sess.run(None, {'in_token_ids': input_ids})[0]        
-        y_pred = y_pred_probs.argmax(-1)
-        
-        y_pred[self.tokenizer.letters_map[' '] == input_ids] = self.tokenizer.tashkeel_map[self.tokenizer.no_tashkeel_tag]
-        text_with_tashkeel = self.tokenizer.decode(input_ids, y_pred)[0]
+        input_ids = np.array(self._encode(text), dtype=np.int64)[None]
+        y_pred_probs = self.infer(input_ids)
+        text_with_tashkeel = self._decode(input_ids, y_pred_probs)[0]
         
         if return_probs:
             return text_with_tashkeel, y_pred_probs
         
         return text_with_tashkeel
-    
\ No newline at end of file
@@ -1,7 +1,7 @@
 
 
 import re
-from . import bw2ar
+from ....text.transliterate import arabic_to_buckwalter, buckwalter_to_arabic
 # import torch
 # import xer
 
@@ -74,7 +74,7 @@ class TashkeelTokenizer:
 
     def split_tashkeel_from_text(self, text_with_tashkeel, test_match=True):
         text_with_tashkeel = self.clean_text(text_with_tashkeel)
-        text_with_tashkeel = bw2ar.transliterate_text(text_with_tashkeel, 'ar2bw')
+        text_with_tashkeel = arabic_to_buckwalter(text_with_tashkeel, scheme='standard')
         text_with_tashkeel = text_with_tashkeel.replace('`', '') # remove dagger 'alif
 
         # unify the order of shaddah and the harakah to make shaddah always at the beginning
@@ -166,7 +166,7 @@ class TashkeelTokenizer:
             # VERY IMPORTANT NOTE: zip takes min(len(letters), len(tashkeel)) and discard the reset of letters / tashkeels
             letter_n_tashkeel_pairs = list(zip(letters, tashkeel))
             bw_text = self.combine_tashkeel_with_text(letter_n_tashkeel_pairs)
-            ar_text = bw2ar.transliterate_text(bw_text, 'bw2ar')
+            ar_text = buckwalter_to_arabic(bw_text, scheme='standard')
             ar_texts.append(ar_text)
         return ar_texts
 
@@ -1,50 +1,198 @@
+import os
+import threading
 from pathlib import Path
-from typing import Literal, List, Union, get_args
-from packaging.version import Version
-
-import gdown
+from typing import Literal, List, Optional, Union, get_args
 
 from ...urls import files_dict
-from ..models import Shakkala, Shakkelha, CATTModel
+from ...utils.cache import DiskCache, LRUCache
+from ...utils import model_store
+from ...utils.registry import model_registry
 
 _MODEL_TYPE = Literal['catt_eo', 'shakkala', 'shakkelha']
 valid_model_ids = get_args(_MODEL_TYPE)
 
-def get_model_path(package_path, name="fastpitch") -> str:
-    model_path = package_path.joinpath(files_dict[name]['file'])     
-    if not model_path.parent.exists():
-        model_path.parent.mkdir(parents=True)
-    if not model_path.exists():
-        if Version(gdown.__version__) < Version("6"):
-            gdown.download(files_dict[name]['url'], output=model_path.as_posix(), fuzzy=True)
-        else:
-            gdown.download(files_dict[name]['url'], output=model_path.as_posix())
-    return model_path.as_posix()
+def get_model_path(package_path=None, name="fastpitch") -> str:
+    return model_store.get_model_path(name, root=package_path)
 
 
-def get_model(model: _MODEL_TYPE = 'shakkelha'):
+def get_model(model: _MODEL_TYPE = 'shakkelha',
+              optimize: Optional[bool] = None,
+              warmup: bool = False):
     assert model in valid_model_ids
+    from ..models import Shakkala, Shakkelha, CATTModel
 
-    # data_folder = Path(__file__).parent.parent.parent.joinpath('data')
-    package_path = Path(__file__).parent.parent.parent
-    model_path = get_model_path(package_path, model)  
+    model_path = get_model_path(name=model)
     if model == 'shakkala':      
-        return Shakkala(sd_path=model_path)     
+        vocalizer = Shakkala(sd_path=model_path, optimize=optimize)     
     elif model == 'shakkelha':
-        return Shakkelha(sd_path=model_path)
+        vocalizer = Shakkelha(sd_path=model_path, optimize=optimize)
     elif model == 'catt_eo':
-        return CATTModel(sd_path=model_path)
+        vocalizer = CATTModel(sd_path=model_path, optimize=optimize)
+    if warmup:
+        vocalizer.warmup()
+    return vocalizer
+
+
+_cache_lock = threading.Lock()
+_memory_cache = None
+_disk_cache = None
+_env_loaded = False
+
+
+def set_vocalization_cache(path: Optional[Union[str, Path]] = None,
+                           maxsize: Optional[int] = 4096,
+                           max_bytes: Optional[int] = None,
+                           ) -> None:
+    """
+    Enable the vocalization cache used by `vocalize`.
+
+    Entries are keyed by model id, model timestamp (`files_dict`) and the
+    input with tatweel removed and whitespace collapsed. Lookups go to an
+    in-memory LRU of `maxsize` entries, then to the sqlite file at `path`
+    (optional), which concurrent processes can share. The environment
+    variable `TTS_ARABIC_VOCALIZATION_CACHE=<path>` enables both tiers in
+    every process.
+
+    Parameters:
+        path (str): Optional; sqlite file of the on-disk tier
+        maxsize (int): Max number of entries of the in-memory tier
+        max_bytes (int): Optional; Size limit of the on-disk tier
+    """
+    global _memory_cache, _disk_cache, _env_loaded
+    with _cache_lock:
+        _env_loaded = True
+        if _disk_cache is not None:
+            _disk_cache.close()
+        _memory_cache = LRUCache(maxsize=maxsize)
+        _disk_cache = DiskCache(path, max_bytes=max_bytes) \
+            if path is not None else None
+
+
+def disable_vocalization_cache() -> None:
+    global _memory_cache, _disk_cache, _env_loaded
+    with _cache_lock:
+        _env_loaded = True
+        if _disk_cache is not None:
+            _disk_cache.close()
+        _memory_cache = _disk_cache = None
+
+
+def _cache_tiers():
+    # one consistent view, the globals are replaced by (dis)abling the cache
+    with _cache_lock:
+        return _memory_cache, _disk_cache
+
+
+def clear_vocalization_cache(disk: bool = False) -> None:
+    """Empty the in-memory tier, and the on-disk tier if `disk`."""
+    memory_cache, disk_cache = _cache_tiers()
+    if memory_cache is not None:
+        memory_cache.clear()
+    if disk and disk_cache is not None:
+        disk_cache.clear()
+
+
+def vocalization_cache_info() -> dict:
+    """
+    Returns:
+        (dict): `memory` and `disk` tier counters (hits, misses, hit_rate,
+            size, ...), None for a disabled tier
+    """
+    memory_cache, disk_cache = _cache_tiers()
+    return {'memory': memory_cache.info()
+                if memory_cache is not None else None,
+            'disk': disk_cache.info() if disk_cache is not None else None}
+
+
+def _load_env_cache():
+    global _env_loaded
+    path = os.environ.get('TTS_ARABIC_VOCALIZATION_CACHE')
+    if path:
+        set_vocalization_cache(path)
+    _env_loaded = True
+
+
+def _normalize_input(text: str) -> str:
+    return ' '.join(text.replace('\u0640', '').split())
+
+
+def _cache_get(memory_cache: LRUCache,
+               disk_cache: Optional[DiskCache],
+               key: str,
+               ) -> Optional[str]:
+    output = memory_cache.get(key)
+    if output is None and disk_cache is not None:
+        value = disk_cache.get(key)
+        if value is not None:
+            output = value.decode('utf-8')
+            memory_cache.put(key, output)
+    return output
+
+
+def _cache_put(memory_cache: LRUCache,
+               disk_cache: Optional[DiskCache],
+               key: str,
+               output: str,
+               ) -> None:
+    memory_cache.put(key, output)
+    if disk_cache is not None:
+        disk_cache.put(key, output.encode('utf-8'))
+
+
+def _get_vocalizer(model: _MODEL_TYPE):
+    model_path = model_store.model_path(model)
+    return model_registry.get(
+        ('vocalizer', model, None),
+        lambda: get_model(model=model),
+        nbytes=lambda _: model_path.stat().st_size)
+
+
+def _vocalize_cached(input_text: Union[str, List[str]],
+                     model: _MODEL_TYPE,
+                     batch_size: int,
+                     memory_cache: LRUCache,
+                     disk_cache: Optional[DiskCache],
+                     ) -> Union[str, List[str]]:
+    texts = [input_text] if isinstance(input_text, str) else input_text
+    texts = [_normalize_input(text) for text in texts]
+    prefix = f"{model}\t{model_store.model_version(model)}\t"
+    keys = [prefix + text for text in texts]
+    outputs = [_cache_get(memory_cache, disk_cache, key) for key in keys]
+
+    # vocalize each distinct missing text once
+    missing = {}
+    for key, text, output in zip(keys, texts, outputs):
+        if output is None:
+            missing.setdefault(key, text)
+    if missing:
+        predicted = _get_vocalizer(model).predict(
+            list(missing.values()), batch_size=batch_size)
+        predicted = dict(zip(missing, predicted))
+        for key, output in predicted.items():
+            _cache_put(memory_cache, disk_cache, key, output)
+        outputs = [predicted[key] if output is None else output
+                   for key, output in zip(keys, outputs)]
+
+    return outputs[0] if isinstance(input_text, str) else outputs
 
 
 def vocalize(input_text: Union[str, List[str]], 
              model: _MODEL_TYPE = 'shakkelha',
-             return_probs: bool = False
+             return_probs: bool = False,
+             batch_size: int = 64,
+             cache: Optional[bool] = None,
              ) -> Union[str, List[str]]:
     """
     Parameters:
         input_text (str|list[str]): Unvocalized text
-        model: Vocalization model [shakkala|shakkelha]
+        model: Vocalization model [shakkala|shakkelha|catt_eo]
         return_probs: Return probabilities?
+        batch_size: Max number of equal-length sentences vocalized in one
+            model call (list input)
+        cache: Look up and store the results in the vocalization cache
+            (see `set_vocalization_cache`); by default, whenever the cache
+            is enabled. Cached results are those of the normalized input
+            (no tatweel, collapsed whitespace)
         
     Returns:
         (str|list[str]): Predicted vocalized text
@@ -60,15 +208,15 @@ def vocalize(input_text: Union[str, List[str]],
 
     """
     assert model in valid_model_ids
-    if not hasattr(vocalize, model):
-        setattr(vocalize, model, get_model(model=model))
+    if not _env_loaded:
+        _load_env_cache()
+    memory_cache, disk_cache = _cache_tiers()
+    if cache is not False and not return_probs and memory_cache is not None:
+        return _vocalize_cached(input_text, model, batch_size,
+                                memory_cache, disk_cache)
+    if cache and memory_cache is None:
+        raise ValueError("the vocalization cache is not enabled "
+                         "(see set_vocalization_cache)")
 
-    if model == 'shakkala':
-        return vocalize.shakkala.predict(input_text, return_probs=return_probs)
-    elif model == 'shakkelha':
-        return vocalize.shakkelha.predict(input_text, return_probs=return_probs)
-    elif model == 'catt_eo':
-        return vocalize.catt_eo.predict(input_text, return_probs=return_probs)
-    
-    else:
-        return  
\ No newline at end of file
+    return _get_vocalizer(model).predict(input_text, return_probs=return_probs,
+                             batch_size=batch_size) 
\ No newline at end of file
@@ -1,49 +1,25 @@
-import numpy as np
-import onnxruntime as ort
-from typing import Union, List
+from typing import Optional
 
-from . import encode, decode
+from . import encode, decode, CHARACTERS_MAPPING
+from ..batching import TaggingVocalizer
+from ....utils.sessions import create_session
 
-class Shakkelha:
-    def __init__(self, sd_path: str=None):     
-        self.ort_sess = ort.InferenceSession(
-            sd_path, providers=['CUDAExecutionProvider', 
-                                'CPUExecutionProvider'])   
-        
+class Shakkelha(TaggingVocalizer):
+    pad_id = CHARACTERS_MAPPING['<PAD>']
 
-    def infer(self, x):
-        return self.ort_sess.run(
-            None, {"input": x},)[0] 
-    
-    def _predict_list(self, input_list: List[str], return_probs: bool=False):
-        output_list = []
-        probs_list = []
-        for input_text in input_list:
-            if return_probs:
-                output_text, probs = self._predict_single(input_text, return_probs=True)
-                output_list.append(output_text)
-                probs_list.append(probs[0, 1:-1])
-            else:
-                output_list.append(self._predict_single(input_text))
+    def __init__(self, sd_path: str=None, optimize: Optional[bool]=None):
+        self.ort_sess = create_session(
+            sd_path, ['CUDAExecutionProvider', 
+                      'CPUExecutionProvider'], optimize=optimize)   
+        # longer texts are vocalized as overlapping word windows
+        self.max_length = 400
 
-        if return_probs:
-            return output_list, probs_list
-        
-        return output_list
-    
-    def _predict_single(self, input_text: str, return_probs: bool=False):
-        ids = encode(input_text)
-        input = np.array(ids, dtype=np.int64)[None]
-        probs = self.infer(input)
-        output = decode(probs, input_text)
+    def _encode(self, input_text: str):
+        return encode(input_text), None
 
-        if return_probs:
-            return output, probs[0, 1:-1]
-        
-        return output
+    def _decode(self, probs, input_text: str, _) -> str:
+        return decode(probs, input_text)
 
-    def predict(self, input: Union[str, List[str]], return_probs: bool=False):
-        if isinstance(input, str):
-            return self._predict_single(input, return_probs=return_probs)        
-        
-        return self._predict_list(input, return_probs=return_probs)
\ No newline at end of file
+    def _output_probs(self, probs):
+        # without the <SOS> and <EOS> positions
+        return probs[0, 1:-1]